@@ -0,0 +1,188 @@
+"""Render a PSD template once per row of a manifest, without the GUI.
+
+Usage:
+    python batch.py template.psd manifest.csv -o out/ --format png --workers 4
+    python batch.py template.psd manifest.csv -o out/ --sizes 1024 256
+    python batch.py template.psd manifest.csv -o out/ --cache-dir ~/.cache/layer-master/renders
+
+Manifest rows may be CSV or JSONL. CSV columns:
+    output            Output file name (optional, defaults to row-00001.<format>)
+    text:<layer>      New text for the named text layer
+    image:<layer>     Path of the replacement image for the named layer
+    visible:<layer>   true/false to show or hide the named layer
+Empty CSV cells leave the layer unchanged. JSONL rows use the same keys
+grouped into objects:
+    {"output": "a.png", "text": {"Title": "Hello"}, "image": {"Photo": "a.jpg"}, "visible": {"Badge": false}}
+Relative image paths are resolved against the manifest's directory.
+With --sizes, each row also gets downscaled copies (name_1024.png, ...)
+derived from the same render.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from editor.export import ExportTarget
+from editor.psd_editor import PSDEditor
+
+TRUE_VALUES = {'1', 'true', 'yes', 'on', 'show', 'visible'}
+FALSE_VALUES = {'0', 'false', 'no', 'off', 'hide', 'hidden'}
+OUTPUT_FORMATS = {'png': 'PNG', 'jpg': 'JPEG', 'jpeg': 'JPEG'}
+
+_editor = None  # Per-process template editor, shared by every row the process renders
+
+
+def parse_visibility(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"Invalid visibility value '{value}'")
+
+
+def read_manifest(manifest_path):
+    """Yield row dicts with 'output', 'text', 'image' and 'visible' keys."""
+    if manifest_path.lower().endswith(('.jsonl', '.ndjson')):
+        with open(manifest_path, encoding='utf-8') as manifest_file:
+            for line in manifest_file:
+                line = line.strip()
+                if line:
+                    row = json.loads(line)
+                    yield {
+                        'output': row.get('output'),
+                        'text': row.get('text', {}),
+                        'image': row.get('image', {}),
+                        'visible': row.get('visible', {}),
+                    }
+        return
+
+    with open(manifest_path, newline='', encoding='utf-8') as manifest_file:
+        for record in csv.DictReader(manifest_file):
+            row = {'output': record.get('output') or None, 'text': {}, 'image': {}, 'visible': {}}
+            for column, value in record.items():
+                if column is None or ':' not in column or value in (None, ''):
+                    continue
+                action, layer_name = column.split(':', 1)
+                if action in ('text', 'image', 'visible'):
+                    row[action][layer_name] = value
+            yield row
+
+
+def apply_row(editor, row, base_dir):
+    """Apply one manifest row's substitutions to the editor."""
+    editor.reset_edits()
+    image_paths = {}
+    for action, changes in (('text', row['text']), ('image', row['image']), ('visible', row['visible'])):
+        for layer_name, value in changes.items():
+            layer_id = editor.find_layer_id(layer_name)
+            if layer_id is None:
+                raise KeyError(f"Layer '{layer_name}' not found")
+            if action == 'text':
+                editor.edit_layer_text(layer_id, str(value))
+            elif action == 'image':
+                image_paths[layer_id] = os.path.join(base_dir, value)
+            elif editor.get_layer(layer_id).visible != parse_visibility(value):
+                editor.toggle_layer_visibility(layer_id)
+    # Decode the row's images together; repeated assets come from the ingest cache
+    editor.replace_layer_images(image_paths)
+
+
+def open_template(template_path, render_backend, cache_dir=None):
+    # Rows are never undone, so don't keep history snapshots and their renders around
+    editor = PSDEditor(render_backend=render_backend, disk_cache_dir=cache_dir, history_depth=0)
+    editor.open_psd(template_path, lazy=True)
+    # Decode every visible layer once up front; forked workers inherit the warm cache
+    editor.get_composite_image(incremental=False)
+    return editor
+
+
+def _init_worker(template_path, render_backend, cache_dir):
+    global _editor
+    if _editor is None:
+        _editor = open_template(template_path, render_backend, cache_dir)
+
+
+def render_row(job):
+    """Render one row; returns (row_number, output_path, error message or None)."""
+    row_number, row, output_path, image_format, base_dir, sizes = job
+    try:
+        apply_row(_editor, row, base_dir)
+        root, extension = os.path.splitext(output_path)
+        targets = [ExportTarget(output_path, None, image_format)]
+        targets += [ExportTarget(f"{root}_{size}{extension}", size, image_format) for size in sizes]
+        errors = [error for _, error in _editor.export(targets, workers=len(targets)) if error]
+        return row_number, output_path, "; ".join(errors) or None
+    except Exception as e:
+        return row_number, output_path, f"{type(e).__name__}: {e}"
+
+
+def iter_jobs(manifest_path, output_dir, extension, sizes=()):
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    image_format = OUTPUT_FORMATS[extension]
+    for row_number, row in enumerate(read_manifest(manifest_path), start=1):
+        output_name = row['output'] or f"row-{row_number:05d}.{extension}"
+        row_format = OUTPUT_FORMATS.get(os.path.splitext(output_name)[1][1:].lower(), image_format)
+        yield row_number, row, os.path.join(output_dir, output_name), row_format, base_dir, sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('template', help="PSD template to fill")
+    parser.add_argument('manifest', help="CSV or JSONL manifest, one output per row")
+    parser.add_argument('-o', '--output-dir', default='.', help="Directory for rendered images")
+    parser.add_argument('--format', choices=sorted(OUTPUT_FORMATS), default='png',
+                        help="Format for rows without an 'output' file name")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (1 renders in-process)")
+    parser.add_argument('--backend', choices=['pil', 'numpy'], default='pil', help="Render backend")
+    parser.add_argument('--cache-dir', help="Persistent render cache shared by workers and later runs")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[],
+                        help="Also write copies scaled to these longest-side sizes")
+    args = parser.parse_args(argv)
+
+    global _editor
+    os.makedirs(args.output_dir, exist_ok=True)
+    start = time.perf_counter()
+    jobs = iter_jobs(args.manifest, args.output_dir, args.format, tuple(args.sizes))
+
+    # Parse the template once here; with fork, workers share the parsed file and decoded layers
+    start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+    if args.workers <= 1 or start_method == 'fork':
+        _editor = open_template(args.template, args.backend, args.cache_dir)
+
+    if args.workers <= 1:
+        results = map(render_row, jobs)
+        pool = None
+    else:
+        context = multiprocessing.get_context(start_method)
+        pool = context.Pool(args.workers, initializer=_init_worker,
+                            initargs=(args.template, args.backend, args.cache_dir))
+        results = pool.imap_unordered(render_row, jobs, chunksize=4)
+
+    rendered = failed = 0
+    try:
+        for row_number, output_path, error in results:
+            if error is None:
+                rendered += 1
+                print(f"[row {row_number}] ok {output_path}", flush=True)
+            else:
+                failed += 1
+                print(f"[row {row_number}] error {output_path}: {error}", file=sys.stderr, flush=True)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    elapsed = time.perf_counter() - start
+    print(f"Rendered {rendered} row(s), {failed} failed, in {elapsed:.1f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Compare the PIL and NumPy render backends.
+
+Usage:
+    python -m benchmarks.backends --size 4000 --layers 150
+
+Both backends composite the same layers with the normal blend mode, so
+their outputs should agree to within one level of rounding.
+"""
+import argparse
+import multiprocessing
+import resource
+import time
+
+import numpy as np
+
+from benchmarks.compositing import make_layers
+from editor.psd_editor import RENDER_BACKENDS
+
+
+def _run(name, canvas_size, layer_count, queue):
+    layers = make_layers(canvas_size, layer_count)
+    compositor = RENDER_BACKENDS[name]()
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    canvas = compositor.new_canvas(canvas_size)
+    for layer_image, offset in layers:
+        compositor.blend(canvas, layer_image, offset)
+    image = compositor.to_image(canvas, 'RGBA')
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, (peak_rss - baseline_rss) / 1024, np.asarray(image)))
+
+
+def run_isolated(name, canvas_size, layer_count):
+    """Run one backend in a child process and return (seconds, peak MiB, pixels)."""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_run, args=(name, canvas_size, layer_count, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=4000, help="Canvas width and height in pixels")
+    parser.add_argument('--layers', type=int, default=150, help="Number of layers to composite")
+    args = parser.parse_args()
+
+    canvas_size = (args.size, args.size)
+    results = {}
+    for name in RENDER_BACKENDS:
+        elapsed, peak_mib, pixels = run_isolated(name, canvas_size, args.layers)
+        results[name] = pixels.astype(np.int16)
+        print(f"{name:>6}: {elapsed:8.3f} s  peak +{peak_mib:8.1f} MiB")
+
+    # Colour of fully transparent pixels is undefined, so compare where alpha > 0
+    visible = (results['pil'][..., 3] > 0) | (results['numpy'][..., 3] > 0)
+    difference = np.abs(results['pil'] - results['numpy'])[visible]
+    print(f"Max channel difference: {difference.max() if difference.size else 0}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Compare full-canvas and bounding-box layer compositing.
+
+Usage:
+    python -m benchmarks.compositing --size 4000 --layers 150
+
+Each path runs in a fresh process so peak RSS can be compared fairly.
+"""
+import argparse
+import multiprocessing
+import random
+import resource
+import time
+
+from PIL import Image
+
+from editor.compositor import composite_layer
+
+
+def make_layers(canvas_size, count, seed=0):
+    """Build small semi-transparent layers scattered over (and past) the canvas."""
+    rng = random.Random(seed)
+    width, height = canvas_size
+    layers = []
+    for _ in range(count):
+        layer_width = rng.randint(20, max(21, width // 8))
+        layer_height = rng.randint(20, max(21, height // 8))
+        color = tuple(rng.randint(0, 255) for _ in range(3)) + (rng.randint(32, 255),)
+        image = Image.new('RGBA', (layer_width, layer_height), color)
+        offset = (rng.randint(-layer_width // 2, width - layer_width // 2),
+                  rng.randint(-layer_height // 2, height - layer_height // 2))
+        layers.append((image, offset))
+    return layers
+
+
+def render_full_canvas(canvas_size, layers):
+    """The original approach: one canvas-sized temporary per layer."""
+    composite_image = Image.new('RGBA', canvas_size)
+    for layer_image, offset in layers:
+        temp_image = Image.new('RGBA', canvas_size)
+        temp_image.paste(layer_image, offset)
+        composite_image = Image.alpha_composite(composite_image, temp_image)
+    return composite_image
+
+
+def render_bounding_box(canvas_size, layers):
+    composite_image = Image.new('RGBA', canvas_size)
+    for layer_image, offset in layers:
+        composite_layer(composite_image, layer_image, offset)
+    return composite_image
+
+
+RENDERERS = {
+    'full-canvas': render_full_canvas,
+    'bounding-box': render_bounding_box,
+}
+
+
+def _run(name, canvas_size, layer_count, queue):
+    layers = make_layers(canvas_size, layer_count)
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    image = RENDERERS[name](canvas_size, layers)
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, (peak_rss - baseline_rss) / 1024, image.tobytes()))
+
+
+def run_isolated(name, canvas_size, layer_count):
+    """Run one renderer in a child process and return (seconds, peak MiB, pixels)."""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_run, args=(name, canvas_size, layer_count, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=4000, help="Canvas width and height in pixels")
+    parser.add_argument('--layers', type=int, default=150, help="Number of layers to composite")
+    args = parser.parse_args()
+
+    canvas_size = (args.size, args.size)
+    results = {}
+    for name in RENDERERS:
+        elapsed, peak_mib, pixels = run_isolated(name, canvas_size, args.layers)
+        results[name] = pixels
+        print(f"{name:>13}: {elapsed:8.3f} s  peak +{peak_mib:8.1f} MiB")
+
+    identical = results['full-canvas'] == results['bounding-box']
+    print(f"Pixel-identical output: {'yes' if identical else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
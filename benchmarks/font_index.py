@@ -0,0 +1,59 @@
+"""Measure font index cold-start, warm start and lookup latency.
+
+Usage:
+    python -m benchmarks.font_index
+    python -m benchmarks.font_index --dirs /usr/share/fonts ~/fonts
+
+Uses a temporary index file so the user's cached index is left untouched.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from editor.font_index import FontIndex, default_font_directories, normalize_name
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dirs', nargs='+', default=default_font_directories(), help="Font directories to index")
+    parser.add_argument('--lookups', type=int, default=100000, help="Number of warm lookups to time")
+    args = parser.parse_args()
+    directories = [os.path.expanduser(directory) for directory in args.dirs]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index_path = os.path.join(temp_dir, 'font_index.json')
+
+        cold_index = FontIndex(directories, index_path)
+        start = time.perf_counter()
+        cold_index.ensure_loaded()
+        cold_time = time.perf_counter() - start
+        names = list(cold_index._names)
+        print(f"cold start: {cold_time * 1000:9.2f} ms  ({len(cold_index._files)} files, {len(names)} names)")
+
+        warm_index = FontIndex(directories, index_path)
+        start = time.perf_counter()
+        warm_index.ensure_loaded()
+        warm_time = time.perf_counter() - start
+        print(f"warm start: {warm_time * 1000:9.2f} ms  (from {index_path})")
+
+        if not names:
+            print("No fonts found; skipping lookup timing.")
+            return
+        queries = [names[i % len(names)] for i in range(args.lookups)]
+        start = time.perf_counter()
+        for query in queries:
+            warm_index.find(query)
+        lookup_time = time.perf_counter() - start
+        print(f"lookup:     {lookup_time / len(queries) * 1e6:9.3f} us per find()")
+
+        missing = normalize_name('No Such Font Family')
+        start = time.perf_counter()
+        for _ in range(len(queries)):
+            warm_index.find(missing)
+        miss_time = time.perf_counter() - start
+        print(f"miss:       {miss_time / len(queries) * 1e6:9.3f} us per find()")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Compare eager and lazy (memory-mapped) PSD opening.
+
+Usage:
+    python -m benchmarks.lazy_open --size 4000 --layers 40
+    python -m benchmarks.lazy_open --psd path/to/file.psd
+
+Reports the time until the layer list is available, resident memory after
+opening, and the time to render a single layer afterwards. Each mode runs
+in a fresh process.
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from editor.psd_editor import PSDEditor
+
+
+def write_noise_psd(file_path, size, layer_count, seed=0):
+    """Write a PSD of large noise layers, which compress poorly like real photos."""
+    from psd_tools import PSDImage
+    from psd_tools.constants import Tag
+
+    rng = np.random.default_rng(seed)
+    width, height = size
+    psd = PSDImage.new('RGB', size)
+    for index in range(layer_count):
+        layer_width, layer_height = width // 2, height // 2
+        pixels = rng.integers(0, 256, (layer_height, layer_width, 4), dtype=np.uint8)
+        pixels[..., 3] = 255
+        layer = psd.create_pixel_layer(
+            Image.fromarray(pixels, 'RGBA'), name=f"Layer {index + 1}",
+            left=int(rng.integers(0, width - layer_width)), top=int(rng.integers(0, height - layer_height)))
+        layer.tagged_blocks.set_data(Tag.LAYER_ID, index + 1)
+    psd.save(file_path)
+
+
+def current_rss_mib():
+    """Resident set size of this process, from /proc where available."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run(file_path, lazy, queue):
+    editor = PSDEditor()
+    baseline_rss = current_rss_mib()
+    start = time.perf_counter()
+    editor.open_psd(file_path, lazy=lazy)
+    layer_count = len(editor.get_layer_info())
+    list_time = time.perf_counter() - start
+    open_rss = current_rss_mib() - baseline_rss
+
+    start = time.perf_counter()
+    editor.get_layer_image(editor.psd[0])
+    layer_time = time.perf_counter() - start
+    queue.put((layer_count, list_time, open_rss, layer_time))
+
+
+def run_isolated(file_path, lazy):
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_run, args=(file_path, lazy, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--psd', help="Existing PSD to open instead of a generated one")
+    parser.add_argument('--size', type=int, default=4000, help="Canvas width and height of the generated PSD")
+    parser.add_argument('--layers', type=int, default=40, help="Layer count of the generated PSD")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = args.psd
+        if file_path is None:
+            file_path = os.path.join(temp_dir, 'noise.psd')
+            write_noise_psd(file_path, (args.size, args.size), args.layers)
+        print(f"{file_path}: {os.path.getsize(file_path) / (1024 * 1024):.1f} MiB")
+
+        for mode, lazy in (('eager', False), ('lazy', True)):
+            layer_count, list_time, open_rss, layer_time = run_isolated(file_path, lazy)
+            print(f"{mode:>5}: layer list ({layer_count} layers) in {list_time:7.3f} s, "
+                  f"RSS after open +{open_rss:8.1f} MiB, first layer decoded in {layer_time:6.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Load generator for render_server.py: concurrent clients, latency percentiles and throughput.
+
+Usage:
+    python -m benchmarks.render_load --start-server --workers 2 --requests 200 --concurrency 8
+    python -m benchmarks.render_load --socket /tmp/layer-master.sock --template template.psd --inline
+    python -m benchmarks.render_load --start-server --cold 3
+
+Each request sets a random text layer to a random word and flips the
+visibility of a random pixel layer. With --start-server a server is started
+on a temporary socket (on a generated template unless --template is given)
+and stopped afterwards. Requests the server answers with "busy" are retried
+after a short back-off and counted. --cold also times renders that each
+start a fresh Python process, for comparison.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.synthetic import SAMPLE_WORDS, write_synthetic_psd
+from editor.psd_editor import PSDEditor
+from render_client import RenderClient
+from render_server import percentiles
+
+BUSY_BACKOFF_SECONDS = 0.02
+SERVER_START_TIMEOUT = 120
+
+COLD_RENDER = """
+import sys, time
+start = time.perf_counter()
+from editor.psd_editor import PSDEditor
+editor = PSDEditor()
+editor.open_psd(sys.argv[1], lazy=True)
+editor.get_composite_image(incremental=False).save(sys.argv[2])
+print(time.perf_counter() - start)
+"""
+
+
+def template_layers(template_path):
+    """Names of the template's text layers and pixel layers."""
+    editor = PSDEditor()
+    editor.open_psd(template_path, lazy=True)
+    info = editor.get_layer_info()
+    return ([row['name'] for row in info if row['kind'] == 'type'],
+            [row['name'] for row in info if row['kind'] == 'pixel'])
+
+
+def make_request(rng, text_layers, pixel_layers):
+    request = {'text': {}, 'visible': {}}
+    if text_layers:
+        request['text'][rng.choice(text_layers)] = ' '.join(rng.sample(SAMPLE_WORDS, 2))
+    if pixel_layers:
+        request['visible'][rng.choice(pixel_layers)] = rng.random() < 0.5
+    return request
+
+
+def run_load(address, template_path, requests, concurrency, output_dir=None, seed=0):
+    """Send requests from concurrency client threads; returns client-side results."""
+    text_layers, pixel_layers = template_layers(template_path)
+    rng = random.Random(seed)
+    jobs = [make_request(rng, text_layers, pixel_layers) for _ in range(requests)]
+    latencies = []
+    counts = {'ok': 0, 'failed': 0, 'busy_retries': 0}
+    errors = []
+    lock = threading.Lock()
+    next_job = iter(enumerate(jobs))
+
+    def client_thread():
+        with RenderClient(**address) as client:
+            while True:
+                with lock:
+                    item = next(next_job, None)
+                if item is None:
+                    return
+                index, job = item
+                output = os.path.join(output_dir, f"load-{index:05d}.png") if output_dir else None
+                start = time.perf_counter()
+                while True:
+                    response = client.render(template_path, job['text'], None, job['visible'], output)
+                    if not response.get('busy'):
+                        break
+                    with lock:
+                        counts['busy_retries'] += 1
+                    time.sleep(BUSY_BACKOFF_SECONDS)
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    latencies.append(elapsed)
+                    counts['ok' if response['ok'] else 'failed'] += 1
+                    if not response['ok'] and len(errors) < 5:
+                        errors.append(response['error'])
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client_thread) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'seconds': elapsed,
+        'throughput_rps': requests / elapsed if elapsed else None,
+        'latency_ms': percentiles(latencies),
+        'counts': counts,
+        'errors': errors,
+    }
+
+
+def time_cold_renders(template_path, runs, output_dir):
+    """Seconds per render when every render starts a new Python process, as a per-request CGI would."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    times = []
+    for run in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', COLD_RENDER, template_path, os.path.join(output_dir, f"cold-{run}.png")],
+                       cwd=root, check=True, capture_output=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def start_server(socket_path, template_path, workers, backend):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(root, 'render_server.py'), '--socket', socket_path,
+         '--workers', str(workers), '--preload', template_path, '--backend', backend],
+        cwd=root, stdout=subprocess.PIPE, text=True)
+    deadline = time.time() + SERVER_START_TIMEOUT
+    for line in process.stdout:
+        print(f"server: {line.rstrip()}")
+        if line.startswith("Listening on"):
+            return process
+        if time.time() > deadline:
+            break
+    process.kill()
+    raise RuntimeError("Render server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    address = parser.add_mutually_exclusive_group(required=True)
+    address.add_argument('--socket', help="Unix domain socket of a running server")
+    address.add_argument('--port', type=int, help="TCP port of a running server at 127.0.0.1")
+    address.add_argument('--start-server', action='store_true', help="Start a server on a temporary socket")
+    parser.add_argument('--template', help="Template to render (default: a generated one)")
+    parser.add_argument('--size', type=int, default=1500, help="Canvas size of the generated template")
+    parser.add_argument('--layers', type=int, default=30, help="Pixel layers in the generated template")
+    parser.add_argument('--text-layers', type=int, default=6, help="Text layers in the generated template")
+    parser.add_argument('--workers', type=int, default=2, help="Workers of the started server")
+    parser.add_argument('--backend', choices=['pil', 'numpy'], default='pil', help="Backend of the started server")
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=4, help="Concurrent client connections")
+    parser.add_argument('--inline', action='store_true', help="Return images in responses instead of writing files")
+    parser.add_argument('--cold', type=int, default=0, help="Also time this many fresh-process renders")
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        template_path = os.path.abspath(args.template) if args.template else os.path.join(temp_dir, 'template.psd')
+        if not args.template:
+            write_synthetic_psd(template_path, (args.size, args.size), args.layers, args.text_layers, 1)
+        server = None
+        if args.start_server:
+            socket_path = os.path.join(temp_dir, 'render.sock')
+            server = start_server(socket_path, template_path, args.workers, args.backend)
+            address = {'socket_path': socket_path}
+        elif args.socket:
+            address = {'socket_path': args.socket}
+        else:
+            address = {'port': args.port}
+
+        try:
+            output_dir = None if args.inline else os.path.join(temp_dir, 'out')
+            if output_dir:
+                os.makedirs(output_dir)
+            results = run_load(address, template_path, args.requests, args.concurrency, output_dir)
+            with RenderClient(**address) as client:
+                results['server'] = client.stats()
+            if args.cold:
+                results['cold_seconds'] = time_cold_renders(template_path, args.cold, temp_dir)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+                server.stdout.close()
+
+    latency = results['latency_ms']
+    print(f"{results['requests']} requests, {results['concurrency']} connections: "
+          f"{results['throughput_rps']:.1f} req/s, latency p50 {latency['p50']:.0f} ms, "
+          f"p90 {latency['p90']:.0f} ms, p99 {latency['p99']:.0f} ms")
+    print(f"ok {results['counts']['ok']}, failed {results['counts']['failed']}, "
+          f"busy retries {results['counts']['busy_retries']}")
+    for error in results['errors']:
+        print(f"  error: {error}")
+    server_stats = results['server']
+    print(f"server: render p50 {server_stats['render_ms'].get('p50', 0):.0f} ms, "
+          f"rejected {server_stats['rejected']}, queue depth {server_stats['queue_depth']}")
+    if args.cold:
+        cold = sorted(results['cold_seconds'])
+        print(f"fresh process per render: median {cold[len(cold) // 2] * 1000:.0f} ms")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(results, output_file, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Time the editor's main operations on a synthetic PSD and compare against a baseline.
+
+Usage:
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --baseline baseline.json --threshold 0.15
+    python -m benchmarks.suite --size 4000 --layers 100 --text-layers 30 --group-depth 3
+
+Each scenario runs in a fresh process (so peak RSS is its own) and is
+repeated; the median time is reported. With --baseline, scenarios that got
+slower or use more memory than the threshold allows are flagged and the exit
+status is 1. No display is needed.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_synthetic_psd
+from editor.export import ExportTarget
+from editor.psd_editor import PSDEditor, RENDER_BACKENDS
+
+RESULTS_VERSION = 1
+NOISE_FLOOR = {'seconds': 0.01, 'peak_rss_mib': 8.0}  # Smaller absolute changes are never flagged
+
+
+def _peak_rss_mib():
+    """Peak resident set size of this process."""
+    try:
+        # Unlike ru_maxrss, VmHWM is not inherited across exec from the parent
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _open_editor(file_path, backend):
+    editor = PSDEditor(render_backend=backend)
+    editor.open_psd(file_path, lazy=True)
+    return editor
+
+
+def _layers_of_kind(editor, kind):
+    return [info['layer_id'] for info in editor.get_layer_info() if info['kind'] == kind]
+
+
+def scenario_open(file_path, backend, output_dir):
+    """open_psd up to an available layer list."""
+    start = time.perf_counter()
+    editor = _open_editor(file_path, backend)
+    editor.get_layer_info()
+    return time.perf_counter() - start
+
+
+def scenario_first_render(file_path, backend, output_dir):
+    """First full composite after opening, with cold caches."""
+    editor = _open_editor(file_path, backend)
+    start = time.perf_counter()
+    editor.get_composite_image()
+    return time.perf_counter() - start
+
+
+def scenario_edit_render(file_path, backend, output_dir):
+    """Re-render after toggling one layer in the middle of the stack."""
+    editor = _open_editor(file_path, backend)
+    editor.get_composite_image()
+    pixel_layers = _layers_of_kind(editor, 'pixel')
+    editor.toggle_layer_visibility(pixel_layers[len(pixel_layers) // 2])
+    start = time.perf_counter()
+    editor.get_composite_image()
+    return time.perf_counter() - start
+
+
+def scenario_text_render(file_path, backend, output_dir):
+    """Re-render after editing every text layer, so all text is drawn again."""
+    editor = _open_editor(file_path, backend)
+    editor.get_composite_image()
+    for index, layer_id in enumerate(_layers_of_kind(editor, 'type')):
+        editor.edit_layer_text(layer_id, f"Edited text {index}")
+    start = time.perf_counter()
+    editor.get_composite_image()
+    return time.perf_counter() - start
+
+
+def scenario_export(file_path, backend, output_dir):
+    """Full-quality render and PNG encode through the export pipeline, as Save Composite Image does."""
+    editor = _open_editor(file_path, backend)
+    start = time.perf_counter()
+    results = editor.export([ExportTarget(os.path.join(output_dir, 'export.png'))])
+    elapsed = time.perf_counter() - start
+    errors = [error for _, error in results if error]
+    if errors:
+        raise RuntimeError("; ".join(errors))
+    return elapsed
+
+
+SCENARIOS = {
+    'open': scenario_open,
+    'first_render': scenario_first_render,
+    'edit_render': scenario_edit_render,
+    'text_render': scenario_text_render,
+    'export': scenario_export,
+}
+
+
+def _run(name, file_path, backend, output_dir, queue):
+    try:
+        elapsed = SCENARIOS[name](file_path, backend, output_dir)
+        queue.put((elapsed, _peak_rss_mib(), None))
+    except Exception as e:
+        queue.put((None, None, f"{type(e).__name__}: {e}"))
+
+
+def run_isolated(name, file_path, backend, output_dir):
+    """Run one scenario in a child process and return (seconds, peak RSS MiB)."""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_run, args=(name, file_path, backend, output_dir, queue))
+    process.start()
+    elapsed, peak_rss, error = queue.get()
+    process.join()
+    if error is not None:
+        raise RuntimeError(f"Scenario '{name}' failed: {error}")
+    return elapsed, peak_rss
+
+
+def run_suite(file_path, backend, repeat, scenarios, output_dir):
+    results = {}
+    for name in scenarios:
+        runs = [run_isolated(name, file_path, backend, output_dir) for _ in range(repeat)]
+        times = [elapsed for elapsed, _ in runs]
+        results[name] = {
+            'seconds': statistics.median(times),
+            'min_seconds': min(times),
+            'runs': times,
+            'peak_rss_mib': max(peak_rss for _, peak_rss in runs),
+        }
+        print(f"{name:>13}: {results[name]['seconds']:8.3f} s (min {min(times):.3f})  "
+              f"peak RSS {results[name]['peak_rss_mib']:8.1f} MiB")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return a list of regression messages for scenarios worse than the baseline by more than threshold."""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            continue
+        for metric, unit in (('seconds', 's'), ('peak_rss_mib', 'MiB')):
+            old, new = previous[metric], result[metric]
+            change = (new - old) / old if old else 0.0
+            regressed = change > threshold and new - old > NOISE_FLOOR[metric]
+            flag = "REGRESSION" if regressed else "ok"
+            print(f"{name:>13} {metric:>12}: {old:10.3f} -> {new:10.3f} {unit:<3} {change:+7.1%}  {flag}")
+            if regressed:
+                regressions.append(f"{name} {metric} {change:+.1%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--psd', help="Existing PSD to benchmark instead of a generated one")
+    parser.add_argument('--size', type=int, default=2000, help="Canvas width and height of the generated PSD")
+    parser.add_argument('--layers', type=int, default=40, help="Pixel layers in the generated PSD")
+    parser.add_argument('--text-layers', type=int, default=10, help="Text layers in the generated PSD")
+    parser.add_argument('--group-depth', type=int, default=2, help="Depth of nested groups in the generated PSD")
+    parser.add_argument('--backend', choices=sorted(RENDER_BACKENDS), default='pil')
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per scenario; the median is reported")
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="Relative slowdown or memory growth flagged as a regression")
+    args = parser.parse_args()
+
+    params = {'size': args.size, 'layers': args.layers, 'text_layers': args.text_layers,
+              'group_depth': args.group_depth, 'backend': args.backend, 'repeat': args.repeat,
+              'psd': args.psd}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = args.psd
+        if file_path is None:
+            file_path = os.path.join(temp_dir, 'synthetic.psd')
+            write_synthetic_psd(file_path, (args.size, args.size), args.layers,
+                                args.text_layers, args.group_depth)
+        print(f"{file_path}: {os.path.getsize(file_path) / (1024 * 1024):.1f} MiB")
+        results = run_suite(file_path, args.backend, args.repeat, args.scenarios, temp_dir)
+
+    report = {
+        'version': RESULTS_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'cpus': os.cpu_count()},
+        'params': params,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        baseline_params = dict(baseline.get('params', {}), repeat=args.repeat)
+        if baseline_params != params:
+            print("Warning: baseline was recorded with different parameters")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Generate synthetic PSDs with pixel layers, text layers and nested groups.
+
+Usage:
+    python -m benchmarks.synthetic out.psd --size 2000 --layers 40 --text-layers 10 --group-depth 2
+"""
+import argparse
+import codecs
+import random
+
+import numpy as np
+from PIL import Image
+
+DEFAULT_FONT = 'ArialMT'
+SAMPLE_WORDS = ('layer', 'master', 'render', 'summer', 'sale', 'offer', 'limited', 'edition', 'today', 'only')
+
+
+def _engine_string(value):
+    """Encode a str as an engine data string literal."""
+    data = value.encode('utf-16-be')
+    for char in (b'\\', b'(', b')'):
+        data = data.replace(char, b'\\' + char)
+    return b'(' + codecs.BOM_UTF16_BE + data + b')'
+
+
+def _engine_data(text, font_name, font_size, fill_color):
+    """Minimal engine data for a single style run, as Photoshop lays it out."""
+    from psd_tools.psd.engine_data import EngineData
+
+    values = ' '.join(f"{c / 255:.3f}" for c in fill_color)
+    resources = b"/ResourceDict << /FontSet [ << /Name " + _engine_string(font_name) + b" /Type 0 >> ] >>"
+    style_run = (b"/StyleRun << /RunArray [ << /StyleSheet << /StyleSheetData << /Font 0 /FontSize "
+                 + f"{float(font_size)}".encode() + b" /FillColor << /Type 1 /Values [ "
+                 + values.encode() + b" ] >> >> >> >> ] /RunLengthArray [ "
+                 + str(len(text) + 1).encode() + b" ] >>")
+    return EngineData.frombytes(
+        b"<< /EngineDict << /Editor << /Text " + _engine_string(text + '\r') + b" >> "
+        + style_run + b" >> " + resources + b" >>")
+
+
+def add_text_layer(psd, text, box, font_name=DEFAULT_FONT, font_size=24, fill_color=(255, 255, 255, 255), name=None):
+    """Add a type layer with the given text in the (left, top, right, bottom) box."""
+    from psd_tools.constants import Tag
+    from psd_tools.psd.descriptor import DescriptorBlock, RawData, String
+
+    left, top, right, bottom = box
+    layer = psd.create_pixel_layer(Image.new('RGBA', (right - left, bottom - top)),
+                                   name=name or text, left=left, top=top)
+    text_data = DescriptorBlock()
+    text_data[b'Txt '] = String(text)
+    text_data[b'EngineData'] = RawData(_engine_data(text, font_name, font_size, fill_color))
+    layer.tagged_blocks.set_data(
+        Tag.TYPE_TOOL_OBJECT_SETTING, transform=(1.0, 0.0, 0.0, 1.0, float(left), float(top)),
+        text_version=50, text_data=text_data, right=right - left, bottom=bottom - top)
+    return layer
+
+
+def _pixel_layer_image(rng, size):
+    """A soft gradient with noise, semi-transparent at the edges like a cut-out photo."""
+    width, height = size
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.array([rng.integers(0, 256) for _ in range(3)], dtype=np.float32)
+    pixels = np.empty((height, width, 4), dtype=np.float32)
+    pixels[..., :3] = base + (x / max(width, 1))[..., None] * 60 - 30
+    pixels[..., :3] += rng.normal(0, 12, (height, width, 3))
+    distance = np.minimum(np.minimum(x, width - 1 - x), np.minimum(y, height - 1 - y))
+    pixels[..., 3] = np.clip(distance * 8, 0, 255)
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), 'RGBA')
+
+
+def write_synthetic_psd(file_path, size=(2000, 2000), layer_count=40, text_layer_count=10, group_depth=2, seed=0):
+    """Write a PSD with the given number of pixel and text layers.
+
+    Layers are spread round-robin over a chain of group_depth nested groups
+    (the top level counts as depth 0), and every layer and group gets a
+    unique layer_id.
+    """
+    from psd_tools import PSDImage
+    from psd_tools.constants import Tag
+
+    rng = np.random.default_rng(seed)
+    words = random.Random(seed)
+    width, height = size
+    psd = PSDImage.new('RGB', size)
+
+    background = psd.create_pixel_layer(Image.new('RGBA', size, (235, 235, 240, 255)), name='Background')
+    level_layers = [[] for _ in range(group_depth + 1)]
+    for index in range(layer_count):
+        layer_width = int(rng.integers(max(1, width // 10), max(2, width // 3)))
+        layer_height = int(rng.integers(max(1, height // 10), max(2, height // 3)))
+        layer = psd.create_pixel_layer(
+            _pixel_layer_image(rng, (layer_width, layer_height)), name=f"Layer {index + 1}",
+            left=int(rng.integers(0, max(1, width - layer_width))),
+            top=int(rng.integers(0, max(1, height - layer_height))))
+        level_layers[index % len(level_layers)].append(layer)
+    for index in range(text_layer_count):
+        text = ' '.join(words.choice(SAMPLE_WORDS) for _ in range(3)).title()
+        font_size = int(rng.integers(18, 72))
+        box_width, box_height = min(width, font_size * len(text)), min(height, font_size * 2)
+        left = int(rng.integers(0, max(1, width - box_width)))
+        top = int(rng.integers(0, max(1, height - box_height)))
+        fill_color = tuple(int(c) for c in rng.integers(0, 256, 3)) + (255,)
+        layer = add_text_layer(psd, text, (left, top, left + box_width, top + box_height),
+                               font_size=font_size, fill_color=fill_color, name=f"Text {index + 1}")
+        level_layers[index % len(level_layers)].append(layer)
+
+    # Nest from the innermost group outwards; each group holds its layers and the next group
+    inner = None
+    for depth in range(group_depth, 0, -1):
+        members = level_layers[depth] + ([inner] if inner is not None else [])
+        if members:
+            inner = psd.create_group(members, name=f"Group {depth}")
+
+    for layer_id, layer in enumerate(psd.descendants(), start=1):
+        layer.tagged_blocks.set_data(Tag.LAYER_ID, layer_id)
+    psd.save(file_path)
+    return file_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output', help="Path of the PSD to write")
+    parser.add_argument('--size', type=int, default=2000, help="Canvas width and height in pixels")
+    parser.add_argument('--layers', type=int, default=40, help="Number of pixel layers")
+    parser.add_argument('--text-layers', type=int, default=10, help="Number of text layers")
+    parser.add_argument('--group-depth', type=int, default=2, help="Depth of nested groups")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_synthetic_psd(args.output, (args.size, args.size), args.layers, args.text_layers, args.group_depth, args.seed)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Measure tiled multi-process rendering against a single-threaded render.
+
+Usage:
+    python -m benchmarks.tiled --size 6000 --layers 200 --backend numpy --tile-size 1024
+
+Renders the same layers single-threaded and then with 1, 2, 4, ... worker
+processes (up to the number of CPUs), checking that every tiled result is
+identical to the single-threaded one.
+"""
+import argparse
+import os
+import time
+
+from benchmarks.compositing import make_layers
+from editor.psd_editor import RENDER_BACKENDS
+from editor.tiled_render import TiledRenderer
+
+
+def render_single(canvas_size, layers, backend_name):
+    compositor = RENDER_BACKENDS[backend_name]()
+    canvas = compositor.new_canvas(canvas_size)
+    for image, offset, blend_params in layers:
+        compositor.blend(canvas, image, offset, *blend_params)
+    return compositor.to_image(canvas, 'RGBA')
+
+
+def worker_counts(limit):
+    count = 1
+    while count < limit:
+        yield count
+        count *= 2
+    yield limit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=6000, help="Canvas width and height in pixels")
+    parser.add_argument('--layers', type=int, default=200, help="Number of layers to composite")
+    parser.add_argument('--backend', choices=sorted(RENDER_BACKENDS), default='numpy')
+    parser.add_argument('--tile-size', type=int, default=1024)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    canvas_size = (args.size, args.size)
+    layers = [(image, offset, (255, 255, 'normal'))
+              for image, offset in make_layers(canvas_size, args.layers)]
+
+    start = time.perf_counter()
+    reference = render_single(canvas_size, layers, args.backend).tobytes()
+    single_time = time.perf_counter() - start
+    print(f"single-threaded: {single_time:8.3f} s")
+
+    for workers in worker_counts(args.max_workers):
+        renderer = TiledRenderer(args.tile_size, workers)
+        # Start every worker process outside the timing
+        renderer.render((args.tile_size * workers, 1), [], args.backend)
+        start = time.perf_counter()
+        image = renderer.render(canvas_size, layers, args.backend)
+        elapsed = time.perf_counter() - start
+        renderer.close()
+        identical = image.tobytes() == reference
+        print(f"{workers:3d} worker(s):   {elapsed:8.3f} s  speedup {single_time / elapsed:5.2f}x"
+              f"  identical: {'yes' if identical else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+from PIL import Image
+
+_warned_blend_modes = set()  # (backend, blend mode) pairs already reported
+
+
+def warn_unsupported_blend_mode(backend, blend_mode):
+    """Report, once per backend and mode, that a layer is blended as normal instead."""
+    if (backend, blend_mode) not in _warned_blend_modes:
+        _warned_blend_modes.add((backend, blend_mode))
+        print(f"Warning: the {backend} render backend does not support the '{blend_mode}' blend mode; "
+              f"blending as normal (use render_backend='numpy')")
+
+
+def clip_to_canvas(canvas_size, offset, size):
+    """Clip a layer rectangle to the canvas.
+
+    Returns a (dest, source_box) pair, where dest is the top-left corner on
+    the canvas and source_box is the visible part of the layer in layer
+    coordinates, or None if the layer lies completely outside the canvas.
+    """
+    canvas_width, canvas_height = canvas_size
+    left, top = offset
+    width, height = size
+
+    x0 = max(left, 0)
+    y0 = max(top, 0)
+    x1 = min(left + width, canvas_width)
+    y1 = min(top + height, canvas_height)
+    if x0 >= x1 or y0 >= y1:
+        return None
+
+    source_box = (x0 - left, y0 - top, x1 - left, y1 - top)
+    return (x0, y0), source_box
+
+
+def composite_layer(canvas, layer_image, offset):
+    """Blend a layer onto the canvas in place, inside the layer's bounding box only.
+
+    Produces the same pixels as pasting the layer into a transparent
+    canvas-sized image and alpha compositing the two full canvases, without
+    allocating anything larger than the visible part of the layer.
+    """
+    clipped = clip_to_canvas(canvas.size, offset, layer_image.size)
+    if clipped is None:
+        return canvas
+    dest, source_box = clipped
+
+    if layer_image.mode != 'RGBA':
+        layer_image = layer_image.convert('RGBA')
+
+    canvas.alpha_composite(layer_image, dest=dest, source=source_box)
+    return canvas
+
+
+class PILCompositor:
+    """Render backend that blends 8-bit RGBA PIL images with alpha_composite.
+
+    Layer opacity, fill and blend modes are not supported; every layer is
+    composited with the normal blend mode at full opacity.
+    """
+    name = 'pil'
+    supports_blend_modes = False
+
+    def new_canvas(self, size):
+        return Image.new('RGBA', size)
+
+    def copy(self, canvas):
+        return canvas.copy()
+
+    def blend(self, canvas, layer_image, offset, opacity=255, fill=255, blend_mode='normal'):
+        if blend_mode not in ('normal', 'pass_through'):
+            warn_unsupported_blend_mode(self.name, blend_mode)
+        return composite_layer(canvas, layer_image, offset)
+
+    def blend_canvas(self, canvas, upper):
+        """Composite a whole canvas (built over transparency) onto this one."""
+        canvas.alpha_composite(upper)
+        return canvas
+
+    def to_image(self, canvas, mode='RGB'):
+        # An RGBA result is the canvas itself rather than a copy; it must not be blended into afterwards
+        return canvas if canvas.mode == mode else canvas.convert(mode)
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import threading
+
+from PIL import Image
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+DEFAULT_DISK_CACHE_BYTES = 2 * 1024 * 1024 * 1024  # 2 GiB of cached rasters
+EVICT_TO_FRACTION = 0.9  # Evict down to this fraction of the cap so eviction doesn't run on every write
+FILE_MAGIC = b'LMRC1\n'
+FILE_SUFFIX = '.raster'
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+# Part of every key; bump it when cached content for an existing key changes, so old entries are never read
+KEY_VERSION = 2
+
+_file_digests = {}  # (path, size, mtime_ns) -> content digest, for this process
+_file_digests_lock = threading.Lock()
+
+
+def hash_file(file_path):
+    """Content digest of a file, remembered per (path, size, mtime) so unchanged files are hashed once."""
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    with _file_digests_lock:
+        digest = _file_digests.get(memo_key)
+    if digest is None:
+        hasher = hashlib.blake2b(digest_size=20)
+        with open(file_path, 'rb') as source:
+            for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b''):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+        with _file_digests_lock:
+            _file_digests[memo_key] = digest
+    return digest
+
+
+def hash_image(image):
+    """Content digest of a PIL image's mode, size and pixels."""
+    hasher = hashlib.blake2b(f"{image.mode} {image.size}".encode(), digest_size=20)
+    hasher.update(image.tobytes())
+    return hasher.hexdigest()
+
+
+def make_key(*parts):
+    """Cache key for JSON-serializable parts; dicts are hashed with sorted keys so the key is canonical."""
+    canonical = json.dumps((KEY_VERSION,) + parts, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=20).hexdigest()
+
+
+class FileLock:
+    """Exclusive advisory lock on a file, shared between processes (no-op where unsupported)."""
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.file_path, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+        return False
+
+
+class DiskCache:
+    """Persistent content-addressed cache of rendered images, bounded in bytes.
+
+    Entries are uncompressed pixels behind a small header, so a hit costs
+    little more than reading the file. Writes go to a temporary file that is
+    renamed into place, so readers in other processes never see partial
+    entries. Hits refresh the file's mtime, and eviction (under a lock file
+    shared by all processes) removes the least recently used files.
+    """
+    def __init__(self, directory, max_bytes=DEFAULT_DISK_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._estimated_bytes = None  # Scanned on first write, then tracked locally
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, key):
+        """Return the cached image for key, or None."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as entry:
+                if entry.readline() != FILE_MAGIC:
+                    raise ValueError("not a cache entry")
+                header = json.loads(entry.readline())
+                image = Image.frombytes(header['mode'], tuple(header['size']), entry.read())
+        except (OSError, ValueError, KeyError):
+            # Missing, evicted by another process meanwhile, or unreadable
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return image
+
+    def put(self, key, image):
+        """Store an image under key, evicting old entries if the cache grows past its cap."""
+        path = self._path(key)
+        header = json.dumps({'mode': image.mode, 'size': image.size}).encode('utf-8')
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, 'wb') as entry:
+                entry.write(FILE_MAGIC + header + b'\n')
+                entry.write(image.tobytes())
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Error writing render cache entry: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        size = os.path.getsize(path)
+        with self._lock:
+            self.writes += 1
+            if self._estimated_bytes is None:
+                self._estimated_bytes = self._scan_bytes()
+            else:
+                self._estimated_bytes += size
+            over_cap = self._estimated_bytes > self.max_bytes
+        if over_cap:
+            self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache is below its cap."""
+        with FileLock(os.path.join(self.directory, '.lock')):
+            entries = self._scan()
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * EVICT_TO_FRACTION if total > self.max_bytes else total
+            evicted = 0
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue  # Already removed by another process
+                total -= size
+                evicted += 1
+        with self._lock:
+            self._estimated_bytes = total
+            self.evictions += evicted
+
+    def clear(self):
+        with FileLock(os.path.join(self.directory, '.lock')):
+            for _, _, path in self._scan():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        with self._lock:
+            self._estimated_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'evictions': self.evictions,
+                'bytes': self._estimated_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + FILE_SUFFIX)
+
+    def _scan(self):
+        """Return (mtime, size, path) of every entry."""
+        entries = []
+        for directory, _, file_names in os.walk(self.directory):
+            for file_name in file_names:
+                if not file_name.endswith(FILE_SUFFIX):
+                    continue
+                path = os.path.join(directory, file_name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+        return entries
+
+    def _scan_bytes(self):
+        return sum(size for _, size, _ in self._scan())
@@ -0,0 +1,129 @@
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PIL import Image
+
+from editor.mipmap import reduce_image
+
+# Formats that can store an alpha channel; everything else is saved as RGB
+ALPHA_FORMATS = {'PNG', 'WEBP', 'TIFF'}
+EXTENSION_FORMATS = {
+    '.png': 'PNG', '.jpg': 'JPEG', '.jpeg': 'JPEG', '.webp': 'WEBP', '.tif': 'TIFF', '.tiff': 'TIFF', '.bmp': 'BMP',
+}
+DEFAULT_EXPORT_WORKERS = 4
+
+# File name suffix and longest side of the images written by "Export All Sizes"
+DEFAULT_EXPORT_PRESET = (
+    ('.png', None),
+    ('.jpg', None),
+    ('_1024.png', 1024),
+    ('_512.png', 512),
+    ('_256.png', 256),
+)
+
+ExportTarget = namedtuple('ExportTarget', ['path', 'max_size', 'format', 'options'], defaults=(None, None, None))
+ExportTarget.__doc__ = """One output of an export: where to write it, the longest side in pixels
+(None for full size), the PIL format (guessed from the extension if None)
+and extra save options."""
+
+
+def target_format(target):
+    if target.format:
+        return target.format.upper()
+    extension = os.path.splitext(target.path)[1].lower()
+    if extension not in EXTENSION_FORMATS:
+        raise ValueError(f"Unknown image format for '{target.path}'")
+    return EXTENSION_FORMATS[extension]
+
+
+def preset_targets(base_path, preset=DEFAULT_EXPORT_PRESET):
+    """Build targets from (suffix, max_size) pairs appended to base_path without its extension."""
+    root = os.path.splitext(base_path)[0]
+    return [ExportTarget(root + suffix, max_size) for suffix, max_size in preset]
+
+
+def fit_size(size, max_size):
+    """Scale size down so its longest side is at most max_size, keeping the aspect ratio."""
+    width, height = size
+    if max_size is None or max(width, height) <= max_size:
+        return size
+    scale = max_size / max(width, height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+class DownscaleChain:
+    """Halved copies of one image, built on demand and shared between outputs.
+
+    Each output is resized from the smallest copy that is still at least
+    twice its size, so a thumbnail costs one LANCZOS pass over a small image
+    instead of one over the full-resolution render.
+    """
+    def __init__(self, image):
+        self.size = image.size
+        self._levels = [image]
+        self._lock = threading.Lock()
+
+    def source_for(self, size):
+        """The smallest halved copy that is still at least twice size (or the full image)."""
+        with self._lock:
+            index = 0
+            while True:
+                image = self._levels[index]
+                if image.width < 4 * size[0] or image.height < 4 * size[1]:
+                    return image  # Halving again would leave less than twice the size
+                index += 1
+                if index == len(self._levels):
+                    self._levels.append(reduce_image(image, 1))
+
+    def resize(self, size):
+        source = self.source_for(size)
+        if source.size == size:
+            return source
+        if source.mode == 'RGBA':
+            # Resample premultiplied colours so transparent pixels don't bleed into edges
+            return source.convert('RGBa').resize(size, Image.LANCZOS).convert('RGBA')
+        return source.resize(size, Image.LANCZOS)
+
+
+def encode_target(chain, target):
+    """Derive one target's image from the chain and save it."""
+    image_format = target_format(target)
+    image = chain.resize(fit_size(chain.size, target.max_size))
+    if image.mode == 'RGBA' and image_format not in ALPHA_FORMATS:
+        image = image.convert('RGB')
+    options = target.options or {}
+    directory = os.path.dirname(target.path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    image.save(target.path, format=image_format, **options)
+    return target.path
+
+
+def export_image(image, targets, workers=DEFAULT_EXPORT_WORKERS, progress=None):
+    """Write every target from one rendered image, encoding on a thread pool.
+
+    Returns a list of (target, error message or None) in completion order.
+    progress, if given, is called as progress(done, total) after each file.
+    """
+    if image.mode == 'RGBA' and image.getchannel('A').getextrema() == (255, 255):
+        # Fully opaque: an alpha channel would only make encoding and resampling slower
+        image = image.convert('RGB')
+    chain = DownscaleChain(image)
+    # Largest outputs take longest to encode, so start them first
+    ordered = sorted(targets, key=lambda target: -(target.max_size or max(image.size)))
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(ordered)))) as executor:
+        futures = {executor.submit(encode_target, chain, target): target for target in ordered}
+        for done, future in enumerate(as_completed(futures), 1):
+            target = futures[future]
+            try:
+                future.result()
+                results.append((target, None))
+            except Exception as e:
+                print(f"Error exporting '{target.path}': {e}")
+                results.append((target, f"{type(e).__name__}: {e}"))
+            if progress is not None:
+                progress(done, len(ordered))
+    return results
@@ -0,0 +1,262 @@
+import json
+import os
+import struct
+import sys
+import threading
+
+FONT_EXTENSIONS = ('.ttf', '.otf', '.ttc', '.otc')
+INDEX_VERSION = 1
+REGULAR_STYLES = ('regular', 'normal', 'book', 'roman', 'plain')
+
+# sfnt name IDs
+NAME_FAMILY = 1
+NAME_SUBFAMILY = 2
+NAME_FULL = 4
+NAME_POSTSCRIPT = 6
+NAME_TYPOGRAPHIC_FAMILY = 16
+NAME_TYPOGRAPHIC_SUBFAMILY = 17
+
+
+def default_font_directories():
+    """System and user font directories for the current platform."""
+    home = os.path.expanduser('~')
+    if sys.platform == 'win32':
+        windir = os.environ.get('WINDIR', r'C:\Windows')
+        local_app_data = os.environ.get('LOCALAPPDATA', os.path.join(home, 'AppData', 'Local'))
+        return [os.path.join(windir, 'Fonts'),
+                os.path.join(local_app_data, 'Microsoft', 'Windows', 'Fonts')]
+    if sys.platform == 'darwin':
+        return ['/System/Library/Fonts', '/Library/Fonts', os.path.join(home, 'Library', 'Fonts')]
+    data_home = os.environ.get('XDG_DATA_HOME', os.path.join(home, '.local', 'share'))
+    return ['/usr/share/fonts', '/usr/local/share/fonts',
+            os.path.join(data_home, 'fonts'), os.path.join(home, '.fonts')]
+
+
+def default_index_path():
+    """Location of the on-disk index cache."""
+    if sys.platform == 'win32':
+        cache_home = os.environ.get('LOCALAPPDATA', os.path.expanduser('~'))
+    elif sys.platform == 'darwin':
+        cache_home = os.path.expanduser('~/Library/Caches')
+    else:
+        cache_home = os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache'))
+    return os.path.join(cache_home, 'layer-master', 'font_index.json')
+
+
+def normalize_name(name):
+    """Lookup key for a font name: case, spaces, hyphens and underscores are ignored."""
+    return ''.join(c for c in name.lower() if c not in ' -_')
+
+
+def _decode_name(platform_id, encoding_id, data):
+    if platform_id == 3 or platform_id == 0:
+        return data.decode('utf-16-be', errors='replace')
+    if platform_id == 1 and encoding_id == 0:
+        return data.decode('mac_roman', errors='replace')
+    return None
+
+
+def _read_name_table(font_file, offset):
+    """Read the names of the sfnt font starting at offset."""
+    font_file.seek(offset)
+    _, num_tables = struct.unpack('>IH', font_file.read(6))
+    font_file.seek(offset + 12)
+    name_offset = None
+    for _ in range(num_tables):
+        tag, _, table_offset, _ = struct.unpack('>4sIII', font_file.read(16))
+        if tag == b'name':
+            name_offset = table_offset
+            break
+    if name_offset is None:
+        return {}
+
+    font_file.seek(name_offset)
+    _, count, string_offset = struct.unpack('>HHH', font_file.read(6))
+    records = [struct.unpack('>HHHHHH', font_file.read(12)) for _ in range(count)]
+
+    names = {}
+    for platform_id, encoding_id, language_id, name_id, length, value_offset in records:
+        if name_id not in (NAME_FAMILY, NAME_SUBFAMILY, NAME_FULL, NAME_POSTSCRIPT,
+                           NAME_TYPOGRAPHIC_FAMILY, NAME_TYPOGRAPHIC_SUBFAMILY):
+            continue
+        # Prefer Windows English names, then anything decodable
+        english = platform_id == 3 and language_id == 0x409
+        if name_id in names and not english:
+            continue
+        font_file.seek(name_offset + string_offset + value_offset)
+        value = _decode_name(platform_id, encoding_id, font_file.read(length))
+        if value:
+            names[name_id] = value.strip('\x00 ')
+    return names
+
+
+def read_font_faces(file_path):
+    """Return a list of face records (index, family, style, full, postscript) in a font file."""
+    with open(file_path, 'rb') as font_file:
+        header = font_file.read(12)
+        if header[:4] == b'ttcf':
+            num_fonts = struct.unpack('>I', header[8:12])[0]
+            offsets = struct.unpack(f'>{num_fonts}I', font_file.read(4 * num_fonts))
+        else:
+            offsets = (0,)
+
+        faces = []
+        for index, offset in enumerate(offsets):
+            names = _read_name_table(font_file, offset)
+            family = names.get(NAME_TYPOGRAPHIC_FAMILY) or names.get(NAME_FAMILY)
+            if not family:
+                continue
+            faces.append({
+                'index': index,
+                'family': family,
+                'style': names.get(NAME_TYPOGRAPHIC_SUBFAMILY) or names.get(NAME_SUBFAMILY) or 'Regular',
+                'full': names.get(NAME_FULL),
+                'postscript': names.get(NAME_POSTSCRIPT),
+                'legacy_family': names.get(NAME_FAMILY),
+            })
+        return faces
+
+
+class FontIndex:
+    """Maps PostScript, full, family and "family style" names to font files.
+
+    The index is built by scanning the font directories once and reading each
+    font's name table. It is saved to disk and refreshed incrementally: files
+    in directories whose mtime hasn't changed are reused without being
+    opened or even stat'ed. Lookups are a single dict access.
+    """
+    def __init__(self, directories=None, index_path=None):
+        self.directories = directories if directories is not None else default_font_directories()
+        self.index_path = index_path if index_path is not None else default_index_path()
+        self._directory_mtimes = {}  # directory -> mtime when last scanned
+        self._files = {}             # font file -> {'mtime': ..., 'faces': [...]}
+        self._names = {}             # normalized name -> (file, face index)
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def find(self, name, style=None):
+        """Return (file path, face index) for a font name, or None if unknown."""
+        self.ensure_loaded()
+        key = normalize_name(name if style is None else f"{name} {style}")
+        return self._names.get(key)
+
+    def ensure_loaded(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.refresh()
+                    self._loaded = True
+
+    def families(self):
+        self.ensure_loaded()
+        return sorted({face['family'] for entry in self._files.values() for face in entry['faces']})
+
+    def refresh(self):
+        """Load the cached index, rescan changed directories and save it if anything changed."""
+        self._load_cache()
+        changed = False
+        seen_directories = set()
+        cached_files_by_directory = {}
+        for file_path in self._files:
+            cached_files_by_directory.setdefault(os.path.dirname(file_path), []).append(file_path)
+
+        files = {}
+        for root_directory in self.directories:
+            for directory, _, file_names in os.walk(root_directory):
+                seen_directories.add(directory)
+                try:
+                    mtime = os.stat(directory).st_mtime
+                except OSError:
+                    continue
+                if self._directory_mtimes.get(directory) == mtime:
+                    # Unchanged directory: keep its files without touching them
+                    for file_path in cached_files_by_directory.get(directory, ()):
+                        files[file_path] = self._files[file_path]
+                    continue
+
+                changed = True
+                self._directory_mtimes[directory] = mtime
+                for file_name in file_names:
+                    if not file_name.lower().endswith(FONT_EXTENSIONS):
+                        continue
+                    file_path = os.path.join(directory, file_name)
+                    entry = self._scan_file(file_path)
+                    if entry is not None:
+                        files[file_path] = entry
+
+        for directory in list(self._directory_mtimes):
+            if directory not in seen_directories:
+                del self._directory_mtimes[directory]
+                changed = True
+
+        self._files = files
+        self._build_names()
+        if changed:
+            self._save_cache()
+
+    def _scan_file(self, file_path):
+        try:
+            mtime = os.stat(file_path).st_mtime
+            cached = self._files.get(file_path)
+            if cached is not None and cached['mtime'] == mtime:
+                return cached
+            return {'mtime': mtime, 'faces': read_font_faces(file_path)}
+        except (OSError, struct.error, ValueError) as e:
+            print(f"Skipping unreadable font '{file_path}': {e}")
+            return None
+
+    def _build_names(self):
+        names = {}
+        family_faces = {}
+        for file_path, entry in sorted(self._files.items()):
+            for face in entry['faces']:
+                location = (file_path, face['index'])
+                for name in (face['postscript'], face['full'], f"{face['family']} {face['style']}"):
+                    if name:
+                        names.setdefault(normalize_name(name), location)
+                for family in {face['family'], face.get('legacy_family')}:
+                    if not family:
+                        continue
+                    key = normalize_name(family)
+                    # A bare family name means its regular face, if there is one
+                    is_regular = face['style'].lower() in REGULAR_STYLES
+                    if key not in family_faces or (is_regular and not family_faces[key][1]):
+                        family_faces[key] = (location, is_regular)
+        for key, (location, _) in family_faces.items():
+            names.setdefault(key, location)
+        self._names = names
+
+    def _load_cache(self):
+        try:
+            with open(self.index_path, encoding='utf-8') as index_file:
+                data = json.load(index_file)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != INDEX_VERSION:
+            return
+        self._directory_mtimes = data.get('directories', {})
+        self._files = data.get('files', {})
+
+    def _save_cache(self):
+        data = {'version': INDEX_VERSION, 'directories': self._directory_mtimes, 'files': self._files}
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as index_file:
+                json.dump(data, index_file)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            print(f"Could not save font index: {e}")
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_font_index():
+    """Return the process-wide FontIndex for the default font directories."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = FontIndex()
+        return _default_index
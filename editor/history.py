@@ -0,0 +1,155 @@
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+from editor.layer_cache import LayerCache, image_nbytes
+
+DEFAULT_HISTORY_DEPTH = 100  # Undo steps kept
+DEFAULT_HISTORY_BYTES = 512 * 1024 * 1024  # Replacement images kept alive only by undo/redo steps
+DEFAULT_HISTORY_RENDER_BYTES = 256 * 1024 * 1024  # Renders remembered per snapshot
+
+EMPTY_MAPPING = MappingProxyType({})
+
+EditSnapshot = namedtuple('EditSnapshot', [
+    'serial', 'label', 'visibility', 'replacements', 'text_edits', 'layer_versions',
+    'selected_font_name', 'custom_font_path',
+])
+EditSnapshot.__doc__ = """Immutable edit state of a document at one point in its history.
+
+The mappings are read-only views (layer_id -> value) and are shared with
+the previous snapshot when an edit didn't touch them; replacement images are
+shared by reference, never copied. visibility only holds layers whose
+visibility differs from the file."""
+
+
+def share_mapping(values, previous):
+    """Freeze a dict, reusing previous if it holds the very same objects."""
+    if previous is not None and len(previous) == len(values) and all(
+            key in previous and previous[key] is value for key, value in values.items()):
+        return previous
+    return MappingProxyType(dict(values)) if values else EMPTY_MAPPING
+
+
+class EditHistory:
+    """Undo/redo stacks of EditSnapshots, with the renders produced in each state.
+
+    Renders are remembered per snapshot, so stepping back to a state that
+    was displayed before returns its image without compositing. The history
+    is bounded by depth and by the bytes of replacement images that only
+    older or undone snapshots still reference; the oldest steps go first.
+    """
+    def __init__(self, max_depth=DEFAULT_HISTORY_DEPTH, max_bytes=DEFAULT_HISTORY_BYTES,
+                 render_bytes=DEFAULT_HISTORY_RENDER_BYTES):
+        self.max_depth = max_depth
+        self.max_bytes = max_bytes
+        self.current = None
+        self.renders = LayerCache(render_bytes)  # (serial, ...) -> image
+        self._undo = []  # Older snapshots, most recent last
+        self._redo = []  # Undone snapshots, most recently undone last
+        self._next_serial = 0
+        self._lock = threading.Lock()
+
+    def reset(self, snapshot_fields):
+        """Forget every step and start from a new state (e.g. a newly opened file)."""
+        with self._lock:
+            self._undo.clear()
+            self._redo.clear()
+            self.renders.clear()
+            self.current = self._make_snapshot('Open', snapshot_fields)
+            return self.current
+
+    def commit(self, label, snapshot_fields):
+        """Record the state after an edit; clears the redo stack."""
+        with self._lock:
+            snapshot = self._make_snapshot(label, snapshot_fields)
+            if self.current is not None:
+                self._undo.append(self.current)
+            for undone in self._redo:
+                self.renders.invalidate(undone.serial)
+            self._redo.clear()
+            self.current = snapshot
+            self._trim()
+            return snapshot
+
+    def undo(self):
+        """Step back; returns the snapshot to restore, or None if there is nothing to undo."""
+        with self._lock:
+            if not self._undo:
+                return None
+            self._redo.append(self.current)
+            self.current = self._undo.pop()
+            return self.current
+
+    def redo(self):
+        with self._lock:
+            if not self._redo:
+                return None
+            self._undo.append(self.current)
+            self.current = self._redo.pop()
+            return self.current
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def undo_label(self):
+        """Label of the edit that undo() would revert, or None."""
+        return self.current.label if self._undo else None
+
+    def redo_label(self):
+        return self._redo[-1].label if self._redo else None
+
+    def get_render(self, snapshot, key):
+        """Render stored for snapshot under key, or None."""
+        return self.renders.get((snapshot.serial,) + tuple(key))
+
+    def put_render(self, snapshot, key, image):
+        """Remember a render of snapshot; returns False, keeping nothing, if snapshot is no longer current.
+
+        A render that an edit raced may show a mix of the old and the new
+        state, so it must not be returned for either.
+        """
+        with self._lock:
+            # Compared by identity: snapshot equality would compare images pixel by pixel
+            if self.current is not snapshot:
+                return False
+            self.renders.put((snapshot.serial,) + tuple(key), image)
+            return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                'undo': len(self._undo),
+                'redo': len(self._redo),
+                'bytes': self._payload_bytes(),
+                'renders': self.renders.stats(),
+            }
+
+    def _make_snapshot(self, label, fields):
+        previous = self.current
+        self._next_serial += 1
+        return EditSnapshot(
+            self._next_serial, label,
+            share_mapping(fields['visibility'], previous.visibility if previous else None),
+            share_mapping(fields['replacements'], previous.replacements if previous else None),
+            share_mapping(fields['text_edits'], previous.text_edits if previous else None),
+            share_mapping(fields['layer_versions'], previous.layer_versions if previous else None),
+            fields['selected_font_name'], fields['custom_font_path'],
+        )
+
+    def _payload_bytes(self):
+        """Bytes of replacement images referenced by steps but not by the current state."""
+        current_images = {id(image) for image in self.current.replacements.values()} if self.current else set()
+        seen = {}
+        for snapshot in self._undo + self._redo:
+            for image in snapshot.replacements.values():
+                if id(image) not in current_images:
+                    seen[id(image)] = image
+        return sum(image_nbytes(image) for image in seen.values())
+
+    def _trim(self):
+        while self._undo and (len(self._undo) > self.max_depth or self._payload_bytes() > self.max_bytes):
+            dropped = self._undo.pop(0)
+            self.renders.invalidate(dropped.serial)
@@ -0,0 +1,67 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from editor.layer_cache import LayerCache
+
+DEFAULT_INGEST_CACHE_BYTES = 256 * 1024 * 1024  # 256 MiB of ingested replacement images
+DEFAULT_REDUCING_GAP = 2.0  # Decode/reduce to at least this multiple of the target size before resampling
+DEFAULT_INGEST_WORKERS = 4
+
+
+def decode_to_size(image_path, size, resample=Image.LANCZOS, reducing_gap=DEFAULT_REDUCING_GAP):
+    """Decode an image file to RGBA at the given size, doing as little full-resolution work as possible.
+
+    JPEGs are decoded in draft mode at a reduced DCT scale, and other images
+    are box-reduced before the final resample, both down to no less than
+    reducing_gap times the target size.
+    """
+    with Image.open(image_path) as source:
+        # No-op for formats without reduced-resolution decoding
+        source.draft(None, (int(size[0] * reducing_gap), int(size[1] * reducing_gap)))
+        image = source.convert('RGBA')
+    if image.size != tuple(size):
+        image = image.resize(size, resample, reducing_gap=reducing_gap)
+    return image
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_ingest_cache():
+    """Return the process-wide cache of ingested replacement images."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LayerCache(DEFAULT_INGEST_CACHE_BYTES)
+        return _default_cache
+
+
+def ingest_image(image_path, size, resample=Image.LANCZOS, cache=None):
+    """Return image_path decoded to size, reusing an earlier ingestion of the same file version.
+
+    The cache key is (path, mtime, file size, target size, resample), so an
+    asset that changes on disk is decoded again. The returned image is shared
+    and must not be modified.
+    """
+    cache = cache if cache is not None else get_ingest_cache()
+    stat = os.stat(image_path)
+    key = (os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size, tuple(size), resample)
+    image = cache.get(key)
+    if image is None:
+        image = decode_to_size(image_path, size, resample)
+        cache.put(key, image)
+    return image
+
+
+def ingest_images(requests, workers=DEFAULT_INGEST_WORKERS, resample=Image.LANCZOS, cache=None):
+    """Ingest (image_path, size) pairs on a thread pool and return the images in order.
+
+    Raises the first error encountered.
+    """
+    requests = list(requests)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(requests)))) as executor:
+        return list(executor.map(lambda request: ingest_image(request[0], request[1], resample, cache), requests))
@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 512 MiB of decoded layer pixels
+
+
+def image_nbytes(image):
+    """Approximate memory used by the pixel data of a PIL image."""
+    return image.width * image.height * len(image.getbands())
+
+
+class LayerCache:
+    """LRU cache of rendered layer rasters, bounded by their total size in bytes.
+
+    Keys are tuples whose first item is the layer_id, followed by whatever
+    inputs the layer's raster depends on, so stale entries are never hit even
+    before they are invalidated.
+    """
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (image, nbytes)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, image, nbytes=None):
+        """Store an image, or any other value if its size in bytes is given."""
+        if nbytes is None:
+            nbytes = image_nbytes(image)
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            if nbytes > self.max_bytes:
+                return  # Would evict everything else and still not fit
+            self._entries[key] = (image, nbytes)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def invalidate(self, layer_id):
+        """Drop every entry belonging to the given layer."""
+        self.invalidate_if(lambda key: key[0] == layer_id)
+
+    def invalidate_if(self, predicate):
+        """Drop every entry whose key matches the predicate."""
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                self._discard(key)
+
+    def set_max_bytes(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            while self._entries and self.current_bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def _discard(self, key):
+        _, nbytes = self._entries.pop(key)
+        self.current_bytes -= nbytes
+
+    def __len__(self):
+        return len(self._entries)
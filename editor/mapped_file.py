@@ -0,0 +1,67 @@
+import io
+import mmap
+
+ZERO_COPY_THRESHOLD = 64 * 1024  # Reads at least this large are returned as views
+
+
+class MappedFile(io.RawIOBase):
+    """Read-only, seekable file object backed by a memory map.
+
+    Large reads return memoryview slices of the map instead of copies, so
+    bulk data such as compressed channel images stays in the page cache and
+    is only paged in when something actually decodes it. Small reads (headers,
+    records, descriptors) return bytes as usual.
+    """
+    def __init__(self, file_path):
+        super().__init__()
+        with open(file_path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        self._position = 0
+        self.name = file_path
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = len(self._map) + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError("Negative seek position")
+        self._position = position
+        return position
+
+    def read(self, size=-1):
+        start = self._position
+        end = len(self._map) if size is None or size < 0 else min(start + size, len(self._map))
+        end = max(start, end)
+        self._position = end
+        if end - start >= ZERO_COPY_THRESHOLD:
+            return self._view[start:end]
+        return self._map[start:end]
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def __len__(self):
+        return len(self._map)
+
+    def close(self):
+        """Close the file object; the map itself lives on while views of it are in use."""
+        self._view = None
+        self._map = None
+        super().close()
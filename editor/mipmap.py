@@ -0,0 +1,34 @@
+import math
+
+MAX_MIP_LEVEL = 8  # Down to 1/256 of full resolution
+
+
+def mip_level_for_scale(scale):
+    """Return the coarsest power-of-two level whose resolution is still >= scale.
+
+    Level 0 is full resolution, level 1 is half size, level 2 a quarter, etc.
+    """
+    if scale >= 1.0 or scale <= 0.0:
+        return 0
+    return min(int(math.floor(math.log2(1.0 / scale))), MAX_MIP_LEVEL)
+
+
+def scaled_size(size, level):
+    """Size of an image of the given size at a mip level (rounded up)."""
+    factor = 2 ** level
+    return (max(1, -(-size[0] // factor)), max(1, -(-size[1] // factor)))
+
+
+def scaled_offset(offset, level):
+    factor = 2 ** level
+    return (offset[0] // factor, offset[1] // factor)
+
+
+def reduce_image(image, level):
+    """Box-downsample an image to the given mip level."""
+    if level == 0:
+        return image
+    if image.mode == 'RGBA':
+        # Average premultiplied colours so transparent pixels don't bleed into edges
+        return image.convert('RGBa').reduce(2 ** level).convert('RGBA')
+    return image.reduce(2 ** level)
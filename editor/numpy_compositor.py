@@ -0,0 +1,286 @@
+import numpy as np
+from PIL import Image
+
+from editor.compositor import clip_to_canvas, warn_unsupported_blend_mode
+
+
+def _multiply(backdrop, source):
+    return backdrop * source
+
+
+def _screen(backdrop, source):
+    return backdrop + source - backdrop * source
+
+
+def _hard_light(backdrop, source):
+    return np.where(source <= 0.5,
+                    _multiply(backdrop, 2 * source),
+                    _screen(backdrop, 2 * source - 1))
+
+
+def _overlay(backdrop, source):
+    return _hard_light(source, backdrop)
+
+
+def _darken(backdrop, source):
+    return np.minimum(backdrop, source)
+
+
+def _lighten(backdrop, source):
+    return np.maximum(backdrop, source)
+
+
+def _color_dodge(backdrop, source):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = np.minimum(1.0, backdrop / (1.0 - source))
+    result = np.where(source >= 1.0, 1.0, result)
+    return np.where(backdrop <= 0.0, 0.0, result)
+
+
+def _color_burn(backdrop, source):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = 1.0 - np.minimum(1.0, (1.0 - backdrop) / source)
+    result = np.where(source <= 0.0, 0.0, result)
+    return np.where(backdrop >= 1.0, 1.0, result)
+
+
+def _linear_dodge(backdrop, source):
+    return np.minimum(1.0, backdrop + source)
+
+
+def _linear_burn(backdrop, source):
+    return np.maximum(0.0, backdrop + source - 1.0)
+
+
+def _linear_light(backdrop, source):
+    return np.clip(backdrop + 2 * source - 1.0, 0.0, 1.0)
+
+
+def _pin_light(backdrop, source):
+    return np.where(source <= 0.5,
+                    np.minimum(backdrop, 2 * source),
+                    np.maximum(backdrop, 2 * source - 1))
+
+
+def _soft_light(backdrop, source):
+    d = np.where(backdrop <= 0.25,
+                 ((16 * backdrop - 12) * backdrop + 4) * backdrop,
+                 np.sqrt(backdrop))
+    return np.where(source <= 0.5,
+                    backdrop - (1 - 2 * source) * backdrop * (1 - backdrop),
+                    backdrop + (2 * source - 1) * (d - backdrop))
+
+
+def _difference(backdrop, source):
+    return np.abs(backdrop - source)
+
+
+def _exclusion(backdrop, source):
+    return backdrop + source - 2 * backdrop * source
+
+
+def _subtract(backdrop, source):
+    return np.maximum(0.0, backdrop - source)
+
+
+def _divide(backdrop, source):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = np.minimum(1.0, backdrop / source)
+    return np.where(source <= 0.0, np.where(backdrop > 0.0, 1.0, 0.0), result)
+
+
+def _vivid_light(backdrop, source):
+    # The source extremes win over the backdrop ones, unlike in color dodge and burn
+    with np.errstate(divide='ignore', invalid='ignore'):
+        burn = 1.0 - np.minimum(1.0, (1.0 - backdrop) / (2 * source))
+        dodge = np.minimum(1.0, backdrop / (2 * (1.0 - source)))
+    result = np.where(source <= 0.5, burn, dodge)
+    result = np.where(source <= 0.0, 0.0, result)
+    return np.where(source >= 1.0, 1.0, result)
+
+
+def _hard_mix(backdrop, source):
+    total = backdrop + source
+    return np.where((total > 1.0) | ((total == 1.0) & (backdrop > 0.5)), 1.0, 0.0)
+
+
+# Non-separable blend modes, from the PDF / W3C compositing specification
+def _lum(color):
+    return 0.3 * color[..., 0:1] + 0.59 * color[..., 1:2] + 0.11 * color[..., 2:3]
+
+
+def _clip_color(color):
+    lum = _lum(color)
+    low = color.min(axis=-1, keepdims=True)
+    high = color.max(axis=-1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        color = np.where(low < 0.0, lum + (color - lum) * lum / (lum - low), color)
+        color = np.where(high > 1.0, lum + (color - lum) * (1.0 - lum) / (high - lum), color)
+    return np.clip(color, 0.0, 1.0)
+
+
+def _set_lum(color, lum):
+    return _clip_color(color + (lum - _lum(color)))
+
+
+def _sat(color):
+    return color.max(axis=-1, keepdims=True) - color.min(axis=-1, keepdims=True)
+
+
+def _set_sat(color, sat):
+    low = color.min(axis=-1, keepdims=True)
+    high = color.max(axis=-1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scaled = (color - low) * sat / (high - low)
+    return np.where(high > low, scaled, 0.0)
+
+
+def _hue(backdrop, source):
+    return _set_lum(_set_sat(source, _sat(backdrop)), _lum(backdrop))
+
+
+def _saturation(backdrop, source):
+    return _set_lum(_set_sat(backdrop, _sat(source)), _lum(backdrop))
+
+
+def _color(backdrop, source):
+    return _set_lum(source, _lum(backdrop))
+
+
+def _luminosity(backdrop, source):
+    return _set_lum(backdrop, _lum(source))
+
+
+def _darker_color(backdrop, source):
+    return np.where(_lum(source) < _lum(backdrop), source, backdrop)
+
+
+def _lighter_color(backdrop, source):
+    return np.where(_lum(source) > _lum(backdrop), source, backdrop)
+
+
+def _dissolve_threshold(box):
+    """Per-pixel thresholds in [0, 1) for the dissolve mode, hashed from layer coordinates.
+
+    The pattern is fixed in the layer, so tiles and viewports of the same
+    layer dissolve the same pixels.
+    """
+    left, top, right, bottom = box
+    y, x = np.mgrid[top:bottom, left:right].astype(np.uint32)
+    with np.errstate(over='ignore'):
+        hashed = (x * np.uint32(73856093)) ^ (y * np.uint32(19349663))
+        hashed ^= hashed >> np.uint32(13)
+        hashed *= np.uint32(0x5bd1e995)
+        hashed ^= hashed >> np.uint32(15)
+    return (hashed.astype(np.float32) * (1.0 / 2 ** 32))[..., None]
+
+
+# Blend functions keyed by the lower-cased psd_tools BlendMode name. 'normal'
+# is handled separately by the fast path in NumpyCompositor.blend, and
+# 'dissolve' is normal blending with the source alpha dithered to 0 or 1.
+BLEND_FUNCTIONS = {
+    'multiply': _multiply,
+    'screen': _screen,
+    'overlay': _overlay,
+    'darken': _darken,
+    'lighten': _lighten,
+    'color_dodge': _color_dodge,
+    'color_burn': _color_burn,
+    'linear_dodge': _linear_dodge,
+    'linear_burn': _linear_burn,
+    'linear_light': _linear_light,
+    'pin_light': _pin_light,
+    'hard_light': _hard_light,
+    'soft_light': _soft_light,
+    'difference': _difference,
+    'exclusion': _exclusion,
+    'subtract': _subtract,
+    'divide': _divide,
+    'vivid_light': _vivid_light,
+    'hard_mix': _hard_mix,
+    'hue': _hue,
+    'saturation': _saturation,
+    'color': _color,
+    'luminosity': _luminosity,
+    'darker_color': _darker_color,
+    'lighter_color': _lighter_color,
+}
+NORMAL_BLEND_MODES = {'normal', 'pass_through', 'dissolve'}
+
+
+class NumpyCompositor:
+    """Render backend that blends into a single premultiplied float32 accumulator.
+
+    The canvas is an (height, width, 4) array of premultiplied RGBA values in
+    [0, 1]. Each layer is converted to an array once, blended in place inside
+    its clipped bounding box, and nothing is converted back to PIL until
+    to_image is called on the finished canvas. Layer opacity and fill are
+    applied, as are the blend modes in BLEND_FUNCTIONS and dissolve; other
+    modes fall back to normal with a warning.
+    """
+    name = 'numpy'
+    supports_blend_modes = True
+
+    def new_canvas(self, size):
+        width, height = size
+        return np.zeros((height, width, 4), dtype=np.float32)
+
+    def copy(self, canvas):
+        return canvas.copy()
+
+    def blend(self, canvas, layer_image, offset, opacity=255, fill=255, blend_mode='normal'):
+        height, width = canvas.shape[:2]
+        clipped = clip_to_canvas((width, height), offset, layer_image.size)
+        if clipped is None or opacity == 0 or fill == 0:
+            return canvas
+        (x0, y0), (sx0, sy0, sx1, sy1) = clipped
+
+        if layer_image.mode != 'RGBA':
+            layer_image = layer_image.convert('RGBA')
+        source = np.asarray(layer_image)[sy0:sy1, sx0:sx1]
+        backdrop = canvas[y0:y0 + (sy1 - sy0), x0:x0 + (sx1 - sx0)]
+
+        source_alpha = source[..., 3:4].astype(np.float32)
+        source_alpha *= (opacity / 255.0) * (fill / 255.0) / 255.0
+        source_color = source[..., :3].astype(np.float32)
+        source_color *= 1.0 / 255.0
+        if blend_mode == 'dissolve':
+            # Each pixel is either fully covered or not, with its alpha as the probability
+            source_alpha = (_dissolve_threshold((sx0, sy0, sx1, sy1)) < source_alpha).astype(np.float32)
+
+        blend_function = BLEND_FUNCTIONS.get(blend_mode)
+        if blend_function is None:
+            if blend_mode not in NORMAL_BLEND_MODES:
+                warn_unsupported_blend_mode(self.name, blend_mode)
+            # Normal: co = cs + cb * (1 - as), computed in place
+            backdrop *= 1.0 - source_alpha
+            source_color *= source_alpha
+            backdrop[..., :3] += source_color
+            backdrop[..., 3:] += source_alpha
+            return canvas
+
+        backdrop_alpha = backdrop[..., 3:4].copy()
+        backdrop_color = np.divide(backdrop[..., :3], backdrop_alpha,
+                                   out=np.zeros_like(source_color), where=backdrop_alpha > 0)
+        mixed = blend_function(backdrop_color, source_color)
+
+        # co = cs * (1 - ab) + cb * (1 - as) + as * ab * B(Cb, Cs)
+        backdrop[..., :3] *= 1.0 - source_alpha
+        backdrop[..., :3] += source_alpha * ((1.0 - backdrop_alpha) * source_color + backdrop_alpha * mixed)
+        backdrop[..., 3:] = source_alpha + backdrop_alpha * (1.0 - source_alpha)
+        return canvas
+
+    def blend_canvas(self, canvas, upper):
+        """Composite a whole canvas (built over transparency) onto this one."""
+        canvas *= 1.0 - upper[..., 3:4]
+        canvas += upper
+        return canvas
+
+    def to_image(self, canvas, mode='RGB'):
+        alpha = canvas[..., 3:4]
+        color = np.divide(canvas[..., :3], alpha, out=np.zeros_like(canvas[..., :3]), where=alpha > 0)
+        pixels = np.empty(canvas.shape, dtype=np.uint8)
+        pixels[..., :3] = np.clip(color * 255.0 + 0.5, 0, 255)
+        pixels[..., 3:] = np.clip(alpha * 255.0 + 0.5, 0, 255)
+        image = Image.fromarray(pixels, 'RGBA')
+        return image if mode == 'RGBA' else image.convert(mode)
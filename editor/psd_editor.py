@@ -1,237 +1,991 @@
 import os
 import logging
-from tkinter import messagebox
+from contextlib import contextmanager
 from psd_tools import PSDImage
-from PIL import Image, ImageDraw, ImageFont
+from psd_tools.composite.vector import draw_vector_mask
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+from editor.compositor import PILCompositor, clip_to_canvas
+from editor.disk_cache import DiskCache, DEFAULT_DISK_CACHE_BYTES, hash_file, hash_image, make_key
+from editor.export import export_image, DEFAULT_EXPORT_WORKERS
+from editor.numpy_compositor import NumpyCompositor
+from editor.font_index import get_font_index
+from editor.history import EditHistory, DEFAULT_HISTORY_DEPTH, DEFAULT_HISTORY_BYTES
+from editor.ingest import ingest_image, ingest_images, DEFAULT_INGEST_WORKERS
+from editor.layer_cache import LayerCache, DEFAULT_MAX_BYTES, image_nbytes
+from editor.mapped_file import MappedFile
+from editor.mipmap import mip_level_for_scale, reduce_image, scaled_offset, scaled_size
+from editor.render_hooks import RenderHooks
+from editor.stack_cache import StackCache
+from editor.text_style import FontCache, parse_text_style
+from editor.tiled_render import TiledRenderer, DEFAULT_TILE_SIZE
+from editor.tracing import Tracer
+from editor.viewport import DEFAULT_VIEWPORT_TILE_SIZE, clip_box, iter_viewport_tiles, level_box
 
 # Suppress warnings from psd_tools
 logging.getLogger('psd_tools').setLevel(logging.ERROR)
 
+class RenderCancelled(Exception):
+    """Raised by a progress callback to abandon a render in progress."""
+
+
+DEFAULT_TEXT_CACHE_BYTES = 64 * 1024 * 1024  # 64 MiB of memoized text bitmaps
+
+# Available render backends, selectable with PSDEditor(render_backend=...)
+RENDER_BACKENDS = {
+    'pil': PILCompositor,
+    'numpy': NumpyCompositor,
+}
+
+
+def _composite_layer(layer):
+    """Render a layer's own pixels with layer.composite(), whether or not it is visible.
+
+    By default psd_tools returns a blank image for hidden layers (and layers
+    in hidden groups); cached rasters must not depend on visibility.
+    """
+    return layer.composite(layer_filter=lambda other: other is layer or other.visible)
+
+
 class PSDEditor:
     """Handles PSD file operations and manipulations."""
-    def __init__(self):
+    def __init__(self, layer_cache_bytes=DEFAULT_MAX_BYTES, render_backend='pil',
+                 tiled=False, tile_size=DEFAULT_TILE_SIZE, render_workers=None,
+                 disk_cache_dir=None, disk_cache_bytes=DEFAULT_DISK_CACHE_BYTES,
+                 history_depth=DEFAULT_HISTORY_DEPTH, history_bytes=DEFAULT_HISTORY_BYTES):
         self.psd = None
+        self.file_path = None         # Path the PSD was opened from
         self.layer_replacements = {}  # Stores image replacements per layer
+        self.replacement_digests = {}  # Content digest per replacement image, for disk cache keys
         self.layer_text_edits = {}    # Stores text edits per layer
-        self.font_cache = {}          # Cache for loaded fonts
+        self.font_cache = FontCache()  # Bounded LRU of loaded fonts
+        self.font_index = get_font_index()  # Font name -> file lookup, built on first use
+        self.text_styles = {}         # Parsed TextStyle per text layer
+        self.text_bitmap_cache = LayerCache(DEFAULT_TEXT_CACHE_BYTES)  # Rendered text bitmaps
         self.missing_fonts = set()    # Track missing fonts to avoid repeated warnings
         self.custom_font_path = None  # Path to custom font loaded by the user
         self.selected_font_name = None  # Name of the font selected by the user
+        self.layer_cache = LayerCache(layer_cache_bytes)  # Rendered layer rasters
+        self.stack_cache = StackCache()  # Partial composites around the focus layer
+        self.focus_layer_index = None  # Top-level index containing the layer changed most recently
+        self.layer_versions = {}      # Set per layer to a new edit serial whenever its content changes
+        self._edit_serial = 0         # Never reused, so versions stay unique across undo/redo
+        self.layers_by_id = {}        # layer_id -> layer, for layers at any depth
+        self._layer_ids = {}          # id(layer) -> the layer's unique layer_id, see get_layer_id
+        self.original_visibility = {}  # Layer visibility as stored in the file, by layer_id
+        self.compositor = None        # Render backend, see RENDER_BACKENDS
+        self.set_render_backend(render_backend)
+        self.tiled = tiled            # Render tiles on a process pool instead of in-process
+        self.tiled_renderer = TiledRenderer(tile_size, render_workers)
+        self.tracer = Tracer()        # Render instrumentation, disabled until tracer.enable()
+        self.render_hooks = RenderHooks(self.tracer)  # Plugin filters on layer rasters and composites
+        self.history = EditHistory(history_depth, history_bytes)  # Undo/redo snapshots and their renders
+        self.disk_cache = None        # Persistent render cache, see set_disk_cache
+        if disk_cache_dir is not None:
+            self.set_disk_cache(disk_cache_dir, disk_cache_bytes)
+
+    def open_psd(self, file_path, lazy=False):
+        """Open a PSD file.
 
-    def open_psd(self, file_path):
+        With lazy=True the file is memory-mapped: only the header and layer
+        records are parsed up front, channel data stays in the mapped file and
+        is paged in and decoded only for layers that are actually rendered.
+        """
         try:
-            self.psd = PSDImage.open(file_path)
+            if lazy:
+                mapped_file = MappedFile(file_path)
+                try:
+                    self.psd = PSDImage.open(mapped_file)
+                finally:
+                    # Channel data keeps referencing the map after the file object is closed
+                    mapped_file.close()
+            else:
+                self.psd = PSDImage.open(file_path)
+            self.file_path = file_path
             self.layer_replacements.clear()
+            self.replacement_digests.clear()
             self.layer_text_edits.clear()
             self.missing_fonts.clear()
+            self.layer_cache.clear()
+            self.text_styles.clear()
+            self.text_bitmap_cache.clear()
+            self.stack_cache.clear()
+            self.layer_versions.clear()
+            self.focus_layer_index = None
+            self._layer_ids = self._assign_layer_ids()
+            self.layers_by_id = {self.get_layer_id(layer): layer for layer in self.psd.descendants()}
+            self.original_visibility = {layer_id: layer.visible for layer_id, layer in self.layers_by_id.items()}
+            self.history.reset(self._snapshot_fields())
         except Exception as e:
             print(f"Error opening PSD file: {e}")
             self.psd = None
             raise
 
-    def get_composite_image(self):
-        if self.psd is not None:
-            return self._render_psd()
-        else:
+    def set_render_backend(self, name):
+        """Select the compositor used for rendering ('pil' or 'numpy')."""
+        if name not in RENDER_BACKENDS:
+            raise ValueError(f"Unknown render backend '{name}', expected one of: {', '.join(RENDER_BACKENDS)}")
+        self.compositor = RENDER_BACKENDS[name]()
+        self.stack_cache.clear()
+
+    def set_disk_cache(self, directory, max_bytes=DEFAULT_DISK_CACHE_BYTES):
+        """Keep decoded layers and composites in a persistent directory, or pass None to stop.
+
+        Entries are keyed by the PSD's content hash and the edit state, so a
+        cache directory can be shared by documents, runs and processes.
+        """
+        self.disk_cache = DiskCache(directory, max_bytes) if directory is not None else None
+
+    def set_tiled_rendering(self, enabled, tile_size=None, workers=None):
+        """Enable or disable tiled multi-process rendering and configure it."""
+        self.tiled = enabled
+        self.tiled_renderer.configure(tile_size, workers)
+
+    def close(self):
+        """Release the worker processes used for tiled rendering."""
+        self.tiled_renderer.close()
+
+    def get_composite_image(self, incremental=True, progress=None, mode='RGB'):
+        """Render the composite image (in RGB, or RGBA to keep transparency).
+
+        With incremental=True, the cached stacks below and above the most
+        recently changed layer are reused, which is much faster for
+        interactive edits but may differ by one level on partly transparent
+        pixels. Pass incremental=False for exact output, e.g. when saving.
+        In tiled mode the full stack is always rendered, tile by tile.
+        The returned image is the caller's own and may be modified.
+
+        progress, if given, is called as progress(done, total) after each
+        layer (or tile) and may raise RenderCancelled to stop the render.
+        """
+        if self.psd is None:
             return None
+        with self._traced_render('render', incremental=incremental, tiled=self.tiled):
+            # A state displayed before (e.g. after undo) is returned without compositing
+            snapshot = self.history.current
+            render_key = ('composite', mode, self.compositor.name, self.render_hooks.version)
+            for exact in ((True, False) if incremental else (True,)):
+                composite_image = self.history.get_render(snapshot, render_key + (exact,))
+                if composite_image is not None:
+                    return composite_image.copy()
+
+            disk_key = None
+            if self.disk_cache is not None:
+                disk_key = make_key('composite', self._document_digest(), self._edit_state(),
+                                    self.compositor.name, mode)
+                composite_image = self.disk_cache.get(disk_key)
+                if composite_image is not None:
+                    return self._keep_render(snapshot, render_key + (True,), composite_image)
+
+            if self.tiled:
+                composite_image = self._render_tiled(progress, mode)
+            else:
+                composite_image = self._render_psd(incremental, progress, mode)
+            composite_image = self.render_hooks.apply_composite_filters(composite_image)
+            # Only exact renders are shared; incremental ones may be off by one level
+            exact = self.tiled or not incremental or self.focus_layer_index is None
+            # A render that an edit raced may mix both states, so it isn't kept for either
+            if disk_key is not None and exact and self.history.current is snapshot:
+                self.disk_cache.put(disk_key, composite_image)
+            return self._keep_render(snapshot, render_key + (exact,), composite_image)
+
+    def _keep_render(self, snapshot, render_key, image):
+        """Remember a render for its edit state and return an image the caller may modify."""
+        if self.history.put_render(snapshot, render_key, image):
+            return image.copy()
+        return image
+
+    def _document_digest(self):
+        """Content hash of the open PSD file (hashed once per file version)."""
+        return hash_file(self.file_path)
+
+    def _edit_state(self):
+        """Canonical description of everything edited on top of the file, for disk cache keys."""
+        replacements = {}
+        for layer_id, image in self.layer_replacements.items():
+            if layer_id not in self.replacement_digests:
+                self.replacement_digests[layer_id] = hash_image(image)
+            replacements[layer_id] = self.replacement_digests[layer_id]
+        return {
+            'visible': [layer.visible for layer in self.psd.descendants()],
+            'text': self.layer_text_edits,
+            'replacements': replacements,
+            'font': self.selected_font_name,
+            'custom_font': hash_file(self.custom_font_path) if self.custom_font_path else None,
+            'filters': self.render_hooks.signature(),
+        }
+
+    def export(self, targets, workers=DEFAULT_EXPORT_WORKERS, progress=None):
+        """Render the composite once at full quality and write every ExportTarget from it.
+
+        Smaller sizes are derived by progressive downscaling and files are
+        encoded in parallel; alpha is kept for formats that support it.
+        Returns a list of (target, error message or None).
+        """
+        if self.psd is None:
+            return []
+        composite_image = self.get_composite_image(incremental=False, progress=progress, mode='RGBA')
+        with self.tracer.span('export', outputs=len(targets)):
+            return export_image(composite_image, targets, workers, progress)
+
+    def get_preview_image(self, max_size, progress=None):
+        """Render a reduced-resolution composite for display within max_size.
+
+        Layers are blended from cached power-of-two proxies at the coarsest
+        level that still covers max_size, so the result is at most twice the
+        requested size and much cheaper than rendering at full resolution and
+        downscaling. Use get_composite_image for full-resolution output. The
+        returned image is the caller's own and may be modified.
+        """
+        if self.psd is None:
+            return None
+        width, height = self.psd.size
+        scale = min(max_size[0] / width, max_size[1] / height)
+        level = mip_level_for_scale(scale)
+        if level == 0:
+            return self.get_composite_image(progress=progress)
+        with self._traced_render('preview', level=level):
+            snapshot = self.history.current
+            render_key = ('preview', level, self.compositor.name, self.render_hooks.version)
+            composite_image = self.history.get_render(snapshot, render_key)
+            if composite_image is not None:
+                return composite_image.copy()
+            composite_image = self._composite_layers(list(self.psd), level=level, progress=progress)
+            composite_image = self.compositor.to_image(composite_image)
+            composite_image = self.render_hooks.apply_composite_filters(composite_image, scale=1 / 2 ** level)
+            return self._keep_render(snapshot, render_key, composite_image)
+
+    def get_viewport_image(self, box, scale, progress=None, tile_size=DEFAULT_VIEWPORT_TILE_SIZE):
+        """Render only the part of the composite inside box, at a display scale, for zoomed views.
+
+        box is (left, top, right, bottom) in document pixels and scale is
+        display pixels per document pixel. The region is assembled from
+        tiles of a fixed grid at the matching mip level; each tile only
+        blends the layer pixels that fall inside it and is remembered for
+        the current edit state, so panning re-renders only newly exposed
+        tiles and undo returns to tiles already rendered. Composite filters
+        are applied per tile. Returns an RGB image of the box's size times
+        scale, or None if the box is outside the document.
+        """
+        if self.psd is None:
+            return None
+        box = clip_box(box, self.psd.size)
+        if box is None:
+            return None
+        level = mip_level_for_scale(scale)
+        region_box = level_box(box, level)
+        tiles = list(iter_viewport_tiles(region_box, scaled_size(self.psd.size, level), tile_size))
+        with self._traced_render('viewport', level=level, tiles=len(tiles)):
+            snapshot = self.history.current
+            region = Image.new('RGB', (region_box[2] - region_box[0], region_box[3] - region_box[1]))
+            for done, (column, row, tile_box) in enumerate(tiles, 1):
+                render_key = ('tile', tile_size, level, column, row, self.compositor.name, self.render_hooks.version)
+                tile = self.history.get_render(snapshot, render_key)
+                if tile is None:
+                    tile = self._render_region(tile_box, level)
+                    self.history.put_render(snapshot, render_key, tile)
+                region.paste(tile, (tile_box[0] - region_box[0], tile_box[1] - region_box[1]))
+                if progress is not None:
+                    progress(done, len(tiles))
+
+            # Resample the exact (fractional at this level) box to the display size
+            factor = 2 ** level
+            source_box = (box[0] / factor - region_box[0], box[1] / factor - region_box[1],
+                          box[2] / factor - region_box[0], box[3] / factor - region_box[1])
+            display_size = (max(1, round((box[2] - box[0]) * scale)), max(1, round((box[3] - box[1]) * scale)))
+            # Nearest neighbour when zoomed in, so individual pixels can be inspected
+            resample = Image.NEAREST if scale >= 1 else Image.LANCZOS
+            with self.tracer.span('viewport.resize', size=display_size):
+                return region.resize(display_size, resample, box=source_box)
 
-    def _render_psd(self):
+    def _render_region(self, box, level=0):
+        """Composite the part of the document inside box (in mip level pixels) as an RGB image."""
+        compositor = self.compositor
+        canvas = compositor.new_canvas((box[2] - box[0], box[3] - box[1]))
+        with self.tracer.span('viewport.tile', level=level, box=box):
+            for layer_image, offset, blend_params in self._visible_layer_rasters(self.psd, level):
+                # Blending clips each layer to the region, so only its pixels in the region are touched
+                compositor.blend(canvas, layer_image, (offset[0] - box[0], offset[1] - box[1]), *blend_params)
+        tile = compositor.to_image(canvas)
+        return self.render_hooks.apply_composite_filters(tile, scale=1 / 2 ** level)
+
+    @contextmanager
+    def _traced_render(self, name, **args):
+        """Trace a whole render and record the layer cache hits and misses it caused."""
+        if not self.tracer.enabled:
+            yield
+            return
+        before = self.layer_cache.stats()
+        try:
+            with self.tracer.span(name, **args):
+                yield
+        finally:
+            after = self.layer_cache.stats()
+            self.tracer.counter('layer_cache', hits=after['hits'] - before['hits'],
+                                misses=after['misses'] - before['misses'], bytes=after['bytes'])
+
+    def iter_composite_tiles(self):
+        """Yield (tile_box, RGBA tile) pairs of the composite as workers finish them.
+
+        Lets callers stream tiles to an encoder or display without holding the
+        stitched image in memory.
+        """
+        if self.psd is None:
+            return
+        layers = list(self._visible_layer_rasters(self.psd))
+        yield from self.tiled_renderer.iter_tiles(self.psd.size, layers, self.compositor.name)
+
+    def _render_tiled(self, progress=None, mode='RGB'):
+        layers = list(self._visible_layer_rasters(self.psd))
+        with self.tracer.span('tiled.render', tile_size=self.tiled_renderer.tile_size):
+            composite_image = self.tiled_renderer.render(self.psd.size, layers, self.compositor.name, progress)
+        return composite_image if composite_image.mode == mode else composite_image.convert(mode)
+
+    def _render_psd(self, incremental=True, progress=None, mode='RGB'):
         """Render the PSD with simulated changes."""
-        composite_image = Image.new('RGBA', self.psd.size)
-        for layer in self.psd:
+        layers = list(self.psd)
+        focus_index = self.focus_layer_index
+        compositor = self.compositor
+        if not incremental or focus_index is None or focus_index >= len(layers):
+            return compositor.to_image(self._composite_layers(layers, progress=progress), mode)
+
+        signatures = [self._layer_signature(layer) for layer in layers]
+        below_signatures = signatures[:focus_index]
+        above_signatures = signatures[focus_index + 1:]
+
+        below_image = self.stack_cache.get_below(focus_index, below_signatures)
+        if below_image is None:
+            below_image = self._composite_layers(layers[:focus_index], progress=progress)
+            self.stack_cache.set_below(focus_index, below_signatures, below_image)
+
+        composite_image = compositor.copy(below_image)
+        self._composite_layers(layers[focus_index:focus_index + 1], composite_image)
+
+        upper_layers = layers[focus_index + 1:]
+        if not self._can_group_layers(upper_layers):
+            # Non-normal blend modes depend on the backdrop, so blend them one by one
+            self._composite_layers(upper_layers, composite_image, progress=progress)
+            return compositor.to_image(composite_image, mode)
+
+        above_image = self.stack_cache.get_above(focus_index, above_signatures)
+        if above_image is None:
+            above_image = self._composite_layers(upper_layers, progress=progress)
+            self.stack_cache.set_above(focus_index, above_signatures, above_image)
+        compositor.blend_canvas(composite_image, above_image)
+        return compositor.to_image(composite_image, mode)
+
+    def _composite_layers(self, layers, composite_image=None, level=0, progress=None):
+        """Blend the visible layers, bottom to top, onto a transparent (or given) canvas."""
+        compositor = self.compositor
+        tracer = self.tracer
+        if composite_image is None:
+            composite_image = compositor.new_canvas(scaled_size(self.psd.size, level))
+        for done, (layer_image, offset, blend_params) in enumerate(self._visible_layer_rasters(layers, level), 1):
+            # Blend only inside the layer's bounding box
+            with tracer.span('blend', backend=compositor.name):
+                compositor.blend(composite_image, layer_image, offset, *blend_params)
+            if progress is not None:
+                progress(done, len(layers))
+        return composite_image
+
+    def _visible_layer_rasters(self, layers, level=0):
+        """Yield (image, offset, blend params) for each visible layer with pixels.
+
+        Groups yield their cached composite, or their children when they have
+        to be blended straight into the parent (see _is_isolated_group).
+        """
+        for layer in layers:
             if not layer.is_visible():
                 continue
-            layer_image = self.get_layer_image(layer)
+            if layer.is_group():
+                if not self._is_isolated_group(layer):
+                    yield from self._visible_layer_rasters(layer, level)
+                    continue
+                raster = self._get_group_raster(layer, level)
+                if raster is not None:
+                    group_image, offset = raster
+                    yield group_image, offset, self._blend_params(layer)
+                continue
+            if level:
+                layer_image = self.get_layer_proxy(layer, level)
+            else:
+                layer_image = self.get_layer_image(layer)
             if layer_image:
-                # Align layer position
-                position = layer.offset
-                temp_image = Image.new('RGBA', self.psd.size)
-                temp_image.paste(layer_image, position)
-                composite_image = Image.alpha_composite(composite_image, temp_image)
-        return composite_image.convert('RGB')
+                yield layer_image, scaled_offset(layer.offset, level), self._blend_params(layer)
+
+    def _is_isolated_group(self, group):
+        """Whether a group can be composited on its own and blended as one raster.
+
+        A pass-through group whose children use other blend modes must blend
+        them against the layers below the group, so it is flattened into its
+        parent instead. Backends without blend modes can always isolate groups.
+        """
+        if not self.compositor.supports_blend_modes or group.blend_mode.name.lower() != 'pass_through':
+            return True
+        # A group mask applies to the group's composite, so masked groups are always isolated
+        return self._can_group_layers(group) or self._has_group_mask(group)
+
+    def _get_group_raster(self, group, level=0):
+        """Return (image, offset) of a group's composite at a mip level, or None if empty.
+
+        The composite covers only the children's bounding box, has the
+        group's opacity applied (like layer.composite()) and is cached under
+        the group's signature, so it is only re-blended when something inside
+        the group changed.
+        """
+        signature = self._layer_signature(group)
+        cache_key = (self.get_layer_id(group), 'group', level, signature)
+        cached = self.layer_cache.get(cache_key)
+        if cached is not None:
+            return cached[0]
+
+        children = list(self._visible_layer_rasters(group, level))
+        with self.tracer.span('group.composite', layer=group.name, level=level) as span:
+            raster = self._blend_group(group, children, level)
+            if raster is not None:
+                span.set(bytes=image_nbytes(raster[0]))
+
+        nbytes = image_nbytes(raster[0]) if raster is not None else 0
+        self.layer_cache.put(cache_key, (raster,), nbytes)
+        return raster
+
+    def _blend_group(self, group, children, level):
+        """Blend a group's child rasters over their bounding box and apply the group's opacity and masks."""
+        raster = None
+        if children:
+            canvas_width, canvas_height = scaled_size(self.psd.size, level)
+            left = max(0, min(offset[0] for _, offset, _ in children))
+            top = max(0, min(offset[1] for _, offset, _ in children))
+            right = min(canvas_width, max(offset[0] + image.width for image, offset, _ in children))
+            bottom = min(canvas_height, max(offset[1] + image.height for image, offset, _ in children))
+            if left < right and top < bottom:
+                compositor = self.compositor
+                canvas = compositor.new_canvas((right - left, bottom - top))
+                for image, (x, y), blend_params in children:
+                    compositor.blend(canvas, image, (x - left, y - top), *blend_params)
+                group_image = compositor.to_image(canvas, 'RGBA')
+                if group.opacity < 255:
+                    alpha = group_image.getchannel('A').point(lambda a: a * group.opacity // 255)
+                    group_image.putalpha(alpha)
+                coverage = self._group_mask(group, (left, top, right, bottom), level)
+                if coverage is not None:
+                    group_image.putalpha(ImageChops.multiply(group_image.getchannel('A'), coverage))
+                raster = (group_image, (left, top))
+        return raster
+
+    @staticmethod
+    def _has_group_mask(group):
+        return ((group.mask is not None and not group.mask.disabled)
+                or (group.vector_mask is not None and not group.vector_mask.disabled))
+
+    def _group_mask(self, group, box, level):
+        """Coverage of the group's layer mask and vector mask over box (in mip level pixels), as an 'L' image.
+
+        Returns None if the group has no enabled mask.
+        """
+        if not self._has_group_mask(group):
+            return None
+        factor = 2 ** level
+        full_box = tuple(value * factor for value in box)
+        full_size = (full_box[2] - full_box[0], full_box[3] - full_box[1])
+        coverage = None
+        mask = group.mask
+        if mask is not None and not mask.disabled:
+            # Outside its bounding box the mask has its background color
+            coverage = Image.new('L', full_size, mask.background_color)
+            mask_image = mask.topil(real=False)
+            if mask_image is not None:
+                coverage.paste(mask_image, (mask.left - full_box[0], mask.top - full_box[1]))
+        vector_mask = group.vector_mask
+        if vector_mask is not None and not vector_mask.disabled:
+            drawn = draw_vector_mask(group, full_box)
+            vector_coverage = Image.fromarray((drawn[..., 0] * 255 + 0.5).astype('uint8'), 'L')
+            coverage = vector_coverage if coverage is None else ImageChops.multiply(coverage, vector_coverage)
+        if level:
+            coverage = coverage.resize((box[2] - box[0], box[3] - box[1]), Image.BOX)
+        return coverage
+
+    def _blend_params(self, layer):
+        """Return (opacity, fill, blend mode) for blending the layer's raster.
+
+        layer.composite() already applies the layer's opacity and fill, and
+        group composites have their opacity applied, so they are only passed
+        on for rasters the editor renders itself (text layers and replacement
+        images).
+        """
+        blend_mode = layer.blend_mode.name.lower()
+        if self.get_layer_id(layer) in self.layer_replacements or layer.kind == 'type':
+            return layer.opacity, layer.fill_opacity, blend_mode
+        return 255, 255, blend_mode
+
+    def _can_group_layers(self, layers):
+        """Whether the layers can be pre-composited over transparency and blended as one."""
+        if not self.compositor.supports_blend_modes:
+            return True
+        for layer in layers:
+            if not layer.is_visible():
+                continue
+            blend_mode = layer.blend_mode.name.lower()
+            if blend_mode == 'pass_through' and layer.is_group():
+                # Pass-through children blend straight into this stack
+                if not self._can_group_layers(layer):
+                    return False
+            elif blend_mode != 'normal':
+                return False
+        return True
+
+    def _layer_signature(self, layer):
+        """Everything about a layer (or a group's subtree) that affects its contribution to the composite."""
+        layer_id = self.get_layer_id(layer)
+        if layer.is_group():
+            return (layer_id, layer.is_visible(), layer.opacity, layer.blend_mode,
+                    tuple(self._layer_signature(child) for child in layer))
+        return (layer_id, layer.is_visible(), self.layer_versions.get(layer_id, 0),
+                layer.opacity, layer.blend_mode, self._layer_cache_key(layer))
+
+    def _assign_layer_ids(self):
+        """Give every layer a unique id: its layer_id from the file, or a new one where that is missing or repeated.
+
+        psd_tools reports layer_id -1 for every layer of files without layer
+        ID blocks. New ids are assigned in document order above the largest
+        id in the file, so they are the same every time the file is opened.
+        """
+        layers = list(self.psd.descendants())
+        next_id = max([layer.layer_id for layer in layers], default=0) + 1
+        layer_ids = {}
+        used = set()
+        for layer in layers:
+            layer_id = layer.layer_id
+            if layer_id < 0 or layer_id in used:
+                layer_id = next_id
+                next_id += 1
+            used.add(layer_id)
+            layer_ids[id(layer)] = layer_id
+        return layer_ids
+
+    def get_layer_id(self, layer):
+        """The unique layer_id the editor addresses a layer of the open document by."""
+        return self._layer_ids[id(layer)]
+
+    def get_layer(self, layer_id):
+        """Return the layer with the given layer_id, at any depth."""
+        try:
+            return self.layers_by_id[layer_id]
+        except KeyError:
+            raise KeyError(f"No layer with id {layer_id}") from None
+
+    def find_layer_id(self, name):
+        """Return the layer_id of the first layer (in layer list order) with the given name, or None."""
+        for info in self.get_layer_info():
+            if info['name'] == name:
+                return info['layer_id']
+        return None
+
+    def reset_edits(self):
+        """Discard all text edits, image replacements and visibility changes."""
+        for layer_id in set(self.layer_replacements) | set(self.layer_text_edits):
+            self.layer_cache.invalidate(layer_id)
+            self.layer_versions[layer_id] = self._next_edit_serial()
+        self.layer_replacements.clear()
+        self.replacement_digests.clear()
+        self.layer_text_edits.clear()
+        for layer_id, visible in self.original_visibility.items():
+            self.layers_by_id[layer_id].visible = visible
+        self.focus_layer_index = None
+        self._record_edit('Reset Edits')
 
     def get_layer_info(self):
+        """List every layer, each group followed by its children, with its depth and path.
+
+        'path' is the tuple of child indices from the document root,
+        'index' is the row number in this list and 'version' is a hashable
+        token that changes whenever the layer's pixels (or a group's
+        composite) do, e.g. to know when a thumbnail is stale.
+        """
         layer_info = []
-        if self.psd is not None:
-            for index, layer in enumerate(self.psd):
-                info = {
+
+        def add_layers(parent, depth, parent_path):
+            for child_index, layer in enumerate(parent):
+                path = parent_path + (child_index,)
+                layer_info.append({
                     'name': layer.name,
                     'visible': layer.visible,
                     'kind': layer.kind,
-                    'index': index
-                }
-                layer_info.append(info)
+                    'index': len(layer_info),
+                    'layer_id': self.get_layer_id(layer),
+                    'depth': depth,
+                    'path': path,
+                    'version': self._layer_signature(layer) if layer.is_group() else self._layer_cache_key(layer),
+                })
+                if layer.is_group():
+                    add_layers(layer, depth + 1, path)
+
+        if self.psd is not None:
+            add_layers(self.psd, 0, ())
         return layer_info
 
     def get_layer_image(self, layer):
         """Get the layer image, applying any replacements or text edits."""
         try:
-            if layer.layer_id in self.layer_replacements:
-                # Use the replacement image
-                return self.layer_replacements[layer.layer_id]
+            replacement = self.layer_replacements.get(self.get_layer_id(layer))
+            if replacement is not None and not self.render_hooks.layer_filters:
+                # Use the replacement image as is
+                return replacement
+
+            cache_key = self._layer_cache_key(layer)
+            layer_image = self.layer_cache.get(cache_key)
+            if layer_image is not None:
+                return layer_image
+
+            if replacement is not None:
+                layer_image = replacement
             elif layer.kind == 'type':
                 # Render the text with edits
-                text = self.layer_text_edits.get(layer.layer_id, layer.text)
-                return self._render_text_layer(layer, text)
+                text = self.layer_text_edits.get(self.get_layer_id(layer), layer.text)
+                layer_image = self._render_text_layer(layer, text)
             else:
-                return layer.composite()
+                layer_image = self._decode_layer(layer)
+            # Plugin filters run before caching, so only once per layer version
+            layer_image = self.render_hooks.apply_layer_filters(layer, layer_image)
+            if layer_image is not None:
+                self.layer_cache.put(cache_key, layer_image)
+            return layer_image
         except Exception as e:
             print(f"Error getting layer image: {e}")
             return None
 
+    def _decode_layer(self, layer):
+        """Decode a layer's pixels with layer.composite(), through the disk cache if there is one."""
+        disk_key = None
+        if self.disk_cache is not None:
+            disk_key = make_key('layer', self._document_digest(), self.get_layer_id(layer), layer.bbox)
+            layer_image = self.disk_cache.get(disk_key)
+            if layer_image is not None:
+                return layer_image
+        with self.tracer.span('layer.composite', layer=layer.name) as span:
+            layer_image = _composite_layer(layer)
+            if layer_image is not None:
+                span.set(bytes=image_nbytes(layer_image))
+        if disk_key is not None and layer_image is not None:
+            self.disk_cache.put(disk_key, layer_image)
+        return layer_image
+
+    def get_layer_proxy(self, layer, level):
+        """Get the layer image downsampled to a mip level, cached alongside full-size rasters."""
+        cache_key = self._layer_cache_key(layer) + ('mip', level)
+        proxy = self.layer_cache.get(cache_key)
+        if proxy is None:
+            layer_image = self.get_layer_image(layer)
+            if layer_image is None:
+                return None
+            with self.tracer.span('mip.reduce', layer=layer.name, level=level) as span:
+                proxy = reduce_image(layer_image, level)
+                span.set(bytes=image_nbytes(proxy))
+            self.layer_cache.put(cache_key, proxy)
+        return proxy
+
+    def _layer_cache_key(self, layer):
+        """Build the layer cache key from everything the layer's raster depends on."""
+        layer_id = self.get_layer_id(layer)
+        filters = self.render_hooks.version if self.render_hooks.layer_filters else 0
+        if layer_id in self.layer_replacements:
+            return (layer_id, 'replacement', self.layer_versions.get(layer_id, 0), filters)
+        if layer.kind == 'type':
+            text = self.layer_text_edits.get(layer_id)
+            return (layer_id, 'type', text, self.selected_font_name, self.custom_font_path, filters)
+        return (layer_id, layer.kind, filters)
+
+    def get_cache_stats(self):
+        """Return hit/miss/eviction counters and memory use of the layer cache (and the disk cache, if any)."""
+        stats = self.layer_cache.stats()
+        if self.disk_cache is not None:
+            stats['disk'] = self.disk_cache.stats()
+        return stats
+
     def _render_text_layer(self, layer, text):
         """Render a text layer with the given text."""
         try:
+            style = self._get_text_style(layer)
             # Use selected font if available
-            if self.selected_font_name:
-                font_name = self.selected_font_name
-                font_size = self._get_font_size(layer)
-                fill_color = self._get_fill_color(layer)
-            else:
-                # Extract font properties from layer
-                font_name, font_size, fill_color = self._extract_font_properties(layer)
+            font_name = self.selected_font_name or style.font_name
+
+            # Identical text in the same style and box renders to the same bitmap
+            bitmap_key = (text, self.custom_font_path, font_name, style.font_size, style.fill_color, layer.size)
+            img = self.text_bitmap_cache.get(bitmap_key)
+            if img is not None:
+                return img
 
             # Attempt to load the font
-            font = self._load_font(font_name, font_size)
+            font = self._load_font(font_name, style.font_size)
 
-            # Create an image with transparent background
-            img = Image.new('RGBA', layer.size, (0, 0, 0, 0))
-            draw = ImageDraw.Draw(img)
+            with self.tracer.span('text.rasterize', layer=layer.name, font=font_name) as span:
+                # Create an image with transparent background
+                img = Image.new('RGBA', layer.size, (0, 0, 0, 0))
+                draw = ImageDraw.Draw(img)
 
-            # Draw the text
-            draw.text((0, 0), text, font=font, fill=fill_color)
+                # Draw the text
+                draw.text((0, 0), text, font=font, fill=style.fill_color)
+                span.set(bytes=image_nbytes(img))
 
+            self.text_bitmap_cache.put(bitmap_key, img)
             return img
         except Exception as e:
             print(f"Error rendering text layer: {e}")
-            return layer.composite()
-
-    def _extract_font_properties(self, layer):
-        """Extract font name, size, and fill color from the text layer."""
-        try:
-            # Default values
-            font_name = 'Arial'
-            font_size = 20
-            fill_color = (255, 255, 255, 255)  # White color
-
-            # Extract font size
-            engine_data = layer.engine_dict
-            styles = engine_data['StyleRun']['RunArray'][0]['StyleSheet']['StyleSheetData']
-
-            font_size = int(styles.get('FontSize', font_size))
-
-            # Extract font name
-            font_set = engine_data['ResourceDict']['FontSet']
-            font_index = styles['Font']
-            font_name = font_set[font_index]['Name']
+            return _composite_layer(layer)
 
-            # Extract fill color
-            fill_color_values = styles.get('FillColor', {}).get('Values', [1, 1, 1])
-            fill_color = tuple(int(c * 255) for c in fill_color_values)
-            if len(fill_color) == 3:
-                fill_color = (*fill_color, 255)  # Add alpha channel
-
-            return font_name, font_size, fill_color
-        except Exception as e:
-            print(f"Error extracting font properties: {e}")
-            return 'Arial', 20, (255, 255, 255, 255)
-
-    def _get_font_size(self, layer):
-        """Get font size from layer."""
-        try:
-            engine_data = layer.engine_dict
-            styles = engine_data['StyleRun']['RunArray'][0]['StyleSheet']['StyleSheetData']
-            font_size = int(styles.get('FontSize', 20))
-            return font_size
-        except Exception as e:
-            print(f"Error getting font size: {e}")
-            return 20
-
-    def _get_fill_color(self, layer):
-        """Get fill color from layer."""
-        try:
-            styles = layer.engine_dict['StyleRun']['RunArray'][0]['StyleSheet']['StyleSheetData']
-            fill_color_values = styles.get('FillColor', {}).get('Values', [1, 1, 1])
-            fill_color = tuple(int(c * 255) for c in fill_color_values)
-            if len(fill_color) == 3:
-                fill_color = (*fill_color, 255)  # Add alpha channel
-            return fill_color
-        except Exception as e:
-            print(f"Error getting fill color: {e}")
-            return (255, 255, 255, 255)
+    def _get_text_style(self, layer):
+        """Return the layer's TextStyle, parsing its engine data only the first time."""
+        layer_id = self.get_layer_id(layer)
+        style = self.text_styles.get(layer_id)
+        if style is None:
+            style = parse_text_style(layer.engine_dict, layer.resource_dict)
+            self.text_styles[layer_id] = style
+        return style
 
     def _load_font(self, font_name, font_size):
         """Load the font, using cache and handling missing fonts."""
-        try:
-            # Check if the font is already loaded
-            font_key = (font_name, font_size)
-            if font_key in self.font_cache:
-                return self.font_cache[font_key]
+        # The custom font overrides the font name, so it is part of the key
+        font_key = (self.custom_font_path, font_name, font_size)
+        font = self.font_cache.get(font_key)
+        if font is not None:
+            return font
+        with self.tracer.span('font.load', font=font_name, size=font_size):
+            font = self._open_font(font_name, font_size)
+        self.font_cache.put(font_key, font)
+        return font
 
+    def _open_font(self, font_name, font_size):
+        """Open the custom font, or the named font via the font index, falling back to the default font."""
+        try:
             # Use custom font if loaded
             if self.custom_font_path:
                 font = ImageFont.truetype(self.custom_font_path, font_size)
             else:
-                # Attempt to load the font from system fonts
-                font = ImageFont.truetype(font_name, font_size)
-            self.font_cache[font_key] = font
-            return font
+                # Resolve PostScript or family names to a file through the system font index
+                location = self.font_index.find(font_name)
+                if location is not None:
+                    font_file, face_index = location
+                    font = ImageFont.truetype(font_file, font_size, index=face_index)
+                else:
+                    font = ImageFont.truetype(font_name, font_size)
         except IOError:
             if font_name not in self.missing_fonts:
                 self.missing_fonts.add(font_name)
                 print(f"Font '{font_name}' not found.")
-            # Use default font
-            return ImageFont.load_default()
+            # Use default font; _load_font caches it so the lookup isn't repeated
+            font = ImageFont.load_default()
+        return font
 
     def load_custom_font(self, font_path):
         """Load a custom font specified by the user."""
         self.custom_font_path = font_path
-        self.font_cache.clear()  # Clear font cache to use the new font
+        self._invalidate_text_layers()
+        self._record_edit('Load Custom Font')
 
     def select_font(self, font_name):
         """Select a font to use for text rendering."""
         self.selected_font_name = font_name
-        self.font_cache.clear()  # Clear font cache to use the new font
+        self._invalidate_text_layers()
+        self._record_edit('Select Font')
+
+    def _invalidate_text_layers(self):
+        """Drop cached rasters of text layers; pixel layers don't depend on fonts."""
+        self.layer_cache.invalidate_if(lambda key: key[1] == 'type')
 
-    def toggle_layer_visibility(self, layer_index):
+    def toggle_layer_visibility(self, layer_id):
         try:
-            layer = self.psd[layer_index]
+            layer = self.get_layer(layer_id)
             layer.visible = not layer.visible
+            self.focus_layer_index = self._top_level_index(layer)
+            self._record_edit('Toggle Visibility')
         except Exception as e:
             print(f"Error toggling layer visibility: {e}")
-            messagebox.showerror("Error", f"Failed to toggle layer visibility: {e}")
+            raise
 
-    def replace_layer_image(self, layer_index, image_path):
+    def replace_layer_image(self, layer_id, image_path):
         try:
-            layer = self.psd[layer_index]
-            new_image = Image.open(image_path).convert('RGBA')
-            # Resize the image to match the layer size
-            new_image = new_image.resize((layer.width, layer.height), Image.LANCZOS)
-            # Store the replacement image
-            self.layer_replacements[layer.layer_id] = new_image
+            layer = self.get_layer(layer_id)
+            # Decode straight to the layer size, or reuse an earlier ingestion of the file
+            new_image = ingest_image(image_path, (layer.width, layer.height))
+            self._set_replacement(layer, new_image)
+            self._record_edit('Replace Image')
         except Exception as e:
             print(f"Error replacing layer image: {e}")
-            messagebox.showerror("Error", f"Failed to replace layer image: {e}")
+            raise
 
-    def edit_layer_text(self, layer_index, new_text):
+    def replace_layer_images(self, image_paths, workers=DEFAULT_INGEST_WORKERS):
+        """Replace several layers at once from a {layer_id: image_path} dict, decoding the images in parallel."""
         try:
-            layer = self.psd[layer_index]
-            self.layer_text_edits[layer.layer_id] = new_text
+            layers = [self.get_layer(layer_id) for layer_id in image_paths]
+            new_images = ingest_images(
+                [(image_paths[layer_id], (layer.width, layer.height)) for layer_id, layer in zip(image_paths, layers)],
+                workers)
+            for layer, new_image in zip(layers, new_images):
+                self._set_replacement(layer, new_image)
+            self._record_edit('Replace Images')
+        except Exception as e:
+            print(f"Error replacing layer images: {e}")
+            raise
+
+    def _set_replacement(self, layer, new_image):
+        # Store the replacement image
+        layer_id = self.get_layer_id(layer)
+        self.layer_replacements[layer_id] = new_image
+        self.replacement_digests.pop(layer_id, None)
+        self.layer_cache.invalidate(layer_id)
+        self._mark_layer_changed(layer)
+
+    def edit_layer_text(self, layer_id, new_text):
+        try:
+            layer = self.get_layer(layer_id)
+            self.layer_text_edits[layer_id] = new_text
+            self.layer_cache.invalidate(layer_id)
+            self._mark_layer_changed(layer)
+            self._record_edit('Edit Text')
         except Exception as e:
             print(f"Error editing layer text: {e}")
-            messagebox.showerror("Error", f"Failed to edit layer text: {e}")
+            raise
+
+    def _mark_layer_changed(self, layer):
+        """Give the layer a new content version and focus incremental rendering on it."""
+        self.layer_versions[self.get_layer_id(layer)] = self._next_edit_serial()
+        self.focus_layer_index = self._top_level_index(layer)
+        # Composites of the enclosing groups are stale now
+        parent = layer.parent
+        while parent is not None and parent is not self.psd:
+            self.layer_cache.invalidate(self.get_layer_id(parent))
+            parent = parent.parent
+
+    def _next_edit_serial(self):
+        self._edit_serial += 1
+        return self._edit_serial
+
+    def _snapshot_fields(self):
+        """Current edit state, for EditHistory snapshots."""
+        return {
+            'visibility': {layer_id: layer.visible for layer_id, layer in self.layers_by_id.items()
+                           if layer.visible != self.original_visibility[layer_id]},
+            'replacements': self.layer_replacements,
+            'text_edits': self.layer_text_edits,
+            'layer_versions': self.layer_versions,
+            'selected_font_name': self.selected_font_name,
+            'custom_font_path': self.custom_font_path,
+        }
+
+    def _record_edit(self, label):
+        if self.psd is not None:
+            self.history.commit(label, self._snapshot_fields())
+
+    def undo(self):
+        """Revert the most recent edit; returns False if there is nothing to undo."""
+        snapshot = self.history.undo()
+        if snapshot is None:
+            return False
+        self._restore_snapshot(snapshot)
+        return True
+
+    def redo(self):
+        """Reapply the most recently undone edit; returns False if there is nothing to redo."""
+        snapshot = self.history.redo()
+        if snapshot is None:
+            return False
+        self._restore_snapshot(snapshot)
+        return True
+
+    def _restore_snapshot(self, snapshot):
+        """Make the editor state match snapshot, sharing its images and keeping the caches valid.
+
+        Restored layers get their old content versions back, so rasters and
+        stacks cached for that state are hit again; versions are never
+        reused by new edits, so nothing stale can match.
+        """
+        changed = set()
+        for layer_id, layer in self.layers_by_id.items():
+            visible = snapshot.visibility.get(layer_id, self.original_visibility[layer_id])
+            if layer.visible != visible:
+                layer.visible = visible
+                changed.add(layer_id)
+        for layer_id in set(self.layer_replacements) | set(snapshot.replacements):
+            if self.layer_replacements.get(layer_id) is not snapshot.replacements.get(layer_id):
+                changed.add(layer_id)
+        for current, restored in ((self.layer_text_edits, snapshot.text_edits),
+                                  (self.layer_versions, snapshot.layer_versions)):
+            changed.update(layer_id for layer_id in set(current) | set(restored)
+                           if current.get(layer_id) != restored.get(layer_id))
+        for layer_id in set(self.replacement_digests):
+            if self.layer_replacements.get(layer_id) is not snapshot.replacements.get(layer_id):
+                del self.replacement_digests[layer_id]
+        self.layer_replacements = dict(snapshot.replacements)
+        self.layer_text_edits = dict(snapshot.text_edits)
+        self.layer_versions = dict(snapshot.layer_versions)
+
+        fonts_changed = (self.selected_font_name, self.custom_font_path) != (
+            snapshot.selected_font_name, snapshot.custom_font_path)
+        self.selected_font_name = snapshot.selected_font_name
+        self.custom_font_path = snapshot.custom_font_path
+        if fonts_changed:
+            self._invalidate_text_layers()
+
+        # Incremental rendering only helps when a single top-level layer differs
+        top_level = {self._top_level_index(self.layers_by_id[layer_id]) for layer_id in changed}
+        self.focus_layer_index = top_level.pop() if len(top_level) == 1 and not fonts_changed else None
+
+    def _top_level_index(self, layer):
+        """Index of the top-level layer or group that contains the layer."""
+        while layer.parent is not None and layer.parent is not self.psd:
+            layer = layer.parent
+        for index, top_level_layer in enumerate(self.psd):
+            if top_level_layer is layer:
+                return index
+        return None
+
+    def get_layer_thumbnail(self, layer_id, size):
+        """Get the layer (or group) image scaled to fit a size x size box, cached with the layer rasters.
 
-    def get_selected_layer_image(self, layer_index):
-        """Get the image of the selected layer, considering replacements and edits."""
+        Built from the coarsest mip proxy that still covers the box, so a
+        thumbnail costs little more than the layer's first decode.
+        """
+        layer = self.get_layer(layer_id)
+        if layer.is_group():
+            cache_key = (self.get_layer_id(layer), 'thumbnail', size, self._layer_signature(layer))
+        else:
+            cache_key = self._layer_cache_key(layer) + ('thumbnail', size)
+        thumbnail = self.layer_cache.get(cache_key)
+        if thumbnail is not None:
+            return thumbnail
+        level = mip_level_for_scale(size / max(layer.width, layer.height, 1))
+        if layer.is_group():
+            source = (self._get_group_raster(layer, level) or (None, None))[0]
+        else:
+            source = self.get_layer_proxy(layer, level)
+        if source is None:
+            return None
+        thumbnail = source.copy()
+        thumbnail.thumbnail((size, size), Image.LANCZOS)
+        self.layer_cache.put(cache_key, thumbnail)
+        return thumbnail
+
+    def get_selected_layer_image(self, layer_id):
+        """Get the image of the selected layer, considering replacements and edits.
+
+        The image covers only the layer's own bounds (clipped to the
+        document), not the whole document; None if the layer has no pixels.
+        """
         try:
-            layer = self.psd[layer_index]
-            layer_image = self.get_layer_image(layer)
-            # Create an image the size of the PSD
-            full_image = Image.new('RGBA', self.psd.size)
-            # Paste the layer image at its offset
-            position = layer.offset
-            full_image.paste(layer_image, position)
-            return full_image.convert('RGB')
+            layer = self.get_layer(layer_id)
+            if layer.is_group():
+                layer_image, position = self._get_group_raster(layer) or (None, (0, 0))
+            else:
+                layer_image = self.get_layer_image(layer)
+                position = layer.offset
+            if layer_image is None:
+                return None
+            clipped = clip_to_canvas(self.psd.size, position, layer_image.size)
+            if clipped is None:
+                return None
+            _, source_box = clipped
+            if source_box != (0, 0) + layer_image.size:
+                layer_image = layer_image.crop(source_box)
+            return layer_image.convert('RGB')
         except Exception as e:
             print(f"Error getting selected layer image: {e}")
             return None
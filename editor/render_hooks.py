@@ -0,0 +1,82 @@
+import threading
+
+import numpy as np
+from PIL import Image
+
+from editor.tracing import NULL_SPAN
+
+
+class RenderHooks:
+    """Filters that plugins insert into the render pipeline.
+
+    Layer filters are called as func(pixels, layer) with the layer's RGBA
+    raster as a writable (H, W, 4) uint8 array, before the raster is cached,
+    so they run once per layer version rather than once per render.
+    Composite filters are called as func(pixels, scale) with the finished
+    composite as an (H, W, 3) or (H, W, 4) uint8 array; scale is below 1 for
+    previews. Filters either modify pixels in place and return None, or
+    return a new array of the same shape. A filter that raises is skipped
+    for that call, and its error printed.
+    """
+    def __init__(self, tracer=None):
+        self.tracer = tracer
+        self.layer_filters = []      # (name, func) in the order they run
+        self.composite_filters = []
+        self.version = 0             # Bumped whenever the filters change
+        self._lock = threading.Lock()
+
+    def add_layer_filter(self, name, func):
+        with self._lock:
+            self.layer_filters.append((name, func))
+            self.version += 1
+
+    def add_composite_filter(self, name, func):
+        with self._lock:
+            self.composite_filters.append((name, func))
+            self.version += 1
+
+    def remove(self, name):
+        """Remove every filter registered under name."""
+        with self._lock:
+            self.layer_filters = [entry for entry in self.layer_filters if entry[0] != name]
+            self.composite_filters = [entry for entry in self.composite_filters if entry[0] != name]
+            self.version += 1
+
+    def signature(self):
+        """Names of the active filters, for cache keys of filtered output."""
+        return ([name for name, _ in self.layer_filters], [name for name, _ in self.composite_filters])
+
+    def apply_layer_filters(self, layer, image):
+        if not self.layer_filters or image is None:
+            return image
+        if image.mode != 'RGBA':
+            image = image.convert('RGBA')
+        pixels = np.array(image)
+        for name, func in self.layer_filters:
+            pixels = self._run(name, 'layer', func, pixels, layer)
+        return Image.fromarray(pixels, 'RGBA')
+
+    def apply_composite_filters(self, image, scale=1.0):
+        if not self.composite_filters or image is None:
+            return image
+        mode = image.mode
+        pixels = np.array(image)
+        for name, func in self.composite_filters:
+            pixels = self._run(name, 'composite', func, pixels, scale)
+        return Image.fromarray(pixels, mode)
+
+    def _run(self, name, stage, func, pixels, argument):
+        span = self.tracer.span('plugin.filter', plugin=name, stage=stage) if self.tracer else NULL_SPAN
+        try:
+            with span:
+                result = func(pixels, argument)
+        except Exception as e:
+            # A broken plugin shouldn't stop the render; its stage is skipped
+            print(f"Error in {stage} filter '{name}': {e}")
+            return pixels
+        if result is None:
+            return pixels
+        if getattr(result, 'shape', None) != pixels.shape or result.dtype != np.uint8:
+            print(f"Error in {stage} filter '{name}': expected a uint8 array of shape {pixels.shape}")
+            return pixels
+        return result
@@ -0,0 +1,49 @@
+class StackCache:
+    """Partial composites of the layer stack around a focus layer.
+
+    Keeps "everything below layer N" (composited over the empty canvas) and
+    "everything above layer N" (composited over transparency), each tagged
+    with the signatures of the layers it was built from. When only layer N
+    changes, a full composite costs one blend of layer N plus one blend of
+    the cached upper stack.
+
+    Blending the upper stack as a unit is mathematically identical to
+    blending its layers one at a time, but 8-bit rounding can differ by one
+    level on partly transparent pixels.
+    """
+    def __init__(self):
+        self.focus_index = None
+        self.below = None  # (signatures, image)
+        self.above = None  # (signatures, image)
+
+    def get_below(self, focus_index, signatures):
+        return self._lookup(self.below, focus_index, signatures)
+
+    def get_above(self, focus_index, signatures):
+        return self._lookup(self.above, focus_index, signatures)
+
+    def set_below(self, focus_index, signatures, image):
+        self._refocus(focus_index)
+        self.below = (tuple(signatures), image)
+
+    def set_above(self, focus_index, signatures, image):
+        self._refocus(focus_index)
+        self.above = (tuple(signatures), image)
+
+    def clear(self):
+        self.focus_index = None
+        self.below = None
+        self.above = None
+
+    def _lookup(self, entry, focus_index, signatures):
+        if entry is None or focus_index != self.focus_index:
+            return None
+        cached_signatures, image = entry
+        if cached_signatures != tuple(signatures):
+            return None
+        return image
+
+    def _refocus(self, focus_index):
+        if focus_index != self.focus_index:
+            self.clear()
+            self.focus_index = focus_index
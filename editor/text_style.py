@@ -0,0 +1,79 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+DEFAULT_FONT_NAME = 'Arial'
+DEFAULT_FONT_SIZE = 20
+DEFAULT_FILL_COLOR = (255, 255, 255, 255)  # White
+DEFAULT_FONT_CACHE_SIZE = 64  # Loaded (font, size) pairs kept in memory
+
+TextStyle = namedtuple('TextStyle', ['font_name', 'font_size', 'fill_color'])
+
+
+def parse_text_style(engine_dict, resource_dict):
+    """Read font name, size and fill color of the first style run in a single pass.
+
+    engine_dict and resource_dict are a type layer's engine_dict and
+    resource_dict; the font set lives in the latter, next to EngineDict.
+    """
+    try:
+        styles = engine_dict['StyleRun']['RunArray'][0]['StyleSheet']['StyleSheetData']
+    except Exception as e:
+        print(f"Error extracting font properties: {e}")
+        return TextStyle(DEFAULT_FONT_NAME, DEFAULT_FONT_SIZE, DEFAULT_FILL_COLOR)
+
+    try:
+        font_size = int(styles.get('FontSize', DEFAULT_FONT_SIZE))
+    except Exception as e:
+        print(f"Error getting font size: {e}")
+        font_size = DEFAULT_FONT_SIZE
+
+    try:
+        fill_color_values = styles.get('FillColor', {}).get('Values', [1, 1, 1])
+        fill_color = tuple(int(c * 255) for c in fill_color_values)
+        if len(fill_color) == 3:
+            fill_color = (*fill_color, 255)  # Add alpha channel
+    except Exception as e:
+        print(f"Error getting fill color: {e}")
+        fill_color = DEFAULT_FILL_COLOR
+
+    try:
+        font_set = resource_dict['FontSet']
+        font_name = font_set[styles['Font']]['Name']
+        font_name = str(getattr(font_name, 'value', font_name))  # Engine data strings wrap the str
+    except Exception as e:
+        print(f"Error getting font name: {e}")
+        font_name = DEFAULT_FONT_NAME
+
+    return TextStyle(font_name, font_size, fill_color)
+
+
+class FontCache:
+    """Bounded LRU cache of loaded fonts, keyed by (font file or name, size)."""
+    def __init__(self, max_entries=DEFAULT_FONT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._fonts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is not None:
+                self._fonts.move_to_end(key)
+            return font
+
+    def put(self, key, font):
+        with self._lock:
+            self._fonts[key] = font
+            self._fonts.move_to_end(key)
+            while len(self._fonts) > self.max_entries:
+                self._fonts.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._fonts.clear()
+
+    def __contains__(self, key):
+        return key in self._fonts
+
+    def __len__(self):
+        return len(self._fonts)
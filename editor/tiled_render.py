@@ -0,0 +1,113 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image
+
+DEFAULT_TILE_SIZE = 1024
+
+
+def iter_tile_boxes(canvas_size, tile_size):
+    """Yield (left, top, right, bottom) boxes covering the canvas row by row."""
+    width, height = canvas_size
+    for top in range(0, height, tile_size):
+        for left in range(0, width, tile_size):
+            yield (left, top, min(left + tile_size, width), min(top + tile_size, height))
+
+
+def crop_layers_to_tile(layers, tile_box):
+    """Keep only the parts of the layers that intersect the tile.
+
+    layers is a bottom-to-top list of (image, offset, blend_params) tuples.
+    Offsets of the returned crops are relative to the tile.
+    """
+    tile_left, tile_top, tile_right, tile_bottom = tile_box
+    tile_layers = []
+    for image, (left, top), blend_params in layers:
+        x0 = max(left, tile_left)
+        y0 = max(top, tile_top)
+        x1 = min(left + image.width, tile_right)
+        y1 = min(top + image.height, tile_bottom)
+        if x0 >= x1 or y0 >= y1:
+            continue
+        if blend_params[2] == 'dissolve':
+            # The dissolve pattern is fixed in layer coordinates, so send the whole layer
+            tile_layers.append((image, (left - tile_left, top - tile_top), blend_params))
+            continue
+        if (x1 - x0, y1 - y0) != image.size:
+            image = image.crop((x0 - left, y0 - top, x1 - left, y1 - top))
+        tile_layers.append((image, (x0 - tile_left, y0 - tile_top), blend_params))
+    return tile_layers
+
+
+def render_tile(backend_name, tile_box, tile_layers):
+    """Composite one tile; runs in a worker process."""
+    from editor.psd_editor import RENDER_BACKENDS
+
+    compositor = RENDER_BACKENDS[backend_name]()
+    left, top, right, bottom = tile_box
+    canvas = compositor.new_canvas((right - left, bottom - top))
+    for image, offset, blend_params in tile_layers:
+        compositor.blend(canvas, image, offset, *blend_params)
+    return tile_box, compositor.to_image(canvas, 'RGBA')
+
+
+class TiledRenderer:
+    """Splits the canvas into tiles and composites them on a process pool.
+
+    Every pixel is blended exactly as in a single-threaded render, so the
+    stitched result matches it. The pool is started on first use and kept
+    until close() is called.
+    """
+    def __init__(self, tile_size=DEFAULT_TILE_SIZE, workers=None):
+        self.tile_size = tile_size
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            # Spawned workers are safe to start from the GUI thread, unlike forked ones
+            context = multiprocessing.get_context('spawn')
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self._executor
+
+    def configure(self, tile_size=None, workers=None):
+        """Change the tile size or worker count; a new pool is started when needed."""
+        if tile_size is not None:
+            self.tile_size = tile_size
+        if workers is not None and workers != self.workers:
+            self.close()
+            self.workers = workers
+
+    def iter_tiles(self, canvas_size, layers, backend_name):
+        """Yield (tile_box, RGBA tile) pairs in completion order."""
+        executor = self._get_executor()
+        futures = [
+            executor.submit(render_tile, backend_name, tile_box, crop_layers_to_tile(layers, tile_box))
+            for tile_box in iter_tile_boxes(canvas_size, self.tile_size)
+        ]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def render(self, canvas_size, layers, backend_name, progress=None):
+        """Render all tiles and stitch them into one RGBA image.
+
+        progress, if given, is called as progress(done, total) after each tile.
+        """
+        composite_image = Image.new('RGBA', canvas_size)
+        total = len(list(iter_tile_boxes(canvas_size, self.tile_size)))
+        tiles = self.iter_tiles(canvas_size, layers, backend_name)
+        for done, ((left, top, _, _), tile) in enumerate(tiles, 1):
+            composite_image.paste(tile, (left, top))
+            if progress is not None:
+                progress(done, total)
+        return composite_image
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
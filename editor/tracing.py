@@ -0,0 +1,188 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+DEFAULT_MAX_EVENTS = 100000  # Oldest events are dropped beyond this
+
+
+class _NullSpan:
+    """Stand-in returned by a disabled tracer; entering and leaving it does nothing."""
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Times a with-block and records it as a complete ('X') trace event.
+
+    Arguments can be added inside the block with set().
+    """
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start')
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0
+
+    def set(self, **args):
+        """Add arguments to the event, e.g. the size of what the block produced."""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.emit({
+            'name': self.name, 'cat': self.category, 'ph': 'X',
+            'ts': self.start / 1000, 'dur': (end - self.start) / 1000,
+            'pid': os.getpid(), 'tid': threading.get_ident(), 'args': self.args,
+        })
+        return False
+
+
+class Tracer:
+    """Records render spans and counters as Chrome trace events.
+
+    Disabled by default: span() then returns a shared no-op object and
+    counter() returns immediately, so instrumented code costs one attribute
+    check per call. Subscribers are called with each event dict on the thread
+    that produced it.
+    """
+    def __init__(self, max_events=DEFAULT_MAX_EVENTS):
+        self.enabled = False
+        self._events = deque(maxlen=max_events)
+        self._emitted = 0
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, name, category='render', **args):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, category, args)
+
+    def counter(self, name, category='render', **values):
+        """Record counter values (a 'C' event), e.g. cache hits and misses."""
+        if not self.enabled:
+            return
+        self.emit({
+            'name': name, 'cat': category, 'ph': 'C', 'ts': time.perf_counter_ns() / 1000,
+            'pid': os.getpid(), 'tid': threading.get_ident(), 'args': values,
+        })
+
+    def emit(self, event):
+        with self._lock:
+            self._events.append(event)
+            self._emitted += 1
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Error in trace subscriber: {e}")
+
+    def subscribe(self, callback):
+        """Call callback(event) for every event recorded from now on."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def mark(self):
+        """Position in the event stream, for events_since()."""
+        with self._lock:
+            return self._emitted
+
+    def events_since(self, mark=0):
+        """Events recorded after mark that are still kept."""
+        with self._lock:
+            count = min(self._emitted - mark, len(self._events))
+            return list(self._events)[len(self._events) - count:] if count > 0 else []
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+
+    def export_chrome_trace(self, file_path):
+        """Write the recorded events as a Chrome trace (chrome://tracing, Perfetto)."""
+        with open(file_path, 'w', encoding='utf-8') as trace_file:
+            json.dump({'traceEvents': self.events_since(), 'displayTimeUnit': 'ms'}, trace_file, default=str)
+
+    def summary(self, mark=0):
+        """Total time, count and bytes per span name since mark, plus the latest counter values.
+
+        'ms' is inclusive; 'self_ms' leaves out the time of spans nested
+        inside on the same thread, so wrappers like 'render' don't hide the
+        stage that was actually slow.
+        """
+        events = self.events_since(mark)
+        spans = {}
+        counters = {}
+        for event in events:
+            if event['ph'] == 'C':
+                counters[event['name']] = event['args']
+                continue
+            entry = spans.setdefault(event['name'], {'count': 0, 'ms': 0.0, 'self_ms': 0.0, 'bytes': 0})
+            entry['count'] += 1
+            entry['ms'] += event['dur'] / 1000
+            entry['bytes'] += event['args'].get('bytes', 0)
+        for name, ms in _self_times(events):
+            spans[name]['self_ms'] += ms
+        return {'spans': spans, 'counters': counters}
+
+    def format_summary(self, mark=0, limit=4):
+        """One-line summary for a status bar: the stages with the most self time and the cache hit rate."""
+        summary = self.summary(mark)
+        spans = sorted(summary['spans'].items(), key=lambda item: item[1]['self_ms'], reverse=True)
+        parts = [f"{name} {entry['self_ms']:.0f} ms ×{entry['count']}" for name, entry in spans[:limit]]
+        cache = summary['counters'].get('layer_cache')
+        if cache:
+            lookups = cache['hits'] + cache['misses']
+            if lookups:
+                parts.append(f"cache {100 * cache['hits'] / lookups:.0f}% hits")
+        return " | ".join(parts) if parts else "No trace events"
+
+
+def _self_times(events):
+    """Yield (name, ms) per span event: its duration minus that of the spans directly inside it."""
+    threads = {}
+    for event in events:
+        if event['ph'] == 'X':
+            threads.setdefault((event['pid'], event['tid']), []).append(event)
+    for thread_events in threads.values():
+        # Parents start no later than their children and, on a tie, last longer
+        thread_events.sort(key=lambda event: (event['ts'], -event['dur']))
+        self_times = [event['dur'] for event in thread_events]
+        stack = []  # Indices of the enclosing spans
+        for index, event in enumerate(thread_events):
+            while stack and thread_events[stack[-1]]['ts'] + thread_events[stack[-1]]['dur'] <= event['ts']:
+                stack.pop()
+            if stack:
+                self_times[stack[-1]] -= event['dur']
+            stack.append(index)
+        for event, self_time in zip(thread_events, self_times):
+            yield event['name'], max(self_time, 0) / 1000
@@ -0,0 +1,34 @@
+DEFAULT_VIEWPORT_TILE_SIZE = 256  # Viewport tiles are cached per edit state, mip level and grid position
+
+
+def clip_box(box, canvas_size):
+    """Clip a (left, top, right, bottom) box to the canvas; None if nothing is left."""
+    left, top, right, bottom = box
+    left, top = max(0, left), max(0, top)
+    right, bottom = min(canvas_size[0], right), min(canvas_size[1], bottom)
+    if left >= right or top >= bottom:
+        return None
+    return left, top, right, bottom
+
+
+def level_box(box, level):
+    """The box in mip level pixels that covers a box given in full-resolution pixels."""
+    factor = 2 ** level
+    left, top, right, bottom = box
+    return left // factor, top // factor, -(-right // factor), -(-bottom // factor)
+
+
+def iter_viewport_tiles(box, canvas_size, tile_size=DEFAULT_VIEWPORT_TILE_SIZE):
+    """Yield (column, row, tile_box) for the tiles of a fixed grid that overlap box.
+
+    The grid starts at the canvas origin, so the same tile keeps the same
+    position (and cache key) however the view is panned. Tiles at the right
+    and bottom edges are clipped to the canvas.
+    """
+    left, top, right, bottom = box
+    width, height = canvas_size
+    for row in range(top // tile_size, (bottom - 1) // tile_size + 1):
+        for column in range(left // tile_size, (right - 1) // tile_size + 1):
+            tile_left, tile_top = column * tile_size, row * tile_size
+            yield column, row, (tile_left, tile_top,
+                                min(tile_left + tile_size, width), min(tile_top + tile_size, height))
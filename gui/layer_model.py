@@ -0,0 +1,53 @@
+from collections import namedtuple
+
+LayerRow = namedtuple('LayerRow', ['layer_id', 'name', 'depth', 'visible', 'kind', 'version'])
+LayerRow.__doc__ = """One row of the layer panel; version changes whenever the layer's pixels do."""
+
+
+class LayerListModel:
+    """Flattened layer rows of the open document, publishing row-level changes to observers.
+
+    refresh() compares the new rows with the current ones and tells each
+    observer either ('update', [row indices]) when only the contents of some
+    rows changed, or ('reset', None) when rows were added, removed or
+    reordered. Observers are called on the thread that called refresh().
+    Rows (and the thumbnails of the layer panel) are identified by
+    layer_id, which PSDEditor keeps unique even for files without layer ids.
+    """
+    def __init__(self):
+        self.rows = []
+        self._indices = {}  # layer_id -> row index
+        self._observers = []
+
+    def subscribe(self, callback):
+        self._observers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._observers:
+            self._observers.remove(callback)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def row(self, index):
+        return self.rows[index]
+
+    def index_of(self, layer_id):
+        """Row index of a layer, or None."""
+        return self._indices.get(layer_id)
+
+    def refresh(self, layer_info):
+        """Replace the rows with get_layer_info() output and notify observers of what changed."""
+        rows = [LayerRow(info['layer_id'], info['name'], info['depth'], info['visible'], info['kind'],
+                         info['version']) for info in layer_info]
+        if [row.layer_id for row in rows] != [row.layer_id for row in self.rows]:
+            change = ('reset', None)
+        else:
+            changed = [index for index, (old, new) in enumerate(zip(self.rows, rows)) if old != new]
+            if not changed:
+                return
+            change = ('update', changed)
+        self.rows = rows
+        self._indices = {row.layer_id: index for index, row in enumerate(rows)}
+        for callback in list(self._observers):
+            callback(*change)
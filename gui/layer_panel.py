@@ -0,0 +1,235 @@
+import tkinter as tk
+from collections import OrderedDict
+
+import customtkinter as ctk
+from PIL import ImageTk
+
+ROW_HEIGHT = 36
+THUMBNAIL_SIZE = 32
+INDENT_WIDTH = 16  # Pixels per nesting level
+DEFAULT_THUMBNAIL_ENTRIES = 2048  # PhotoImages kept for rows scrolled out of view
+
+
+class ThumbnailLoader:
+    """Renders layer thumbnails one at a time on the render worker and keeps them as PhotoImages.
+
+    Jobs go through the RenderScheduler, one per thumbnail, so the editor is
+    still only rendered from one thread and a preview waits for at most one
+    thumbnail. Only rows that are on screen are requested.
+    """
+    def __init__(self, editor, render_scheduler, on_ready, max_entries=DEFAULT_THUMBNAIL_ENTRIES):
+        self.editor = editor
+        self.render_scheduler = render_scheduler
+        self.on_ready = on_ready  # Called as on_ready(layer_id) on the Tk thread
+        self.max_entries = max_entries
+        self._photos = OrderedDict()  # (layer_id, version) -> PhotoImage, or None if the layer is empty
+        self._wanted = []  # (layer_id, version) still to render, most wanted first
+        self._in_flight = None
+
+    def get(self, layer_id, version):
+        """The cached thumbnail, or None (also for empty layers)."""
+        key = (layer_id, version)
+        photo = self._photos.get(key)
+        if photo is not None:
+            self._photos.move_to_end(key)
+        return photo
+
+    def request(self, rows):
+        """Render thumbnails for these rows (replacing earlier requests), skipping cached ones."""
+        self._wanted = [(row.layer_id, row.version) for row in rows
+                        if (row.layer_id, row.version) not in self._photos]
+        self._submit_next()
+
+    def clear(self):
+        """Forget every thumbnail, e.g. when another document is opened."""
+        self._photos.clear()
+        self._wanted = []
+        self._in_flight = None
+        self.render_scheduler.cancel('thumbnail')
+
+    def _submit_next(self):
+        if self._in_flight is not None or not self._wanted:
+            return
+        key = self._wanted.pop(0)
+        self._in_flight = key
+        self.render_scheduler.submit(
+            'thumbnail', lambda progress: self.editor.get_layer_thumbnail(key[0], THUMBNAIL_SIZE),
+            on_done=lambda image: self._finish(key, image),
+            on_error=lambda e: self._finish(key, None, e))
+
+    def _finish(self, key, image, error=None):
+        self._in_flight = None
+        if error is not None:
+            print(f"Error rendering layer thumbnail: {error}")
+        self._photos[key] = ImageTk.PhotoImage(image) if image is not None else None
+        while len(self._photos) > self.max_entries:
+            self._photos.popitem(last=False)
+        self.on_ready(key[0])
+        self._submit_next()
+
+
+class VirtualLayerList:
+    """Scrollable layer list that only creates canvas items for the rows in view.
+
+    Rows come from a LayerListModel; 'update' notifications redraw just the
+    affected rows if they are on screen, and scrolling reuses the same few
+    canvas items for whichever rows come into view. Each row shows the
+    layer's visibility, name (indented by depth) and a thumbnail.
+    """
+    def __init__(self, parent, model, thumbnails=None, on_select=None, on_context_menu=None,
+                 bg='white', fg='black', select_bg='#3a7ebf'):
+        self.model = model
+        self.thumbnails = thumbnails  # ThumbnailLoader, set later if it needs the scheduler
+        self.on_select = on_select  # Called as on_select(index or None)
+        self.on_context_menu = on_context_menu  # Called as on_context_menu(index, event)
+        self.bg = bg
+        self.fg = fg
+        self.select_bg = select_bg
+        self.selected_index = None
+        self._items = {}  # Row index -> (background, thumbnail, text) canvas items
+        self._spare = []  # Items of rows scrolled out of view, for reuse
+
+        self.frame = tk.Frame(parent, bg=bg)
+        self.canvas = tk.Canvas(self.frame, bg=bg, bd=0, highlightthickness=0, width=220, takefocus=1,
+                                yscrollincrement=ROW_HEIGHT)
+        self.scrollbar = ctk.CTkScrollbar(self.frame, command=self.yview)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.canvas.bind('<Configure>', lambda event: self.redraw())
+        self.canvas.bind('<Button-1>', self._on_click)
+        self.canvas.bind('<Button-3>', self._on_right_click)
+        self.canvas.bind('<MouseWheel>', lambda event: self.yview('scroll', -1 if event.delta > 0 else 1, 'units'))
+        self.canvas.bind('<Button-4>', lambda event: self.yview('scroll', -1, 'units'))
+        self.canvas.bind('<Button-5>', lambda event: self.yview('scroll', 1, 'units'))
+        self.canvas.bind('<Up>', lambda event: self._move_selection(-1))
+        self.canvas.bind('<Down>', lambda event: self._move_selection(1))
+        model.subscribe(self.on_model_changed)
+
+    def pack(self, **options):
+        self.frame.pack(**options)
+
+    def set_colors(self, bg, fg, select_bg=None):
+        self.bg, self.fg = bg, fg
+        if select_bg is not None:
+            self.select_bg = select_bg
+        self.frame.configure(bg=bg)
+        self.canvas.configure(bg=bg)
+        for index in list(self._items):
+            self._draw_row(index)
+
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self.redraw()
+
+    def on_model_changed(self, kind, indices):
+        if kind == 'reset':
+            for index in list(self._items):
+                self._release_row(index)
+            if self.selected_index is not None and self.selected_index >= len(self.model):
+                self.selected_index = None
+            self.redraw()
+            return
+        for index in indices:
+            if index in self._items:
+                self._draw_row(index)
+        self._request_thumbnails()
+
+    def on_thumbnail_ready(self, layer_id):
+        index = self.model.index_of(layer_id)
+        if index in self._items:
+            self._draw_row(index)
+
+    def select(self, index):
+        previous = self.selected_index
+        self.selected_index = index
+        for row_index in (previous, index):
+            if row_index in self._items:
+                self._draw_row(row_index)
+        if index is not None:
+            self.see(index)
+        if self.on_select is not None:
+            self.on_select(index)
+
+    def see(self, index):
+        """Scroll so the row at index is in view."""
+        total = len(self.model) * ROW_HEIGHT
+        top = self.canvas.canvasy(0)
+        height = self.canvas.winfo_height()
+        row_top = index * ROW_HEIGHT
+        if total and (row_top < top or row_top + ROW_HEIGHT > top + height):
+            self.yview('moveto', max(0, row_top - height / 2 + ROW_HEIGHT / 2) / total)
+
+    def redraw(self):
+        """Materialize the rows in view, recycling the items of rows that scrolled out."""
+        width = max(self.canvas.winfo_width(), 1)
+        self.canvas.configure(scrollregion=(0, 0, width, len(self.model) * ROW_HEIGHT))
+        first, last = self._visible_range()
+        for index in [index for index in self._items if not first <= index < last]:
+            self._release_row(index)
+        for index in range(first, last):
+            if index not in self._items:
+                self._items[index] = self._spare.pop() if self._spare else self._create_items()
+            self._draw_row(index)
+        self._request_thumbnails()
+
+    def _visible_range(self):
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), ROW_HEIGHT)
+        first = max(0, int(top // ROW_HEIGHT))
+        last = min(len(self.model), int((top + height) // ROW_HEIGHT) + 1)
+        return first, last
+
+    def _create_items(self):
+        return (self.canvas.create_rectangle(0, 0, 0, 0, width=0),
+                self.canvas.create_image(0, 0, anchor=tk.W),
+                self.canvas.create_text(0, 0, anchor=tk.W))
+
+    def _release_row(self, index):
+        items = self._items.pop(index)
+        for item in items:
+            self.canvas.itemconfigure(item, state=tk.HIDDEN)
+        self._spare.append(items)
+
+    def _draw_row(self, index):
+        row = self.model.row(index)
+        background, thumbnail, text = self._items[index]
+        top = index * ROW_HEIGHT
+        middle = top + ROW_HEIGHT // 2
+        x = 4 + row.depth * INDENT_WIDTH
+        fill = self.select_bg if index == self.selected_index else self.bg
+        self.canvas.coords(background, 0, top, max(self.canvas.winfo_width(), 1), top + ROW_HEIGHT)
+        self.canvas.itemconfigure(background, fill=fill, state=tk.NORMAL)
+        photo = self.thumbnails.get(row.layer_id, row.version) if self.thumbnails is not None else None
+        self.canvas.coords(thumbnail, x, middle)
+        self.canvas.itemconfigure(thumbnail, image=photo if photo is not None else '', state=tk.NORMAL)
+        self.canvas.coords(text, x + THUMBNAIL_SIZE + 6, middle)
+        self.canvas.itemconfigure(text, text=f"{'[X]' if row.visible else '[ ]'} {row.name}", fill=self.fg,
+                                  state=tk.NORMAL)
+
+    def _request_thumbnails(self):
+        if self.thumbnails is not None:
+            self.thumbnails.request([self.model.row(index) for index in sorted(self._items)])
+
+    def _index_at(self, y):
+        index = int(self.canvas.canvasy(y) // ROW_HEIGHT)
+        return index if 0 <= index < len(self.model) else None
+
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        self.select(self._index_at(event.y))
+
+    def _on_right_click(self, event):
+        index = self._index_at(event.y)
+        if index is None:
+            return
+        self.select(index)
+        if self.on_context_menu is not None:
+            self.on_context_menu(index, event)
+
+    def _move_selection(self, step):
+        if not len(self.model):
+            return
+        index = 0 if self.selected_index is None else self.selected_index + step
+        self.select(min(max(index, 0), len(self.model) - 1))
@@ -3,21 +3,52 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog, font
 from PIL import Image, ImageTk
 import customtkinter as ctk
+from editor.export import ExportTarget, preset_targets
 from editor.psd_editor import PSDEditor
+from gui.layer_model import LayerListModel
+from gui.layer_panel import ThumbnailLoader, VirtualLayerList
+from gui.render_scheduler import RenderScheduler
 from plugins import plugin_manager
 
+RESIZE_DEBOUNCE_MS = 150  # Wait this long after the last resize event before re-rendering
+ZOOM_STEP = 1.25  # Zoom factor per wheel notch or Zoom In/Out
+MIN_ZOOM = 0.01
+MAX_ZOOM = 32.0
+EDIT_CHANNEL = 'edit'  # Scheduler channel of edits; edit jobs are never superseded
+
 class PSDLayerEditorGUI:
     """Creates and manages the GUI for the PSD Layer Editor."""
     def __init__(self, master):
         self.master = master
         self.master.title("PSD Layer Editor")
         self.editor = PSDEditor()
+        self._resize_job = None
+        self._last_canvas_size = None
+        self.layer_model = LayerListModel()  # Rows of the layer panel
+        self.zoom = None  # Display pixels per document pixel, or None to fit the document to the canvas
+        self.view_center = None  # Document point shown at the canvas centre while zoomed
+        self._pan_anchor = None  # Last pointer position while dragging the view
+        self._trace_mark = 0  # Tracer position when the latest preview was requested
+
+        plugin_manager.subscribe_to_tracer(self.editor.tracer)
+        plugin_manager.install_render_hooks(self.editor.render_hooks)
 
         self.create_widgets()
         self.create_menu()
+        self.render_scheduler = RenderScheduler(self.master, on_progress=self.show_progress)
+        self.layer_panel.thumbnails = ThumbnailLoader(self.editor, self.render_scheduler,
+                                                      on_ready=self.layer_panel.on_thumbnail_ready)
 
         # Bind resize event to update the preview
         self.master.bind('<Configure>', self.on_resize)
+        self.master.bind('<Control-z>', lambda event: self.undo())
+        self.master.bind('<Control-y>', lambda event: self.redo())
+        self.master.bind('<Control-Z>', lambda event: self.redo())  # Ctrl+Shift+Z
+        self.master.bind('<Control-plus>', lambda event: self.zoom_in())
+        self.master.bind('<Control-equal>', lambda event: self.zoom_in())
+        self.master.bind('<Control-minus>', lambda event: self.zoom_out())
+        self.master.bind('<Control-Key-0>', lambda event: self.fit_to_window())
+        self.master.bind('<Control-Key-1>', lambda event: self.actual_size())
 
     def get_color(self, color_option):
         """Helper function to get the correct color based on the current theme mode."""
@@ -37,14 +68,15 @@ class PSDLayerEditorGUI:
         self.right_frame = ctk.CTkFrame(self.master, corner_radius=10)
         self.right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-        # Use tk.Listbox styled to match customtkinter theme
+        # Virtualized layer list styled to match customtkinter theme
         bg_color = self.get_color(ctk.ThemeManager.theme["CTkFrame"]["fg_color"])
         fg_color = self.get_color(ctk.ThemeManager.theme["CTkLabel"]["text_color"])
+        select_color = self.get_color(ctk.ThemeManager.theme["CTkButton"]["fg_color"])
 
-        self.layer_listbox = tk.Listbox(self.left_frame, bg=bg_color, fg=fg_color, bd=0, highlightthickness=0)
-        self.layer_listbox.pack(fill=tk.Y, expand=True)
-        self.layer_listbox.bind('<<ListboxSelect>>', self.on_layer_select)
-        self.layer_listbox.bind('<Button-3>', self.on_right_click)
+        self.layer_panel = VirtualLayerList(self.left_frame, self.layer_model, on_select=self.on_layer_select,
+                                            on_context_menu=self.on_right_click,
+                                            bg=bg_color, fg=fg_color, select_bg=select_color)
+        self.layer_panel.pack(fill=tk.Y, expand=True)
 
         self.toggle_visibility_btn = ctk.CTkButton(self.left_frame, text="Toggle Visibility", command=self.toggle_visibility)
         self.toggle_visibility_btn.pack(fill=tk.X, padx=5, pady=5)
@@ -52,6 +84,13 @@ class PSDLayerEditorGUI:
         canvas_bg_color = self.get_color(ctk.ThemeManager.theme["CTkFrame"]["fg_color"])
         self.canvas = tk.Canvas(self.right_frame, bg=canvas_bg_color, highlightthickness=0, bd=0)
         self.canvas.pack(fill=tk.BOTH, expand=True)
+        # Wheel zooms around the pointer, dragging pans
+        self.canvas.bind('<MouseWheel>', lambda event: self.zoom_at(ZOOM_STEP if event.delta > 0 else 1 / ZOOM_STEP, event.x, event.y))
+        self.canvas.bind('<Button-4>', lambda event: self.zoom_at(ZOOM_STEP, event.x, event.y))
+        self.canvas.bind('<Button-5>', lambda event: self.zoom_at(1 / ZOOM_STEP, event.x, event.y))
+        for button in (1, 2):
+            self.canvas.bind(f'<ButtonPress-{button}>', self.start_pan)
+            self.canvas.bind(f'<B{button}-Motion>', self.pan)
 
         self.status_bar = ctk.CTkLabel(self.master, text="Welcome to PSD Layer Editor")
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
@@ -65,13 +104,29 @@ class PSDLayerEditorGUI:
         self.menu_bar.add_cascade(label="File", menu=file_menu)
         file_menu.add_command(label="Open PSD", command=self.open_psd)
         file_menu.add_command(label="Save Composite Image", command=self.save_composite_image)
+        file_menu.add_command(label="Export All Sizes", command=self.export_all_sizes)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.master.quit)
 
+        # Edit Menu
+        edit_menu = tk.Menu(self.menu_bar, tearoff=0)
+        self.menu_bar.add_cascade(label="Edit", menu=edit_menu)
+        edit_menu.add_command(label="Undo", accelerator="Ctrl+Z", command=self.undo)
+        edit_menu.add_command(label="Redo", accelerator="Ctrl+Y", command=self.redo)
+
         # View Menu
         view_menu = tk.Menu(self.menu_bar, tearoff=0)
         self.menu_bar.add_cascade(label="View", menu=view_menu)
         view_menu.add_command(label="Switch Theme", command=self.switch_theme)
+        view_menu.add_separator()
+        view_menu.add_command(label="Zoom In", accelerator="Ctrl++", command=self.zoom_in)
+        view_menu.add_command(label="Zoom Out", accelerator="Ctrl+-", command=self.zoom_out)
+        view_menu.add_command(label="Fit to Window", accelerator="Ctrl+0", command=self.fit_to_window)
+        view_menu.add_command(label="Actual Size", accelerator="Ctrl+1", command=self.actual_size)
+        view_menu.add_separator()
+        self.tracing_var = tk.BooleanVar(value=self.editor.tracer.enabled)
+        view_menu.add_checkbutton(label="Render Tracing", variable=self.tracing_var, command=self.toggle_tracing)
+        view_menu.add_command(label="Export Render Trace", command=self.export_trace)
 
         # Fonts Menu
         fonts_menu = tk.Menu(self.menu_bar, tearoff=0)
@@ -83,6 +138,11 @@ class PSDLayerEditorGUI:
         plugins_menu = tk.Menu(self.menu_bar, tearoff=0)
         self.menu_bar.add_cascade(label="Plugins", menu=plugins_menu)
         plugin_manager.populate_menu(plugins_menu, self)
+        plugins_menu.add_separator()
+        plugins_menu.add_command(label="Plugin Timings", command=self.show_plugin_timings)
+
+    def show_plugin_timings(self):
+        messagebox.showinfo("Plugin Timings", plugin_manager.format_plugin_stats())
 
     def switch_theme(self):
         current_mode = ctk.get_appearance_mode()
@@ -98,7 +158,8 @@ class PSDLayerEditorGUI:
         bg_color = self.get_color(ctk.ThemeManager.theme["CTkFrame"]["fg_color"])
         fg_color = self.get_color(ctk.ThemeManager.theme["CTkLabel"]["text_color"])
 
-        self.layer_listbox.configure(bg=bg_color, fg=fg_color)
+        select_color = self.get_color(ctk.ThemeManager.theme["CTkButton"]["fg_color"])
+        self.layer_panel.set_colors(bg_color, fg_color, select_color)
         canvas_bg_color = self.get_color(ctk.ThemeManager.theme["CTkFrame"]["fg_color"])
         self.canvas.configure(bg=canvas_bg_color)
 
@@ -112,54 +173,233 @@ class PSDLayerEditorGUI:
     def open_psd(self):
         file_path = filedialog.askopenfilename(filetypes=[("PSD files", "*.psd")])
         if file_path:
-            try:
-                self.editor.open_psd(file_path)
-                self.update_layer_list()
-                self.selected_layer_index = None
-                self.update_preview()
-                self.status_bar.configure(text=f"Opened PSD file: {file_path}")
-            except Exception as e:
+            # Nothing rendered from the previous document is useful any more
+            self.render_scheduler.cancel_all()
+            self.status_bar.configure(text=f"Opening PSD file: {file_path}")
+
+            def on_error(e):
                 messagebox.showerror("Error", f"Failed to open PSD file: {e}")
                 print(f"Exception details: {e}")
 
-    def save_composite_image(self):
-        file_path = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[("PNG files", "*.png"), ("JPEG files", "*.jpg;*.jpeg")])
+            self.render_scheduler.submit(
+                'open', lambda progress: self.editor.open_psd(file_path, lazy=True),
+                on_done=lambda _: self.on_psd_opened(file_path), on_error=on_error,
+                description="Opening")
+
+    def on_psd_opened(self, file_path):
+        self.zoom = None
+        self.layer_panel.thumbnails.clear()
+        self.layer_panel.selected_index = None
+        self.update_layer_list()
+        self.selected_layer_index = None
+        self.update_preview()
+        self.status_bar.configure(text=f"Opened PSD file: {file_path}")
+
+    def toggle_tracing(self):
+        if self.tracing_var.get():
+            self.editor.tracer.enable()
+            self.status_bar.configure(text="Render tracing enabled")
+        else:
+            self.editor.tracer.disable()
+            self.status_bar.configure(text="Render tracing disabled")
+
+    def export_trace(self):
+        file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Chrome trace", "*.json")])
         if file_path:
             try:
-                composite_image = self.editor.get_composite_image()
-                if composite_image:
-                    composite_image.save(file_path)
-                    self.status_bar.configure(text=f"Saved composite image: {file_path}")
-                else:
-                    messagebox.showerror("Error", "No image to save.")
+                self.editor.tracer.export_chrome_trace(file_path)
+                self.status_bar.configure(text=f"Saved render trace: {file_path}")
             except Exception as e:
-                messagebox.showerror("Error", f"Failed to save image: {e}")
+                messagebox.showerror("Error", f"Failed to export trace: {e}")
+
+    def save_composite_image(self):
+        file_path = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[("PNG files", "*.png"), ("JPEG files", "*.jpg;*.jpeg")])
+        if file_path:
+            self.export_targets([ExportTarget(file_path)], f"Saved composite image: {file_path}")
+
+    def export_all_sizes(self):
+        file_path = filedialog.asksaveasfilename(
+            title="Export All Sizes (base file name)", defaultextension=".png", filetypes=[("PNG files", "*.png")])
+        if file_path:
+            targets = preset_targets(file_path)
+            self.export_targets(targets, f"Exported {len(targets)} images next to {file_path}")
 
-    def update_layer_list(self):
-        self.layer_listbox.delete(0, tk.END)
-        for layer in self.editor.get_layer_info():
-            name = f"{'[X]' if layer['visible'] else '[ ]'} {layer['name']}"
-            self.layer_listbox.insert(tk.END, name)
+    def export_targets(self, targets, success_message):
+        """Render once and encode every target on the render worker."""
+        if self.editor.psd is None:
+            messagebox.showerror("Error", "No image to save.")
+            return
+
+        def on_done(results):
+            errors = [f"{target.path}: {error}" for target, error in results if error]
+            if errors:
+                messagebox.showerror("Error", "Failed to save image:\n" + "\n".join(errors))
+            else:
+                self.status_bar.configure(text=success_message)
+
+        self.render_scheduler.submit(
+            'save', lambda progress: self.editor.export(targets, progress=progress), on_done=on_done,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to save image: {e}"),
+            description="Saving")
+
+    def show_progress(self, description, done, total):
+        self.status_bar.configure(text=f"{description}... {done}/{total}")
+
+    def update_layer_list(self, layer_info=None):
+        # The model diffs the rows, so the panel only redraws rows that changed
+        self.layer_model.refresh(layer_info if layer_info is not None else self.editor.get_layer_info())
+
+    def apply_edit(self, edit, error_message):
+        """Run edit() on the render worker, then refresh the layer list and preview.
+
+        The worker runs one job at a time, so an edit never changes the editor
+        while a preview, thumbnail or export renders from it. edit returns the
+        status bar text, or None if it changed nothing.
+        """
+        self.render_scheduler.cancel('preview')  # About to be out of date; don't wait for it
+
+        def job(progress):
+            status = edit()
+            return status, self.editor.get_layer_info() if status is not None else None
+
+        def on_done(result):
+            status, layer_info = result
+            if status is None:
+                return
+            if status:
+                self.status_bar.configure(text=status)
+            self.update_layer_list(layer_info)
+            self.update_preview()
+
+        self.render_scheduler.submit(
+            EDIT_CHANNEL, job, on_done=on_done,
+            on_error=lambda e: messagebox.showerror("Error", f"{error_message}: {e}"),
+            description="Editing", supersede=False)
+
+    def selected_layer_id(self):
+        """layer_id of the selected layer panel row, or None."""
+        if getattr(self, 'selected_layer_index', None) is None:
+            return None
+        return self.layer_model.row(self.selected_layer_index).layer_id
 
     def update_preview(self):
         if self.editor.psd is None:
             self.canvas.delete("all")  # Clear the canvas if no PSD is loaded
             return  # No PSD loaded, nothing to update
 
+        origin = None
         if hasattr(self, 'selected_layer_index') and self.selected_layer_index is not None:
-            # Display only the selected layer
-            layer_image = self.editor.get_selected_layer_image(self.selected_layer_index)
-            if layer_image:
-                self.display_image(layer_image)
-            else:
-                self.canvas.delete("all")
+            # Display only the selected layer, cropped to its bounds
+            layer_id = self.selected_layer_id()
+            job = lambda progress: self.editor.get_selected_layer_image(layer_id)
+        elif self.zoom is not None:
+            # Zoomed in or out: render only the visible part of the document at the displayed scale
+            box, origin = self.get_viewport()
+            zoom = self.zoom
+            job = lambda progress: self.editor.get_viewport_image(box, zoom, progress=progress)
         else:
-            # Display the composite image
-            composite_image = self.editor.get_composite_image()
-            if composite_image:
-                self.display_image(composite_image)
-            else:
-                self.canvas.delete("all")
+            # Display the composite image, rendered at about the canvas resolution
+            preview_size = self.get_preview_size()
+            job = lambda progress: self.editor.get_preview_image(preview_size, progress=progress)
+        self._trace_mark = self.editor.tracer.mark()
+        self.render_scheduler.submit('preview', job, on_done=lambda image: self.show_preview(image, origin),
+                                     on_error=lambda e: print(f"Error rendering preview: {e}"))
+
+    def show_preview(self, image, origin=None):
+        if image and origin is not None:
+            # A viewport render is already at display scale; place it where the view puts it
+            self.photo_image = ImageTk.PhotoImage(image)
+            self.canvas.delete("all")
+            self.canvas.create_image(origin[0], origin[1], anchor=tk.NW, image=self.photo_image)
+        elif image:
+            self.display_image(image)
+        else:
+            self.canvas.delete("all")
+        if self.editor.tracer.enabled:
+            self.status_bar.configure(text=self.editor.tracer.format_summary(self._trace_mark))
+
+    def get_viewport(self):
+        """Visible document box (left, top, right, bottom) at the current zoom and its position on the canvas."""
+        canvas_width, canvas_height = self.get_preview_size()
+        view_left = self.view_center[0] - canvas_width / (2 * self.zoom)
+        view_top = self.view_center[1] - canvas_height / (2 * self.zoom)
+        width, height = self.editor.psd.size
+        left = max(0, int(view_left))
+        top = max(0, int(view_top))
+        right = min(width, int(view_left + canvas_width / self.zoom) + 1)
+        bottom = min(height, int(view_top + canvas_height / self.zoom) + 1)
+        origin = (round((left - view_left) * self.zoom), round((top - view_top) * self.zoom))
+        return (left, top, right, bottom), origin
+
+    def fit_scale(self):
+        canvas_width, canvas_height = self.get_preview_size()
+        width, height = self.editor.psd.size
+        return min(canvas_width / width, canvas_height / height)
+
+    def set_zoom(self, zoom, center=None):
+        if self.editor.psd is None:
+            return
+        self.zoom = min(max(zoom, MIN_ZOOM), MAX_ZOOM)
+        width, height = self.editor.psd.size
+        self.set_view_center(center or self.view_center or (width / 2, height / 2))
+        self.status_bar.configure(text=f"Zoom: {self.zoom * 100:.0f}%")
+        self.update_preview()
+
+    def set_view_center(self, center):
+        # Keep some of the document in view
+        width, height = self.editor.psd.size
+        self.view_center = (min(max(center[0], 0), width), min(max(center[1], 0), height))
+
+    def zoom_in(self):
+        self.set_zoom((self.zoom or self.fit_scale()) * ZOOM_STEP)
+
+    def zoom_out(self):
+        self.set_zoom((self.zoom or self.fit_scale()) / ZOOM_STEP)
+
+    def actual_size(self):
+        self.set_zoom(1.0)
+
+    def fit_to_window(self):
+        self.zoom = None
+        self.status_bar.configure(text="Zoom: fit to window")
+        self.update_preview()
+
+    def zoom_at(self, factor, x, y):
+        """Zoom by factor keeping the document point under canvas position (x, y) in place."""
+        if self.editor.psd is None:
+            return
+        canvas_width, canvas_height = self.get_preview_size()
+        if self.zoom is None:
+            zoom = self.fit_scale()
+            width, height = self.editor.psd.size
+            center = (width / 2, height / 2)
+        else:
+            zoom, center = self.zoom, self.view_center
+        point = (center[0] + (x - canvas_width / 2) / zoom, center[1] + (y - canvas_height / 2) / zoom)
+        new_zoom = min(max(zoom * factor, MIN_ZOOM), MAX_ZOOM)
+        self.set_zoom(new_zoom, (point[0] - (x - canvas_width / 2) / new_zoom,
+                                 point[1] - (y - canvas_height / 2) / new_zoom))
+
+    def start_pan(self, event):
+        self._pan_anchor = (event.x, event.y)
+
+    def pan(self, event):
+        if self.zoom is None or self._pan_anchor is None or getattr(self, 'selected_layer_index', None) is not None:
+            return
+        dx, dy = event.x - self._pan_anchor[0], event.y - self._pan_anchor[1]
+        self._pan_anchor = (event.x, event.y)
+        # Move what is already drawn right away; the newly exposed tiles follow from the render worker
+        self.canvas.move("all", dx, dy)
+        self.set_view_center((self.view_center[0] - dx / self.zoom, self.view_center[1] - dy / self.zoom))
+        self.update_preview()
+
+    def get_preview_size(self):
+        """Size available for the preview, matching the fallback used by display_image."""
+        canvas_width = self.canvas.winfo_width()
+        canvas_height = self.canvas.winfo_height()
+        if canvas_width > 1 and canvas_height > 1:
+            return canvas_width, canvas_height
+        return 500, 500
 
     def display_image(self, image):
         # Resize image to fit canvas while maintaining aspect ratio
@@ -178,7 +418,8 @@ class PSDLayerEditorGUI:
                 new_height = canvas_height
                 new_width = int(canvas_height * image_aspect)
 
-            image = image.resize((new_width, new_height), Image.LANCZOS)
+            with self.editor.tracer.span('gui.resize', category='gui', size=(new_width, new_height)):
+                image = image.resize((new_width, new_height), Image.LANCZOS)
             self.photo_image = ImageTk.PhotoImage(image)
             self.canvas.delete("all")
             self.canvas.create_image((canvas_width - new_width)//2, (canvas_height - new_height)//2, anchor=tk.NW, image=self.photo_image)
@@ -189,26 +430,29 @@ class PSDLayerEditorGUI:
             self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo_image)
 
     def on_resize(self, event):
-        self.update_preview()
+        # <Configure> fires continuously while dragging; only render the final size
+        if self._resize_job is not None:
+            self.master.after_cancel(self._resize_job)
+        self._resize_job = self.master.after(RESIZE_DEBOUNCE_MS, self.on_resize_settled)
+
+    def on_resize_settled(self):
+        self._resize_job = None
+        canvas_size = (self.canvas.winfo_width(), self.canvas.winfo_height())
+        if canvas_size != self._last_canvas_size:
+            self._last_canvas_size = canvas_size
+            self.update_preview()
 
-    def on_layer_select(self, event):
-        selected_indices = self.layer_listbox.curselection()
-        if selected_indices:
-            self.selected_layer_index = selected_indices[0]
-            layer_info = self.editor.get_layer_info()[self.selected_layer_index]
-            self.status_bar.configure(text=f"Selected Layer: {layer_info['name']}")
+    def on_layer_select(self, index):
+        if index is not None:
+            self.selected_layer_index = index
+            self.status_bar.configure(text=f"Selected Layer: {self.layer_model.row(index).name}")
             self.update_preview()
         else:
             self.selected_layer_index = None
             self.update_preview()
 
-    def on_right_click(self, event):
+    def on_right_click(self, index, event):
         try:
-            index = self.layer_listbox.nearest(event.y)
-            self.layer_listbox.selection_clear(0, tk.END)
-            self.layer_listbox.selection_set(index)
-            self.selected_layer_index = index
-            self.layer_listbox.activate(index)
             self.show_context_menu(event)
         except Exception as e:
             print(f"Error handling right-click: {e}")
@@ -223,8 +467,13 @@ class PSDLayerEditorGUI:
         if hasattr(self, 'selected_layer_index'):
             image_path = filedialog.askopenfilename(filetypes=[("Image files", "*.png;*.jpg;*.jpeg")])
             if image_path:
-                self.editor.replace_layer_image(self.selected_layer_index, image_path)
-                self.update_preview()
+                layer_id = self.selected_layer_id()
+
+                def edit():
+                    self.editor.replace_layer_image(layer_id, image_path)
+                    return ""
+
+                self.apply_edit(edit, "Failed to replace layer image")
         else:
             messagebox.showinfo("Info", "Please select a layer.")
 
@@ -232,17 +481,24 @@ class PSDLayerEditorGUI:
         if hasattr(self, 'selected_layer_index'):
             new_text = simpledialog.askstring("Edit Text", "Enter new text:")
             if new_text is not None:
-                self.editor.edit_layer_text(self.selected_layer_index, new_text)
-                self.update_preview()
+                layer_id = self.selected_layer_id()
+
+                def edit():
+                    self.editor.edit_layer_text(layer_id, new_text)
+                    return ""
+
+                self.apply_edit(edit, "Failed to edit layer text")
         else:
             messagebox.showinfo("Info", "Please select a layer.")
 
     def load_custom_font(self):
         font_path = filedialog.askopenfilename(filetypes=[("Font files", "*.ttf;*.otf")])
         if font_path:
-            self.editor.load_custom_font(font_path)
-            self.status_bar.configure(text=f"Loaded custom font: {os.path.basename(font_path)}")
-            self.update_preview()
+            def edit():
+                self.editor.load_custom_font(font_path)
+                return f"Loaded custom font: {os.path.basename(font_path)}"
+
+            self.apply_edit(edit, "Failed to load font")
 
     def select_font(self):
         # Get list of available fonts
@@ -268,9 +524,12 @@ class PSDLayerEditorGUI:
             selected_indices = font_listbox.curselection()
             if selected_indices:
                 selected_font = font_listbox.get(selected_indices[0])
-                self.editor.select_font(selected_font)
-                self.status_bar.configure(text=f"Selected font: {selected_font}")
-                self.update_preview()
+
+                def edit():
+                    self.editor.select_font(selected_font)
+                    return f"Selected font: {selected_font}"
+
+                self.apply_edit(edit, "Failed to select font")
                 font_window.destroy()
 
         select_button = ctk.CTkButton(font_window, text="Select", command=select_font_command)
@@ -278,11 +537,29 @@ class PSDLayerEditorGUI:
 
     def toggle_visibility(self):
         if hasattr(self, 'selected_layer_index'):
-            self.editor.toggle_layer_visibility(self.selected_layer_index)
-            self.update_layer_list()
-            self.update_preview()
+            layer_id = self.selected_layer_id()
+
+            def edit():
+                self.editor.toggle_layer_visibility(layer_id)
+                return ""
+
+            self.apply_edit(edit, "Failed to toggle layer visibility")
         else:
             messagebox.showinfo("Info", "Please select a layer.")
 
+    def undo(self):
+        def edit():
+            label = self.editor.history.undo_label()
+            return f"Undid {label}" if self.editor.undo() else None
+
+        self.apply_edit(edit, "Failed to undo")
+
+    def redo(self):
+        def edit():
+            label = self.editor.history.redo_label()
+            return f"Redid {label}" if self.editor.redo() else None
+
+        self.apply_edit(edit, "Failed to redo")
+
     def mainloop(self):
         self.master.mainloop()
@@ -0,0 +1,122 @@
+import queue
+import threading
+
+from editor.psd_editor import RenderCancelled
+
+POLL_INTERVAL_MS = 30  # How often the Tk thread checks for finished jobs
+
+
+class RenderTicket:
+    """Handle for one submitted job; cancelling it makes its next progress call raise."""
+    def __init__(self, channel):
+        self.channel = channel
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class RenderScheduler:
+    """Runs render jobs on a worker thread and hands results back to the Tk thread.
+
+    Jobs are submitted on a named channel ('preview', 'save', 'open', ...).
+    A new job on a channel supersedes the previous one: a pending job is
+    dropped and a running one is cancelled at its next progress callback.
+    Jobs run one at a time, so the editor is never rendered from two threads
+    at once, and edits submitted as jobs never change it mid-render.
+    Completion, error and progress callbacks are always invoked on the Tk
+    thread through after().
+    """
+    def __init__(self, master, on_progress=None):
+        self.master = master
+        self.on_progress = on_progress  # Called as on_progress(description, done, total)
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._latest = {}  # channel -> most recent ticket
+        self._worker = threading.Thread(target=self._run, name="render-worker", daemon=True)
+        self._worker.start()
+        self._poll_job = self.master.after(POLL_INTERVAL_MS, self._poll)
+
+    def submit(self, channel, job, on_done=None, on_error=None, description="Rendering", supersede=True):
+        """Queue job(progress) on the worker thread; returns its RenderTicket.
+
+        job receives a progress(done, total) callable to pass on to the
+        editor's render methods; it raises RenderCancelled once the job has
+        been superseded. With supersede=False the job neither cancels nor can
+        be cancelled by other jobs on its channel, so every such job runs, in
+        submission order; use it for edits.
+        """
+        ticket = RenderTicket(channel)
+        if supersede:
+            previous = self._latest.get(channel)
+            if previous is not None:
+                previous.cancel()
+            self._latest[channel] = ticket
+        self._jobs.put((ticket, job, on_done, on_error, description))
+        return ticket
+
+    def cancel(self, channel):
+        ticket = self._latest.pop(channel, None)
+        if ticket is not None:
+            ticket.cancel()
+
+    def cancel_all(self):
+        for channel in list(self._latest):
+            self.cancel(channel)
+
+    def is_busy(self, channel):
+        ticket = self._latest.get(channel)
+        return ticket is not None and not ticket.cancelled
+
+    def _run(self):
+        while True:
+            ticket, job, on_done, on_error, description = self._jobs.get()
+            if ticket.cancelled:
+                continue
+
+            def progress(done, total, ticket=ticket, description=description):
+                if ticket.cancelled:
+                    raise RenderCancelled()
+                self._results.put(('progress', ticket, (description, done, total), None))
+
+            try:
+                result = job(progress)
+            except RenderCancelled:
+                continue
+            except Exception as e:
+                self._results.put(('error', ticket, e, on_error))
+            else:
+                self._results.put(('done', ticket, result, on_done))
+
+    def _poll(self):
+        try:
+            self._drain_results()
+        finally:
+            self._poll_job = self.master.after(POLL_INTERVAL_MS, self._poll)
+
+    def _drain_results(self):
+        latest_progress = None
+        while True:
+            try:
+                kind, ticket, payload, callback = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if ticket.cancelled:
+                continue
+            if kind == 'progress':
+                latest_progress = (ticket, payload)
+                continue
+            if latest_progress is not None and latest_progress[0] is ticket:
+                latest_progress = None  # Don't report progress of a finished job
+            if self._latest.get(ticket.channel) is ticket:
+                del self._latest[ticket.channel]
+            if callback is not None:
+                callback(payload)
+        if latest_progress is not None and self.on_progress is not None:
+            self.on_progress(*latest_progress[1])
+
+    def close(self):
+        self.cancel_all()
+        if self._poll_job is not None:
+            self.master.after_cancel(self._poll_job)
+            self._poll_job = None
@@ -1,18 +1,138 @@
 import os
+import json
+import time
 import importlib
+import threading
+
+# A plugin is described by a manifest, <module>.json next to its module:
+#
+#   {"name": "Sample Plugin", "module": "sample_plugin",
+#    "entry_points": {"menu": "run", "layer_filter": "filter_layer",
+#                     "composite_filter": "filter_composite", "render_event": "on_render_event"}}
+#
+# Every entry point is optional. The menu and the hook registrations are
+# built from manifests alone; a plugin's module is imported the first time
+# one of its entry points is actually called. Modules without a manifest
+# are imported at startup as before, with run/on_render_event as entry points.
+
+MANIFEST_SUFFIX = ".json"
+LEGACY_ENTRY_POINTS = {'menu': 'run', 'render_event': 'on_render_event'}
 
 plugins = []
 
-def load_plugins():
-    plugin_dir = os.path.dirname(__file__)
-    for filename in os.listdir(plugin_dir):
+
+class Plugin:
+    """A plugin known from its manifest, imported on first use, with load and call times recorded."""
+    def __init__(self, name, module_name, entry_points, module=None, load_seconds=0.0):
+        self.name = name
+        self.module_name = module_name
+        self.entry_points = entry_points  # Entry point kind -> function name in the module
+        self.module = module
+        self.load_seconds = load_seconds
+        self.load_error = None
+        self.calls = {}  # Entry point kind -> [count, total seconds]
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Import the plugin's module if that hasn't happened yet; returns None if it fails."""
+        with self._lock:
+            if self.module is None and self.load_error is None:
+                start = time.perf_counter()
+                try:
+                    self.module = importlib.import_module(self.module_name)
+                except Exception as e:
+                    print(f"Error loading plugin '{self.name}': {e}")
+                    self.load_error = e
+                self.load_seconds = time.perf_counter() - start
+            return self.module
+
+    def call(self, kind, *args):
+        """Call the function behind an entry point, importing the module first if needed."""
+        module = self.load()
+        if module is None:
+            return None
+        func = getattr(module, self.entry_points[kind])
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                entry = self.calls.setdefault(kind, [0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+
+    def stats(self):
+        with self._lock:
+            return {
+                'loaded': self.module is not None,
+                'load_ms': self.load_seconds * 1000,
+                'calls': {kind: {'count': count, 'ms': seconds * 1000}
+                          for kind, (count, seconds) in self.calls.items()},
+            }
+
+
+def read_manifest(manifest_path):
+    with open(manifest_path, encoding='utf-8') as manifest_file:
+        manifest = json.load(manifest_file)
+    module = manifest['module']
+    return Plugin(manifest.get('name', module), f"plugins.{module}", dict(manifest.get('entry_points', {})))
+
+
+def load_plugins(plugin_dir=None):
+    # plugin_dir defaults to this package; its modules must be importable as plugins.<module>
+    plugin_dir = plugin_dir or os.path.dirname(__file__)
+    filenames = sorted(os.listdir(plugin_dir))
+    manifest_modules = set()
+    for filename in filenames:
+        if filename.endswith(MANIFEST_SUFFIX):
+            try:
+                plugin = read_manifest(os.path.join(plugin_dir, filename))
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error reading plugin manifest '{filename}': {e}")
+                continue
+            manifest_modules.add(plugin.module_name)
+            plugins.append(plugin)
+    for filename in filenames:
         if filename.endswith(".py") and filename != "__init__.py" and filename != "plugin_manager.py":
             module_name = f"plugins.{filename[:-3]}"
+            if module_name in manifest_modules:
+                continue
+            start = time.perf_counter()
             module = importlib.import_module(module_name)
             if hasattr(module, 'register_plugin'):
-                plugins.append(module)
+                entry_points = {kind: attribute for kind, attribute in LEGACY_ENTRY_POINTS.items()
+                                if hasattr(module, attribute)}
+                plugins.append(Plugin(getattr(module, 'PLUGIN_NAME', module_name), module_name, entry_points,
+                                      module, time.perf_counter() - start))
 
 def populate_menu(menu, gui_instance):
     for plugin in plugins:
-        plugin_name = getattr(plugin, 'PLUGIN_NAME', plugin.__name__)
-        menu.add_command(label=plugin_name, command=lambda p=plugin: p.run(gui_instance))
+        if 'menu' in plugin.entry_points:
+            menu.add_command(label=plugin.name, command=lambda p=plugin: p.call('menu', gui_instance))
+
+def subscribe_to_tracer(tracer):
+    # Plugins with a render_event entry point receive every render trace event
+    for plugin in plugins:
+        if 'render_event' in plugin.entry_points:
+            tracer.subscribe(lambda event, p=plugin: p.call('render_event', event))
+
+def install_render_hooks(render_hooks):
+    # Filters are registered from the manifest; the module is imported at the first render that uses them
+    for plugin in plugins:
+        if 'layer_filter' in plugin.entry_points:
+            render_hooks.add_layer_filter(plugin.name, lambda pixels, layer, p=plugin: p.call('layer_filter', pixels, layer))
+        if 'composite_filter' in plugin.entry_points:
+            render_hooks.add_composite_filter(plugin.name, lambda pixels, scale, p=plugin: p.call('composite_filter', pixels, scale))
+
+def plugin_stats():
+    """Load time and per-entry-point call counts and times of every plugin, by name."""
+    return {plugin.name: plugin.stats() for plugin in plugins}
+
+def format_plugin_stats():
+    lines = []
+    for name, stats in plugin_stats().items():
+        load = f"loaded in {stats['load_ms']:.1f} ms" if stats['loaded'] else "not loaded"
+        calls = ", ".join(f"{kind} ×{entry['count']} {entry['ms']:.1f} ms" for kind, entry in stats['calls'].items())
+        lines.append(f"{name}: {load}" + (f"; {calls}" if calls else ""))
+    return "\n".join(lines) if lines else "No plugins"
@@ -0,0 +1,125 @@
+"""Client for render_server.py, as a library and for one-off requests from the shell.
+
+Usage:
+    python render_client.py --socket /tmp/layer-master.sock ping
+    python render_client.py --socket /tmp/layer-master.sock stats
+    python render_client.py --port 8765 render template.psd -o out.png --text Title=Hello --image Photo=a.jpg
+"""
+import argparse
+import base64
+import itertools
+import json
+import os
+import socket
+import sys
+
+
+class RenderClient:
+    """Blocking connection to a render server; one request at a time."""
+    def __init__(self, socket_path=None, port=None, timeout=None):
+        if socket_path is not None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(timeout)
+            self._socket.connect(socket_path)
+        else:
+            self._socket = socket.create_connection(('127.0.0.1', port), timeout=timeout)
+        self._file = self._socket.makefile('rb')
+        self._ids = itertools.count(1)
+
+    def request(self, payload):
+        """Send one request and return the server's response dict."""
+        payload = dict(payload, id=next(self._ids))
+        self._socket.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Render server closed the connection")
+        return json.loads(line)
+
+    def render(self, template, text=None, image=None, visible=None, output=None, image_format='png', sizes=()):
+        """Render a template with substitutions (by layer name).
+
+        With output, the server writes the file(s) and the response lists
+        them; otherwise the encoded image is returned in response['image']
+        as bytes. Paths are made absolute, since the server resolves them.
+        """
+        request = {
+            'op': 'render',
+            'template': os.path.abspath(template),
+            'text': text or {},
+            'image': {name: os.path.abspath(path) for name, path in (image or {}).items()},
+            'visible': visible or {},
+            'format': image_format,
+            'sizes': list(sizes),
+        }
+        if output is not None:
+            request['output'] = os.path.abspath(output)
+        response = self.request(request)
+        if response.get('image') is not None:
+            response['image'] = base64.b64decode(response['image'])
+        return response
+
+    def stats(self):
+        return self.request({'op': 'stats'})['stats']
+
+    def ping(self):
+        return self.request({'op': 'ping'})['ok']
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def _parse_assignments(values):
+    assignments = {}
+    for value in values:
+        if '=' not in value:
+            raise ValueError(f"Expected LAYER=VALUE, got '{value}'")
+        layer_name, layer_value = value.split('=', 1)
+        assignments[layer_name] = layer_value
+    return assignments
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    address = parser.add_mutually_exclusive_group(required=True)
+    address.add_argument('--socket', help="Unix domain socket of the server")
+    address.add_argument('--port', type=int, help="TCP port of the server at 127.0.0.1")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('ping', help="Check that the server answers")
+    commands.add_parser('stats', help="Print the server's queue, latency and cache statistics")
+    render = commands.add_parser('render', help="Render a template")
+    render.add_argument('template')
+    render.add_argument('-o', '--output', required=True, help="Output image written by the server")
+    render.add_argument('--text', nargs='+', default=[], metavar='LAYER=TEXT')
+    render.add_argument('--image', nargs='+', default=[], metavar='LAYER=PATH')
+    render.add_argument('--hide', nargs='+', default=[], metavar='LAYER')
+    render.add_argument('--show', nargs='+', default=[], metavar='LAYER')
+    render.add_argument('--sizes', type=int, nargs='+', default=[])
+    args = parser.parse_args(argv)
+
+    with RenderClient(args.socket, args.port) as client:
+        if args.command == 'ping':
+            print("ok" if client.ping() else "error")
+            return 0
+        if args.command == 'stats':
+            print(json.dumps(client.stats(), indent=2))
+            return 0
+        visible = dict({name: False for name in args.hide}, **{name: True for name in args.show})
+        response = client.render(args.template, _parse_assignments(args.text), _parse_assignments(args.image),
+                                 visible, args.output, sizes=args.sizes)
+        if not response['ok']:
+            print(f"Error: {response['error']}", file=sys.stderr)
+            return 1
+        print(f"Rendered {', '.join(response['outputs'])} in {response['ms']:.0f} ms")
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""Long-running render service that keeps PSD templates warm between requests.
+
+Usage:
+    python render_server.py --socket /tmp/layer-master.sock --preload template.psd --workers 4
+    python render_server.py --port 8765 --backend numpy --cache-dir ~/.cache/layer-master/renders
+
+Clients connect over a Unix domain socket (or 127.0.0.1:port) and send one
+JSON object per line; each gets one JSON line back, tagged with the
+request's "id". Requests on one connection may be pipelined and are
+answered as they finish.
+    {"id": 1, "op": "render", "template": "/abs/template.psd",
+     "text": {"Title": "Hello"}, "image": {"Photo": "/abs/a.jpg"}, "visible": {"Badge": false},
+     "output": "/abs/out.png", "sizes": [512]}
+        -> {"id": 1, "ok": true, "outputs": [...], "ms": 41.2}
+    Without "output", the PNG (or "format") is returned base64-encoded in "image".
+    {"id": 2, "op": "stats"}   queue depth, latency percentiles, per-worker cache stats
+    {"id": 3, "op": "ping"}
+Template and image paths are resolved by the server, so use absolute paths.
+
+Requests run on a pool of worker processes, each keeping its own parsed
+templates and layer caches. At most --max-pending requests are admitted at
+once; beyond that, requests are answered right away with "busy": true so
+clients can back off instead of piling up work.
+"""
+import argparse
+import asyncio
+import base64
+import io
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from batch import OUTPUT_FORMATS, apply_row, open_template
+from editor.export import ExportTarget
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+DEFAULT_MAX_PENDING_PER_WORKER = 8  # Admitted requests per worker before clients are told to back off
+DEFAULT_MAX_TEMPLATES = 8  # Parsed templates each worker keeps open
+LATENCY_WINDOW = 1000  # Latency percentiles cover this many recent requests
+MAX_REQUEST_BYTES = 1024 * 1024
+
+_editors = OrderedDict()  # Per worker process: (template path, mtime) -> warm PSDEditor, least recently used first
+_worker_options = {}
+
+
+def _init_worker(preload, render_backend, cache_dir, max_templates):
+    _worker_options.update(render_backend=render_backend, cache_dir=cache_dir, max_templates=max_templates)
+    for template_path in preload:
+        _get_editor(template_path)
+
+
+def _get_editor(template_path):
+    """The warm editor for a template, opening (or reopening, if the file changed) it as needed."""
+    template_path = os.path.abspath(template_path)
+    key = (template_path, os.stat(template_path).st_mtime_ns)
+    editor = _editors.get(key)
+    if editor is None:
+        editor = open_template(template_path, _worker_options['render_backend'], _worker_options['cache_dir'])
+        _editors[key] = editor
+        while len(_editors) > _worker_options['max_templates']:
+            _, oldest = _editors.popitem(last=False)
+            oldest.close()
+    _editors.move_to_end(key)
+    return editor
+
+
+def _warm_up():
+    """No-op task used to start every worker process up front."""
+    time.sleep(0.05)  # Keep this worker busy so the pool starts another one for the next warm-up task
+    return os.getpid()
+
+
+def render_request(request):
+    """Serve one render request in a worker process; returns the response without its id."""
+    start = time.perf_counter()
+    try:
+        editor = _get_editor(request['template'])
+        row = {key: request.get(key) or {} for key in ('text', 'image', 'visible')}
+        apply_row(editor, row, os.path.dirname(os.path.abspath(request['template'])))
+        extension = request.get('format', 'png').lower()
+        if extension not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown format '{extension}'")
+        output_path = request.get('output')
+        if output_path:
+            root, output_extension = os.path.splitext(output_path)
+            image_format = OUTPUT_FORMATS.get(output_extension[1:].lower(), OUTPUT_FORMATS[extension])
+            targets = [ExportTarget(output_path, None, image_format)]
+            targets += [ExportTarget(f"{root}_{size}{output_extension}", size, image_format)
+                        for size in request.get('sizes', ())]
+            results = editor.export(targets, workers=len(targets))
+            errors = [error for _, error in results if error]
+            if errors:
+                raise RuntimeError("; ".join(errors))
+            response = {'ok': True, 'outputs': [target.path for target in targets]}
+        else:
+            image = editor.get_composite_image(incremental=False)
+            buffer = io.BytesIO()
+            image.save(buffer, format=OUTPUT_FORMATS[extension])
+            response = {'ok': True, 'image': base64.b64encode(buffer.getvalue()).decode('ascii')}
+    except Exception as e:
+        response = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+    response['ms'] = (time.perf_counter() - start) * 1000
+    response['worker'] = os.getpid()
+    response['cache'] = {path: editor.get_cache_stats() for (path, _), editor in _editors.items()}
+    return response
+
+
+def percentiles(values, points=(50, 90, 99)):
+    """Nearest-rank percentiles of values, by percentile point."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    return {f"p{point}": ordered[min(len(ordered) - 1, max(0, -(-point * len(ordered) // 100) - 1))]
+            for point in points}
+
+
+class RenderServer:
+    """Accepts render requests, admits up to max_pending at a time and runs them on the worker pool."""
+    def __init__(self, workers=DEFAULT_WORKERS, max_pending=None, preload=(), render_backend='pil',
+                 cache_dir=None, max_templates=DEFAULT_MAX_TEMPLATES):
+        self.workers = workers
+        self.max_pending = max_pending or workers * DEFAULT_MAX_PENDING_PER_WORKER
+        self.executor = ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context('spawn'), initializer=_init_worker,
+            initargs=(list(preload), render_backend, cache_dir, max_templates))
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.started = time.time()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)  # Server-side ms, admission to response
+        self._worker_latencies = deque(maxlen=LATENCY_WINDOW)  # Time spent rendering in the worker
+        self._worker_caches = {}  # Worker pid -> latest cache stats it reported
+        self._connections = {}  # Connection handler task -> (writer, its request tasks)
+
+    def warm_up(self):
+        """Start every worker (opening the preloaded templates) before accepting requests."""
+        futures = [self.executor.submit(_warm_up) for _ in range(self.workers)]
+        return sorted({future.result() for future in futures})
+
+    async def handle(self, request):
+        op = request.get('op', 'render')
+        if op == 'ping':
+            return {'ok': True}
+        if op == 'stats':
+            return {'ok': True, 'stats': self.stats()}
+        if op != 'render':
+            return {'ok': False, 'error': f"Unknown op '{op}'"}
+        if 'template' not in request:
+            return {'ok': False, 'error': "Missing 'template'"}
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return {'ok': False, 'busy': True, 'error': "Server busy, retry later"}
+
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(self.executor, render_request, request)
+        except Exception as e:
+            # The worker died (BrokenProcessPool) or the request couldn't be sent to it
+            print(f"Error running render request: {e}", file=sys.stderr)
+            response = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+        finally:
+            self.pending -= 1
+        self._latencies.append((time.perf_counter() - start) * 1000)
+        if 'worker' in response:
+            self._worker_latencies.append(response['ms'])
+            self._worker_caches[response.pop('worker')] = response.pop('cache')
+        if response['ok']:
+            self.completed += 1
+        else:
+            self.failed += 1
+        return response
+
+    def stats(self):
+        latencies = list(self._latencies)
+        return {
+            'uptime_s': time.time() - self.started,
+            'workers': self.workers,
+            'pending': self.pending,
+            'queue_depth': max(0, self.pending - self.workers),  # Admitted but not yet on a worker
+            'max_pending': self.max_pending,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'latency_ms': dict(percentiles(latencies), count=len(latencies), max=max(latencies, default=None)),
+            'render_ms': percentiles(list(self._worker_latencies)),
+            'caches': self._worker_caches,
+        }
+
+    async def serve_connection(self, reader, writer):
+        write_lock = asyncio.Lock()
+        tasks = set()
+        handler = asyncio.current_task()
+        self._connections[handler] = (writer, tasks)
+
+        async def respond(request):
+            response = await self.handle(request)
+            response['id'] = request.get('id')
+            async with write_lock:
+                writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("expected a JSON object")
+                except ValueError as e:
+                    async with write_lock:
+                        writer.write(json.dumps({'ok': False, 'error': f"Invalid request: {e}"}).encode('utf-8') + b'\n')
+                        await writer.drain()
+                    continue
+                task = asyncio.create_task(respond(request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+            print(f"Error on client connection: {e}", file=sys.stderr)
+        finally:
+            writer.close()
+            del self._connections[handler]
+
+    async def disconnect(self):
+        """Close every client connection, dropping its requests in flight, and wait for the handlers to end."""
+        handlers = list(self._connections)
+        for writer, tasks in self._connections.values():
+            for task in tasks:
+                task.cancel()
+            writer.close()
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def serve(server, socket_path=None, port=None):
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)  # Left behind by a previous run
+        listener = await asyncio.start_unix_server(server.serve_connection, socket_path, limit=MAX_REQUEST_BYTES)
+        address = socket_path
+    else:
+        listener = await asyncio.start_server(server.serve_connection, '127.0.0.1', port, limit=MAX_REQUEST_BYTES)
+        address = f"127.0.0.1:{listener.sockets[0].getsockname()[1]}"
+    loop = asyncio.get_running_loop()
+    try:
+        # Closing the listener ends serve_forever(), so SIGTERM shuts down as cleanly as Ctrl+C
+        loop.add_signal_handler(signal.SIGTERM, listener.close)
+    except NotImplementedError:
+        pass  # No loop signal handlers on Windows
+    print(f"Listening on {address} with {server.workers} worker(s)", flush=True)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    except asyncio.CancelledError:
+        if listener.is_serving():
+            raise  # Cancelled from outside, not stopped by SIGTERM
+    finally:
+        await server.disconnect()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    address = parser.add_mutually_exclusive_group(required=True)
+    address.add_argument('--socket', help="Unix domain socket path to listen on")
+    address.add_argument('--port', type=int, help="TCP port to listen on at 127.0.0.1 (0 picks a free one)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Number of worker processes")
+    parser.add_argument('--max-pending', type=int,
+                        help="Requests admitted at once before clients are told to back off "
+                             f"(default {DEFAULT_MAX_PENDING_PER_WORKER} per worker)")
+    parser.add_argument('--preload', nargs='+', default=[], help="Templates every worker opens at startup")
+    parser.add_argument('--max-templates', type=int, default=DEFAULT_MAX_TEMPLATES,
+                        help="Parsed templates each worker keeps warm")
+    parser.add_argument('--backend', choices=['pil', 'numpy'], default='pil', help="Render backend")
+    parser.add_argument('--cache-dir', help="Persistent render cache shared by the workers")
+    args = parser.parse_args(argv)
+
+    server = RenderServer(args.workers, args.max_pending, [os.path.abspath(path) for path in args.preload],
+                          args.backend, args.cache_dir, args.max_templates)
+    start = time.perf_counter()
+    server.warm_up()
+    print(f"Started {args.workers} worker(s) in {time.perf_counter() - start:.1f} s", flush=True)
+    try:
+        asyncio.run(serve(server, args.socket, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+import pytest
+from psd_tools import PSDImage
+from psd_tools.constants import Tag
+
+from editor.psd_editor import PSDEditor
+from helpers import build_sample
+
+
+@pytest.fixture
+def make_psd(tmp_path):
+    """Write a PSD built by build(psd) and return its path.
+
+    With layer_ids=False no layer ID blocks are written, so psd_tools
+    reports layer_id -1 for every layer, like some third-party files.
+    """
+    def make(build=build_sample, size=(64, 64), layer_ids=True, name='document.psd'):
+        psd = PSDImage.new('RGB', size)
+        build(psd)
+        if layer_ids:
+            for layer_id, layer in enumerate(psd.descendants(), start=1):
+                layer.tagged_blocks.set_data(Tag.LAYER_ID, layer_id)
+        path = tmp_path / name
+        psd.save(str(path))
+        return str(path)
+    return make
+
+
+@pytest.fixture
+def sample_psd(make_psd):
+    return make_psd()
+
+
+@pytest.fixture
+def open_editor():
+    """Open a file in a new PSDEditor(**options); the editors' worker processes are released afterwards."""
+    editors = []
+
+    def open_(path, **options):
+        editor = PSDEditor(**options)
+        editor.open_psd(path)
+        editors.append(editor)
+        return editor
+    yield open_
+    for editor in editors:
+        editor.close()
+
+
+@pytest.fixture
+def fresh_composite(open_editor):
+    """Render a file exactly with a new editor, as the reference for cached renders."""
+    def render(path, mode='RGB', **options):
+        return open_editor(path, **options).get_composite_image(incremental=False, mode=mode)
+    return render
@@ -0,0 +1,34 @@
+"""Document builders and image comparisons shared by the tests."""
+import numpy as np
+from PIL import Image
+
+
+def add_solid_layer(psd, name, color, box):
+    """Add a pixel layer filled with one RGBA color over the (left, top, right, bottom) box."""
+    left, top, right, bottom = box
+    return psd.create_pixel_layer(Image.new('RGBA', (right - left, bottom - top), color),
+                                  name=name, left=left, top=top)
+
+
+def build_sample(psd):
+    """Background, a half-transparent red layer and a group holding blue and green layers."""
+    add_solid_layer(psd, 'background', (240, 240, 240, 255), (0, 0) + psd.size)
+    add_solid_layer(psd, 'red', (255, 0, 0, 200), (4, 4, 40, 40))
+    blue = add_solid_layer(psd, 'blue', (0, 0, 255, 255), (20, 20, 60, 50))
+    green = add_solid_layer(psd, 'green', (0, 255, 0, 128), (30, 10, 64, 64))
+    psd.create_group([blue, green], name='group')
+
+
+def build_two_squares(psd):
+    """Two opaque squares on a 100x100 canvas, red top left and green bottom right."""
+    add_solid_layer(psd, 'red', (255, 0, 0, 255), (0, 0, 50, 50))
+    add_solid_layer(psd, 'green', (0, 255, 0, 255), (50, 50, 100, 100))
+
+
+def pixels(image):
+    return np.asarray(image, dtype=np.int16)
+
+
+def max_difference(first, second):
+    """Largest per-channel difference between two images of the same size and mode."""
+    return int(np.abs(pixels(first) - pixels(second)).max())
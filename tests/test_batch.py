@@ -0,0 +1,103 @@
+import json
+
+import pytest
+from PIL import Image
+
+import batch
+from helpers import max_difference
+
+
+def write_lines(path, lines):
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+@pytest.mark.parametrize('value, expected', [
+    (True, True), (False, False), ('1', True), (' Yes ', True), ('show', True), ('visible', True),
+    ('0', False), ('OFF', False), ('hide', False), ('hidden', False),
+])
+def test_parse_visibility(value, expected):
+    assert batch.parse_visibility(value) is expected
+
+
+def test_parse_visibility_rejects_other_values():
+    with pytest.raises(ValueError, match="maybe"):
+        batch.parse_visibility('maybe')
+
+
+def test_read_csv_manifest(tmp_path):
+    path = write_lines(tmp_path / 'rows.csv', [
+        'output,text:Title,image:Photo,visible:Badge,notes,other:Layer',
+        'a.png,Hello,a.jpg,false,ignored,ignored',
+        ',,,,,',
+    ])
+    assert list(batch.read_manifest(path)) == [
+        {'output': 'a.png', 'text': {'Title': 'Hello'}, 'image': {'Photo': 'a.jpg'}, 'visible': {'Badge': 'false'}},
+        {'output': None, 'text': {}, 'image': {}, 'visible': {}},
+    ]
+
+
+def test_read_jsonl_manifest(tmp_path):
+    path = write_lines(tmp_path / 'rows.jsonl', [
+        json.dumps({'output': 'a.png', 'text': {'Title': 'Hello'}, 'visible': {'Badge': False}}),
+        '',
+        json.dumps({'image': {'Photo': 'a.jpg'}}),
+    ])
+    assert list(batch.read_manifest(path)) == [
+        {'output': 'a.png', 'text': {'Title': 'Hello'}, 'image': {}, 'visible': {'Badge': False}},
+        {'output': None, 'text': {}, 'image': {'Photo': 'a.jpg'}, 'visible': {}},
+    ]
+
+
+def expected_render(open_editor, template, hidden=(), replacements=None):
+    editor = open_editor(template)
+    for name in hidden:
+        editor.toggle_layer_visibility(editor.find_layer_id(name))
+    for name, image_path in (replacements or {}).items():
+        editor.replace_layer_image(editor.find_layer_id(name), image_path)
+    return editor.get_composite_image(incremental=False)
+
+
+def test_csv_batch_renders_rows_and_reports_bad_ones(sample_psd, open_editor, tmp_path, capsys):
+    Image.new('RGB', (8, 8), (255, 255, 0)).save(tmp_path / 'yellow.png')
+    manifest = write_lines(tmp_path / 'rows.csv', [
+        'output,image:blue,visible:red,visible:missing',
+        'hidden.png,,false,',
+        ',yellow.png,,',  # Relative to the manifest; red is visible again
+        'unknown.png,,,true',
+        'invalid.png,,maybe,',
+        'last.png,,hide,',
+    ])
+    output_dir = tmp_path / 'out'
+    status = batch.main([sample_psd, manifest, '-o', str(output_dir), '--workers', '1'])
+
+    assert status == 1
+    captured = capsys.readouterr()
+    assert "Layer 'missing' not found" in captured.err
+    assert "Invalid visibility value 'maybe'" in captured.err
+    assert "Rendered 3 row(s), 2 failed" in captured.out
+    assert sorted(path.name for path in output_dir.iterdir()) == ['hidden.png', 'last.png', 'row-00002.png']
+
+    hidden = expected_render(open_editor, sample_psd, hidden=['red'])
+    replaced = expected_render(open_editor, sample_psd, replacements={'blue': str(tmp_path / 'yellow.png')})
+    for name, expected in (('hidden.png', hidden), ('row-00002.png', replaced), ('last.png', hidden)):
+        with Image.open(output_dir / name) as image:
+            assert max_difference(image.convert('RGB'), expected) == 0, name
+
+
+def test_jsonl_batch_writes_extra_sizes(sample_psd, open_editor, tmp_path):
+    manifest = write_lines(tmp_path / 'rows.jsonl', [
+        json.dumps({'output': 'a.png', 'visible': {'group': False}}),
+        json.dumps({'output': 'b.jpg'}),
+    ])
+    output_dir = tmp_path / 'out'
+    status = batch.main([sample_psd, manifest, '-o', str(output_dir), '--workers', '1', '--sizes', '16'])
+
+    assert status == 0
+    assert sorted(path.name for path in output_dir.iterdir()) == ['a.png', 'a_16.png', 'b.jpg', 'b_16.jpg']
+    with Image.open(output_dir / 'a.png') as image:
+        assert max_difference(image.convert('RGB'), expected_render(open_editor, sample_psd, hidden=['group'])) == 0
+    with Image.open(output_dir / 'a_16.png') as image:
+        assert image.size == (16, 16)
+    with Image.open(output_dir / 'b.jpg') as image:
+        assert image.format == 'JPEG'
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from PIL import Image
+from psd_tools import PSDImage
+from psd_tools.constants import BlendMode
+
+from editor.numpy_compositor import BLEND_FUNCTIONS
+from helpers import build_sample, max_difference, pixels
+
+SIZE = 64
+
+
+def build_blended(blend_mode):
+    """A gradient background under a half-transparent gradient layer with the given blend mode."""
+    def build(psd):
+        y, x = np.mgrid[0:SIZE, 0:SIZE]
+        background = np.stack([x * 4, y * 4, (x + y) * 2, np.full_like(x, 255)], -1).astype(np.uint8)
+        psd.create_pixel_layer(Image.fromarray(background, 'RGBA'), name='background')
+        top = np.stack([(SIZE - 1 - y) * 4, x * 3, np.full_like(x, 90), np.full_like(x, 200)], -1)
+        layer = psd.create_pixel_layer(Image.fromarray(top[8:56, 8:56].astype(np.uint8), 'RGBA'),
+                                       name='top', left=8, top=8)
+        layer.blend_mode = getattr(BlendMode, blend_mode.upper())
+    return build
+
+
+@pytest.mark.parametrize('blend_mode', sorted(BLEND_FUNCTIONS))
+def test_numpy_backend_matches_psd_tools(make_psd, fresh_composite, blend_mode):
+    path = make_psd(build_blended(blend_mode))
+    reference = pixels(PSDImage.open(path).composite().convert('RGB'))
+    difference = np.abs(pixels(fresh_composite(path, render_backend='numpy')) - reference)
+    # Off-by-one rounding, plus single pixels where hard mix or darker/lighter color sit on a tie
+    assert difference.mean() < 0.5
+    assert (difference > 8).mean() < 0.01
+
+
+def test_dissolve_dithers_alpha(make_psd, open_editor):
+    editor = open_editor(make_psd(build_blended('dissolve')), render_backend='numpy')
+    image = pixels(editor.get_composite_image(incremental=False))[8:56, 8:56]
+    editor.toggle_layer_visibility(editor.find_layer_id('top'))
+    background = pixels(editor.get_composite_image(incremental=False))[8:56, 8:56]
+    # Pixels either show the background or are fully covered, about 1 - 200 / 255 of them uncovered
+    uncovered = np.all(image == background, axis=-1)
+    assert 0.15 < uncovered.mean() < 0.3
+    top = pixels(editor.get_layer_image(editor.get_layer(editor.find_layer_id('top'))))[..., :3]
+    assert np.all(image[~uncovered] == top[~uncovered])
+
+
+def test_dissolve_tiles_match(make_psd, fresh_composite):
+    path = make_psd(build_blended('dissolve'))
+    untiled = fresh_composite(path, render_backend='numpy')
+    tiled = fresh_composite(path, render_backend='numpy', tiled=True, tile_size=24, render_workers=2)
+    assert max_difference(untiled, tiled) == 0
+
+
+def test_pil_backend_warns_about_blend_modes(make_psd, fresh_composite, capsys):
+    fresh_composite(make_psd(build_blended('multiply')), render_backend='pil')
+    assert "'multiply' blend mode" in capsys.readouterr().out
+
+
+def build_faded(psd):
+    """The sample document with a half-opaque layer and a group at reduced opacity."""
+    build_sample(psd)
+    for layer in psd.descendants():
+        if layer.name == 'red':
+            layer.opacity = 128
+        elif layer.name == 'group':
+            layer.opacity = 180
+
+
+def test_numpy_backend_matches_pil(make_psd, open_editor, tmp_path):
+    path = make_psd(build_faded)
+    image_path = str(tmp_path / 'replacement.png')
+    Image.new('RGBA', (20, 20), (255, 255, 0, 160)).save(image_path)
+    editors = {backend: open_editor(path, render_backend=backend) for backend in ('pil', 'numpy')}
+    for step in ('original', 'replaced', 'hidden'):
+        for mode in ('RGB', 'RGBA'):
+            pil, numpy_image = (editors[backend].get_composite_image(incremental=False, mode=mode)
+                                for backend in ('pil', 'numpy'))
+            assert max_difference(pil, numpy_image) <= 1, (step, mode)
+        for editor in editors.values():
+            if step == 'original':
+                # Not 'red': the PIL backend ignores the opacity of rasters the editor renders itself
+                editor.replace_layer_image(editor.find_layer_id('blue'), image_path)
+            else:
+                editor.toggle_layer_visibility(editor.find_layer_id('green'))
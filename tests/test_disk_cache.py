@@ -0,0 +1,26 @@
+from helpers import max_difference
+
+
+def test_hidden_layer_is_not_cached_blank_on_disk(sample_psd, open_editor, fresh_composite, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    editor = open_editor(sample_psd, disk_cache_dir=cache_dir)
+    layer_id = editor.find_layer_id('red')
+    editor.toggle_layer_visibility(layer_id)
+    editor.get_layer_thumbnail(layer_id, 16)
+
+    # A second editor sharing the directory decodes the layer from disk
+    other = open_editor(sample_psd, disk_cache_dir=cache_dir)
+    assert max_difference(other.get_composite_image(incremental=False), fresh_composite(sample_psd)) == 0
+    assert other.get_cache_stats()['disk']['hits'] > 0
+
+
+def test_warm_render_matches_cold_render(sample_psd, open_editor, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    for _ in range(2):
+        editor = open_editor(sample_psd, disk_cache_dir=cache_dir)
+        editor.toggle_layer_visibility(editor.find_layer_id('blue'))
+        image = editor.get_composite_image(incremental=False)
+    assert editor.get_cache_stats()['disk']['hits'] == 1
+    reference = open_editor(sample_psd)
+    reference.toggle_layer_visibility(reference.find_layer_id('blue'))
+    assert max_difference(image, reference.get_composite_image(incremental=False)) == 0
@@ -0,0 +1,59 @@
+import pytest
+from PIL import ImageFont
+
+from benchmarks.synthetic import add_text_layer
+from editor.font_index import FontIndex
+from helpers import add_solid_layer, max_difference
+
+POSTSCRIPT_NAME = 'Aileron-Regular'
+
+
+@pytest.fixture
+def font_file(tmp_path):
+    """Pillow's built-in default font written to a font directory of its own."""
+    font = ImageFont.load_default()
+    if not hasattr(font, 'font_bytes'):
+        pytest.skip("Pillow's default font is not a TrueType font in this version")
+    directory = tmp_path / 'fonts'
+    directory.mkdir()
+    path = directory / 'Aileron-Regular.ttf'
+    path.write_bytes(font.font_bytes)
+    return str(path)
+
+
+@pytest.fixture
+def font_index(font_file, tmp_path):
+    return FontIndex([str(tmp_path / 'fonts')], str(tmp_path / 'font-index.json'))
+
+
+def build_text(psd):
+    add_solid_layer(psd, 'background', (40, 40, 40, 255), (0, 0) + psd.size)
+    # Engine data as Photoshop writes it: the font set holds the PostScript name
+    add_text_layer(psd, 'Hello', (4, 4, 120, 40), font_name=POSTSCRIPT_NAME, font_size=24, name='title')
+
+
+def test_index_resolves_postscript_full_and_family_names(font_index, font_file, tmp_path):
+    for name in (POSTSCRIPT_NAME, 'aileron regular', 'Aileron'):
+        assert font_index.find(name) == (font_file, 0)
+    assert font_index.find('Aileron', 'Regular') == (font_file, 0)
+    assert font_index.find('MissingFont-Bold') is None
+    # A second index is served from the saved file
+    assert FontIndex([str(tmp_path / 'fonts')], str(tmp_path / 'font-index.json')).find(POSTSCRIPT_NAME) == (font_file, 0)
+
+
+def test_type_layer_font_resolves_through_the_index(make_psd, open_editor, font_index, font_file, tmp_path):
+    path = make_psd(build_text, size=(128, 48))
+    editor = open_editor(path)
+    editor.font_index = font_index
+    image = editor.get_composite_image(incremental=False)
+    assert not editor.missing_fonts
+
+    # The same font given as a file renders identically
+    reference = open_editor(path)
+    reference.load_custom_font(font_file)
+    assert max_difference(image, reference.get_composite_image(incremental=False)) == 0
+
+    unresolved = open_editor(path)
+    unresolved.font_index = FontIndex([], str(tmp_path / 'empty-index.json'))
+    assert max_difference(image, unresolved.get_composite_image(incremental=False)) > 0
+    assert unresolved.missing_fonts == {POSTSCRIPT_NAME}
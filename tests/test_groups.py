@@ -0,0 +1,55 @@
+import pytest
+from PIL import Image
+from psd_tools import PSDImage
+
+from helpers import max_difference
+
+
+@pytest.fixture
+def masked_group_psd(sample_psd, tmp_path):
+    """The sample document with a layer mask on its group: opaque, half and hidden bands."""
+    psd = PSDImage.open(sample_psd)
+    group = next(layer for layer in psd.descendants() if layer.name == 'group')
+    mask = Image.new('L', (32, 64), 0)
+    mask.paste(255, (0, 0, 32, 32))
+    mask.paste(128, (0, 32, 32, 48))
+    group.create_mask(mask, left=20, top=0)
+    path = str(tmp_path / 'masked.psd')
+    psd.save(path)
+    return path
+
+
+@pytest.mark.parametrize('render_backend', ['pil', 'numpy'])
+def test_group_matches_psd_tools(sample_psd, render_backend, open_editor):
+    reference = PSDImage.open(sample_psd).composite().convert('RGB')
+    image = open_editor(sample_psd, render_backend=render_backend).get_composite_image(incremental=False)
+    assert max_difference(image, reference) <= 1
+
+
+@pytest.mark.parametrize('render_backend', ['pil', 'numpy'])
+def test_group_mask_is_applied(masked_group_psd, render_backend, open_editor):
+    reference = PSDImage.open(masked_group_psd).composite().convert('RGB')
+    editor = open_editor(masked_group_psd, render_backend=render_backend)
+    assert max_difference(editor.get_composite_image(incremental=False), reference) <= 1
+
+
+def test_group_mask_applies_to_edited_children(masked_group_psd, tmp_path, open_editor):
+    editor = open_editor(masked_group_psd)
+    image_path = str(tmp_path / 'yellow.png')
+    Image.new('RGB', (8, 8), (255, 255, 0)).save(image_path)
+    editor.replace_layer_image(editor.find_layer_id('blue'), image_path)
+    image = editor.get_composite_image(incremental=False)
+    # Inside the mask's opaque band the replacement shows; right of the mask the group is hidden
+    assert image.getpixel((25, 25)) == (255, 255, 0)
+    assert image.getpixel((56, 25)) == (240, 240, 240)
+
+
+def test_group_mask_on_preview_and_tiles(masked_group_psd, open_editor):
+    editor = open_editor(masked_group_psd, render_backend='numpy', tiled=True, tile_size=24, render_workers=2)
+    exact = open_editor(masked_group_psd, render_backend='numpy').get_composite_image(incremental=False)
+    try:
+        assert max_difference(editor.get_composite_image(), exact) == 0
+    finally:
+        editor.close()
+    preview = editor.get_preview_image((32, 32))
+    assert max_difference(preview, exact.resize(preview.size, Image.BOX)) <= 8
@@ -0,0 +1,122 @@
+from PIL import Image
+
+from editor.history import EditHistory
+from helpers import max_difference
+
+
+def fields(**changes):
+    values = {'visibility': {}, 'replacements': {}, 'text_edits': {}, 'layer_versions': {},
+              'selected_font_name': None, 'custom_font_path': None}
+    values.update(changes)
+    return values
+
+
+def test_history_trims_to_depth():
+    history = EditHistory(max_depth=3)
+    history.reset(fields())
+    for index in range(10):
+        history.commit(f"Edit {index}", fields(text_edits={1: str(index)}))
+    assert history.stats()['undo'] == 3
+    labels = []
+    while history.can_undo():
+        labels.append(history.undo_label())
+        history.undo()
+    assert labels == ['Edit 9', 'Edit 8', 'Edit 7']
+    assert history.current.text_edits == {1: '6'}
+
+
+def test_history_trims_to_replacement_bytes():
+    image = Image.new('RGBA', (64, 64))  # 16 KiB
+    history = EditHistory(max_depth=100, max_bytes=40 * 1024)
+    history.reset(fields())
+    for index in range(5):
+        history.commit('Replace', fields(replacements={1: image.copy()}))
+    # Older replacements are only kept alive by undo steps; two of them fit
+    assert history.stats()['bytes'] <= 40 * 1024
+    assert history.stats()['undo'] == 2
+
+
+def test_unchanged_mappings_are_shared():
+    history = EditHistory()
+    first = history.reset(fields(text_edits={1: 'a'}))
+    second = history.commit('Toggle', fields(text_edits={1: 'a'}, visibility={2: False}))
+    assert second.text_edits is first.text_edits
+    assert second.visibility is not first.visibility
+
+
+def test_commit_drops_redo_renders():
+    history = EditHistory()
+    history.reset(fields())
+    undone = history.commit('Edit', fields(text_edits={1: 'a'}))
+    history.put_render(undone, ('composite',), Image.new('RGB', (4, 4)))
+    history.undo()
+    history.commit('Other edit', fields(text_edits={1: 'b'}))
+    assert history.get_render(undone, ('composite',)) is None
+    assert not history.can_redo()
+
+
+def test_render_of_a_stale_snapshot_is_not_kept():
+    history = EditHistory()
+    stale = history.reset(fields())
+    history.commit('Edit', fields(text_edits={1: 'a'}))
+    assert not history.put_render(stale, ('composite',), Image.new('RGB', (4, 4)))
+    history.undo()
+    assert history.get_render(stale, ('composite',)) is None
+
+
+def test_undo_redo_renders_match_fresh_renders(sample_psd, tmp_path, open_editor):
+    editor = open_editor(sample_psd)
+    original = editor.get_composite_image(incremental=False)
+    image_path = str(tmp_path / 'yellow.png')
+    Image.new('RGB', (8, 8), (255, 255, 0)).save(image_path)
+    editor.replace_layer_image(editor.find_layer_id('blue'), image_path)
+    editor.toggle_layer_visibility(editor.find_layer_id('red'))
+    edited = editor.get_composite_image(incremental=False)
+
+    assert editor.undo() and editor.undo()
+    assert max_difference(editor.get_composite_image(), original) == 0
+    assert editor.redo() and editor.redo()
+    assert max_difference(editor.get_composite_image(), edited) == 0
+
+    reference = open_editor(sample_psd)
+    reference.replace_layer_image(reference.find_layer_id('blue'), image_path)
+    reference.toggle_layer_visibility(reference.find_layer_id('red'))
+    assert max_difference(edited, reference.get_composite_image(incremental=False)) == 0
+
+
+def test_undo_after_branching_renders_the_new_branch(sample_psd, fresh_composite, open_editor):
+    editor = open_editor(sample_psd)
+    red = editor.find_layer_id('red')
+    editor.toggle_layer_visibility(red)
+    editor.get_composite_image()
+    editor.undo()
+    editor.toggle_layer_visibility(editor.find_layer_id('blue'))
+    editor.undo()
+    assert max_difference(editor.get_composite_image(incremental=False), fresh_composite(sample_psd)) == 0
+
+
+def test_render_raced_by_an_edit_is_not_kept(sample_psd, fresh_composite, open_editor):
+    editor = open_editor(sample_psd)
+    red = editor.find_layer_id('red')
+    raced = []
+
+    def edit_mid_render(done, total):
+        if not raced:
+            raced.append(done)
+            editor.toggle_layer_visibility(red)
+
+    editor.get_composite_image(incremental=False, progress=edit_mid_render)
+    editor.undo()
+    assert max_difference(editor.get_composite_image(incremental=False), fresh_composite(sample_psd)) == 0
+
+
+def test_callers_may_modify_returned_images(sample_psd, open_editor):
+    editor = open_editor(sample_psd)
+    first = editor.get_composite_image(incremental=False)
+    expected = first.copy()
+    first.paste((0, 0, 0), (0, 0) + first.size)
+    assert max_difference(editor.get_composite_image(incremental=False), expected) == 0
+    preview = editor.get_preview_image((16, 16))
+    expected = preview.copy()
+    preview.paste((0, 0, 0), (0, 0) + preview.size)
+    assert max_difference(editor.get_preview_image((16, 16)), expected) == 0
@@ -0,0 +1,89 @@
+import pytest
+from PIL import Image
+
+from benchmarks.synthetic import write_synthetic_psd
+from helpers import max_difference
+
+
+@pytest.fixture
+def text_psd(tmp_path):
+    path = str(tmp_path / 'text.psd')
+    write_synthetic_psd(path, (160, 120), layer_count=3, text_layer_count=2, group_depth=1)
+    return path
+
+
+def test_hidden_layer_thumbnail_does_not_blank_the_layer(sample_psd, fresh_composite, open_editor):
+    editor = open_editor(sample_psd)
+    for name in ('red', 'blue', 'group'):
+        layer_id = editor.find_layer_id(name)
+        editor.toggle_layer_visibility(layer_id)
+        # What the layer panel and the selected layer view render for hidden rows
+        editor.get_layer_thumbnail(layer_id, 16)
+        editor.get_selected_layer_image(layer_id)
+        editor.toggle_layer_visibility(layer_id)
+    assert max_difference(editor.get_composite_image(incremental=False), fresh_composite(sample_psd)) == 0
+
+
+def test_hidden_layer_decodes_its_pixels(sample_psd, open_editor):
+    editor = open_editor(sample_psd)
+    layer_id = editor.find_layer_id('blue')
+    editor.toggle_layer_visibility(editor.find_layer_id('group'))
+    image = editor.get_layer_image(editor.get_layer(layer_id))
+    assert image.getpixel((0, 0)) == (0, 0, 255, 255)
+
+
+def test_hide_and_show_round_trip(sample_psd, fresh_composite, open_editor):
+    editor = open_editor(sample_psd)
+    reference = editor.get_composite_image(incremental=False)
+    layer_id = editor.find_layer_id('red')
+    editor.toggle_layer_visibility(layer_id)
+    hidden = editor.get_composite_image()
+    assert max_difference(hidden, reference) > 0
+    editor.toggle_layer_visibility(layer_id)
+    assert max_difference(editor.get_composite_image(), reference) <= 1
+    assert max_difference(editor.get_composite_image(incremental=False), fresh_composite(sample_psd)) == 0
+
+
+def write_image(tmp_path, name, color):
+    path = str(tmp_path / name)
+    Image.new('RGB', (8, 8), color).save(path)
+    return path
+
+
+def test_replacing_again_invalidates_the_layer(sample_psd, tmp_path, open_editor):
+    editor = open_editor(sample_psd)
+    layer_id = editor.find_layer_id('blue')
+    editor.replace_layer_image(layer_id, write_image(tmp_path, 'yellow.png', (255, 255, 0)))
+    yellow = editor.get_composite_image()
+    yellow_preview = editor.get_preview_image((32, 32))
+    magenta_path = write_image(tmp_path, 'magenta.png', (255, 0, 255))
+    editor.replace_layer_image(layer_id, magenta_path)
+    magenta = editor.get_composite_image()
+    assert max_difference(magenta, yellow) > 0
+    assert max_difference(editor.get_preview_image((32, 32)), yellow_preview) > 0
+
+    reference = open_editor(sample_psd)
+    reference.replace_layer_image(layer_id, magenta_path)
+    assert max_difference(magenta, reference.get_composite_image(incremental=False)) <= 1
+    assert max_difference(editor.get_composite_image(incremental=False),
+                          reference.get_composite_image(incremental=False)) == 0
+
+
+def test_text_edits_invalidate_the_layer(text_psd, open_editor):
+    editor = open_editor(text_psd)
+    original = editor.get_composite_image(incremental=False)
+    layer_id = editor.find_layer_id('Text 1')
+    renders = {}
+    for text in ('WWWW MMMM', 'iiii', 'WWWW MMMM'):
+        editor.edit_layer_text(layer_id, text)
+        renders.setdefault(text, []).append(editor.get_composite_image(incremental=False))
+    assert max_difference(renders['WWWW MMMM'][0], original) > 0
+    assert max_difference(renders['iiii'][0], renders['WWWW MMMM'][0]) > 0
+    assert max_difference(renders['WWWW MMMM'][1], renders['WWWW MMMM'][0]) == 0
+
+    reference = open_editor(text_psd)
+    reference.edit_layer_text(layer_id, 'WWWW MMMM')
+    assert max_difference(renders['WWWW MMMM'][1], reference.get_composite_image(incremental=False)) == 0
+    for _ in range(3):
+        editor.undo()
+    assert max_difference(editor.get_composite_image(), original) == 0
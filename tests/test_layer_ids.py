@@ -0,0 +1,40 @@
+from helpers import build_two_squares, max_difference
+
+
+def test_layers_without_ids_get_unique_ids(make_psd, open_editor):
+    editor = open_editor(make_psd(build_two_squares, size=(100, 100), layer_ids=False))
+    assert [layer.layer_id for layer in editor.psd.descendants()] == [-1, -1]
+    layer_ids = [info['layer_id'] for info in editor.get_layer_info()]
+    assert len(set(layer_ids)) == 2
+    assert [editor.get_layer(layer_id).name for layer_id in layer_ids] == ['red', 'green']
+    # Assigned in document order, so they are stable across opens
+    assert [info['layer_id'] for info in open_editor(editor.file_path).get_layer_info()] == layer_ids
+
+
+def test_layers_without_ids_render_their_own_pixels(make_psd, open_editor):
+    editor = open_editor(make_psd(build_two_squares, size=(100, 100), layer_ids=False))
+    image = editor.get_composite_image(incremental=False)
+    assert image.getpixel((10, 10)) == (255, 0, 0)
+    assert image.getpixel((80, 80)) == (0, 255, 0)
+
+
+def test_layers_without_ids_are_edited_separately(make_psd, open_editor):
+    with_ids = open_editor(make_psd(build_two_squares, size=(100, 100), name='with_ids.psd'))
+    without_ids = open_editor(make_psd(build_two_squares, size=(100, 100), layer_ids=False))
+    for editor in (with_ids, without_ids):
+        editor.toggle_layer_visibility(editor.find_layer_id('green'))
+        editor.get_composite_image()
+    assert max_difference(with_ids.get_composite_image(), without_ids.get_composite_image()) == 0
+    assert without_ids.get_composite_image(incremental=False).getpixel((10, 10)) == (255, 0, 0)
+
+
+def test_repeated_ids_are_replaced(make_psd, open_editor):
+    from psd_tools.constants import Tag
+
+    def build(psd):
+        build_two_squares(psd)
+        for layer in psd.descendants():
+            layer.tagged_blocks.set_data(Tag.LAYER_ID, 7)
+
+    editor = open_editor(make_psd(build, size=(100, 100), layer_ids=False))
+    assert [info['layer_id'] for info in editor.get_layer_info()] == [7, 8]
@@ -0,0 +1,69 @@
+from PIL import Image
+
+from gui.layer_model import LayerListModel
+from helpers import build_two_squares
+
+
+def subscribed_model():
+    model = LayerListModel()
+    changes = []
+    model.subscribe(lambda kind, indices: changes.append((kind, indices)))
+    return model, changes
+
+
+def test_first_refresh_resets(sample_psd, open_editor):
+    editor = open_editor(sample_psd)
+    model, changes = subscribed_model()
+    model.refresh(editor.get_layer_info())
+    assert changes == [('reset', None)]
+    assert [row.name for row in model.rows] == ['background', 'red', 'group', 'blue', 'green']
+    assert [row.depth for row in model.rows] == [0, 0, 0, 1, 1]
+
+
+def test_unchanged_refresh_is_silent(sample_psd, open_editor):
+    editor = open_editor(sample_psd)
+    model, changes = subscribed_model()
+    model.refresh(editor.get_layer_info())
+    model.refresh(editor.get_layer_info())
+    assert changes == [('reset', None)]
+
+
+def test_visibility_change_updates_one_row(sample_psd, open_editor):
+    editor = open_editor(sample_psd)
+    model, changes = subscribed_model()
+    model.refresh(editor.get_layer_info())
+    editor.toggle_layer_visibility(editor.find_layer_id('red'))
+    model.refresh(editor.get_layer_info())
+    assert changes[-1] == ('update', [model.index_of(editor.find_layer_id('red'))])
+    assert not model.row(model.index_of(editor.find_layer_id('red'))).visible
+
+
+def test_replacement_updates_the_layer_and_its_group(sample_psd, tmp_path, open_editor):
+    editor = open_editor(sample_psd)
+    model, changes = subscribed_model()
+    model.refresh(editor.get_layer_info())
+    image_path = str(tmp_path / 'yellow.png')
+    Image.new('RGB', (8, 8), (255, 255, 0)).save(image_path)
+    blue = editor.find_layer_id('blue')
+    editor.replace_layer_image(blue, image_path)
+    model.refresh(editor.get_layer_info())
+    assert changes[-1] == ('update', [model.index_of(editor.find_layer_id('group')), model.index_of(blue)])
+
+
+def test_other_document_resets(sample_psd, make_psd, open_editor):
+    editor = open_editor(sample_psd)
+    model, changes = subscribed_model()
+    model.refresh(editor.get_layer_info())
+    model.refresh(open_editor(make_psd(build_two_squares, size=(100, 100), name='other.psd')).get_layer_info())
+    assert changes[-1] == ('reset', None)
+    assert len(model) == 2
+
+
+def test_rows_are_unique_for_files_without_layer_ids(make_psd, open_editor):
+    editor = open_editor(make_psd(build_two_squares, size=(100, 100), layer_ids=False))
+    model, changes = subscribed_model()
+    model.refresh(editor.get_layer_info())
+    assert [model.index_of(row.layer_id) for row in model.rows] == [0, 1]
+    red, green = (editor.get_layer_thumbnail(row.layer_id, 8) for row in model.rows)
+    assert red.getpixel((0, 0)) == (255, 0, 0, 255)
+    assert green.getpixel((0, 0)) == (0, 255, 0, 255)
@@ -0,0 +1,110 @@
+import json
+import sys
+
+import pytest
+from PIL import Image
+
+import plugins
+from editor.render_hooks import RenderHooks
+from helpers import max_difference, pixels
+from plugins import plugin_manager
+
+FILTER_PLUGIN = '''
+calls = {'layer': 0, 'composite': 0}
+
+
+def filter_layer(pixels, layer):
+    calls['layer'] += 1
+    if layer.name == 'red':
+        pixels[..., 3] = 0  # Hide the layer
+
+
+def filter_composite(pixels, scale):
+    calls['composite'] += 1
+    return 255 - pixels
+'''
+
+LEGACY_PLUGIN = '''
+PLUGIN_NAME = "Legacy"
+
+
+def register_plugin():
+    pass
+
+
+def run(gui):
+    pass
+'''
+
+
+@pytest.fixture
+def plugin_dir(tmp_path, monkeypatch):
+    """A plugin directory whose modules import as plugins.<module>, and an empty plugin list."""
+    directory = tmp_path / 'plugins'
+    directory.mkdir()
+    monkeypatch.setattr(plugins, '__path__', list(plugins.__path__) + [str(directory)])
+    monkeypatch.setattr(plugin_manager, 'plugins', [])
+    yield directory
+    for name in ('plugins.filter_plugin', 'plugins.legacy_plugin'):
+        sys.modules.pop(name, None)
+
+
+def write_filter_plugin(directory, entry_points):
+    (directory / 'filter_plugin.py').write_text(FILTER_PLUGIN, encoding='utf-8')
+    manifest = {'name': 'Filters', 'module': 'filter_plugin', 'entry_points': entry_points}
+    (directory / 'filter_plugin.json').write_text(json.dumps(manifest), encoding='utf-8')
+
+
+def test_manifests_are_discovered_without_importing(plugin_dir, capsys):
+    write_filter_plugin(plugin_dir, {'layer_filter': 'filter_layer', 'composite_filter': 'filter_composite'})
+    (plugin_dir / 'broken.json').write_text('{"name": "No module"}', encoding='utf-8')
+    (plugin_dir / 'legacy_plugin.py').write_text(LEGACY_PLUGIN, encoding='utf-8')
+    plugin_manager.load_plugins(str(plugin_dir))
+
+    assert "Error reading plugin manifest 'broken.json'" in capsys.readouterr().out
+    assert [plugin.name for plugin in plugin_manager.plugins] == ['Filters', 'Legacy']
+    assert 'plugins.filter_plugin' not in sys.modules
+    # Modules without a manifest are imported at startup
+    assert 'plugins.legacy_plugin' in sys.modules
+    stats = plugin_manager.plugin_stats()
+    assert not stats['Filters']['loaded'] and stats['Legacy']['loaded']
+
+
+def test_filters_are_registered_from_the_manifest_and_imported_on_first_render(plugin_dir):
+    write_filter_plugin(plugin_dir, {'layer_filter': 'filter_layer', 'composite_filter': 'filter_composite'})
+    plugin_manager.load_plugins(str(plugin_dir))
+    hooks = RenderHooks()
+    plugin_manager.install_render_hooks(hooks)
+    assert [name for name, _ in hooks.layer_filters] == ['Filters']
+    assert [name for name, _ in hooks.composite_filters] == ['Filters']
+    assert hooks.version == 2
+    assert 'plugins.filter_plugin' not in sys.modules
+
+    image = hooks.apply_composite_filters(Image.new('RGB', (2, 2)))
+    assert image.getpixel((0, 0)) == (255, 255, 255)
+    assert sys.modules['plugins.filter_plugin'].calls['composite'] == 1
+    assert plugin_manager.plugin_stats()['Filters']['calls']['composite_filter']['count'] == 1
+
+
+def test_hooks_change_renders_only_while_installed(plugin_dir, sample_psd, open_editor, fresh_composite):
+    write_filter_plugin(plugin_dir, {'layer_filter': 'filter_layer', 'composite_filter': 'filter_composite'})
+    plugin_manager.load_plugins(str(plugin_dir))
+    editor = open_editor(sample_psd)
+    original = editor.get_composite_image()
+    assert 'plugins.filter_plugin' not in sys.modules
+
+    plugin_manager.install_render_hooks(editor.render_hooks)
+    filtered = editor.get_composite_image()
+    expected = open_editor(sample_psd)
+    expected.toggle_layer_visibility(expected.find_layer_id('red'))
+    assert max_difference(pixels(filtered), 255 - pixels(expected.get_composite_image(incremental=False))) == 0
+    calls = sys.modules['plugins.filter_plugin'].calls
+    layer_calls = calls['layer']
+    assert layer_calls > 0
+    # Layer filters run before rasters are cached, so not again for the next render
+    editor.get_composite_image(incremental=False)
+    assert calls['layer'] == layer_calls
+
+    editor.render_hooks.remove('Filters')
+    assert max_difference(editor.get_composite_image(), original) == 0
+    assert max_difference(editor.get_composite_image(incremental=False), fresh_composite(sample_psd)) == 0
@@ -0,0 +1,51 @@
+import threading
+import time
+
+from gui.render_scheduler import RenderScheduler
+
+
+class FakeMaster:
+    """Stands in for the Tk root; after() callbacks are run by the test."""
+    def after(self, delay, callback):
+        return callback
+
+    def after_cancel(self, job):
+        pass
+
+
+def drain(scheduler, until, timeout=5):
+    deadline = time.time() + timeout
+    while not until() and time.time() < deadline:
+        scheduler._drain_results()
+        time.sleep(0.01)
+    assert until()
+
+
+def test_new_job_supersedes_pending_job_on_its_channel():
+    scheduler = RenderScheduler(FakeMaster())
+    started, gate = threading.Event(), threading.Event()
+    done = []
+    scheduler.submit('other', lambda progress: (started.set(), gate.wait()), on_done=lambda _: done.append('other'))
+    started.wait(5)
+    scheduler.submit('preview', lambda progress: 'first', on_done=done.append)
+    scheduler.submit('preview', lambda progress: 'second', on_done=done.append)
+    gate.set()
+    drain(scheduler, lambda: 'second' in done)
+    assert done == ['other', 'second']
+
+
+def test_edits_all_run_in_order_between_renders():
+    scheduler = RenderScheduler(FakeMaster())
+    started, gate = threading.Event(), threading.Event()
+    log = []
+    scheduler.submit('preview', lambda progress: (started.set(), gate.wait(), log.append('render')))
+    started.wait(5)
+    for index in range(3):
+        scheduler.submit('edit', lambda progress, index=index: log.append(index), supersede=False)
+    scheduler.submit('preview', lambda progress: log.append('render'), on_done=lambda _: log.append('done'))
+    scheduler.cancel_all()  # Cancels the renders, not the edits
+    gate.set()
+    drain(scheduler, lambda: len(log) >= 4)
+    time.sleep(0.05)
+    scheduler._drain_results()
+    assert log == ['render', 0, 1, 2]
@@ -0,0 +1,61 @@
+import io
+import os
+import signal
+import subprocess
+import sys
+
+import pytest
+from PIL import Image
+
+from helpers import max_difference
+from render_client import RenderClient
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def server_port(sample_psd):
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'render_server.py'), '--port', '0', '--workers', '1',
+         '--preload', sample_psd], cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    port = None
+    for line in process.stdout:
+        if line.startswith("Listening on"):
+            port = int(line.split()[2].rsplit(':', 1)[1])
+            break
+    if port is None:
+        process.kill()
+        pytest.fail(f"Render server did not start: {process.stderr.read()}")
+    yield port
+    process.send_signal(signal.SIGTERM)
+    _, errors = process.communicate(timeout=60)
+    assert process.returncode == 0
+    assert 'Traceback' not in errors
+
+
+def test_render_round_trip(server_port, sample_psd, open_editor, tmp_path):
+    def expected_render(path, hidden):
+        editor = open_editor(path)
+        editor.toggle_layer_visibility(editor.find_layer_id(hidden))
+        return editor.get_composite_image(incremental=False)
+
+    with RenderClient(port=server_port, timeout=60) as client:
+        assert client.ping()
+
+        response = client.render(sample_psd, visible={'red': False})
+        assert response['ok'], response
+        image = Image.open(io.BytesIO(response['image']))
+        assert max_difference(image, expected_render(sample_psd, 'red')) == 0
+
+        output = str(tmp_path / 'out.png')
+        response = client.render(sample_psd, visible={'blue': False}, output=output, sizes=[16])
+        assert response['ok'], response
+        assert response['outputs'] == [output, str(tmp_path / 'out_16.png')]
+        with Image.open(output) as image:
+            assert max_difference(image, expected_render(sample_psd, 'blue')) == 0
+
+        response = client.render(str(tmp_path / 'missing.psd'))
+        assert not response['ok']
+
+        stats = client.stats()
+        assert (stats['completed'], stats['failed'], stats['pending']) == (2, 1, 0)
@@ -0,0 +1,44 @@
+import codecs
+
+from psd_tools.psd.engine_data import EngineData
+
+from editor.text_style import DEFAULT_FONT_NAME, parse_text_style
+
+
+def engine_string(value):
+    return b'(' + codecs.BOM_UTF16_BE + value.encode('utf-16-be') + b')'
+
+
+def engine_data(font_names, font_index, font_size=36.0, fill_values='1.0 1.0 0.0'):
+    """Engine data laid out as Photoshop writes it: ResourceDict next to EngineDict, not inside it."""
+    font_set = b' '.join(b'<< /Name ' + engine_string(name) + b' /Type 0 >>' for name in font_names)
+    return EngineData.frombytes(
+        b'<< /EngineDict << /Editor << /Text ' + engine_string('Hello\r') + b' >>'
+        b' /StyleRun << /RunArray [ << /StyleSheet << /StyleSheetData << /Font ' + str(font_index).encode()
+        + b' /FontSize ' + str(font_size).encode() + b' /FillColor << /Type 1 /Values [ '
+        + fill_values.encode() + b' ] >> >> >> >> ] /RunLengthArray [ 6 ] >> >>'
+        b' /ResourceDict << /FontSet [ ' + font_set + b' ] >> >>')
+
+
+def parse(data):
+    return parse_text_style(data['EngineDict'], data['ResourceDict'])
+
+
+def test_font_name_comes_from_the_resource_dict():
+    style = parse(engine_data(['AdobeInvisFont', 'MyriadPro-Regular'], 1))
+    assert style.font_name == 'MyriadPro-Regular'  # Unquoted, not the engine data string's repr
+
+
+def test_size_and_fill_color():
+    style = parse(engine_data(['ArialMT'], 0))
+    assert style == ('ArialMT', 36, (255, 255, 0, 255))
+
+
+def test_missing_font_set_falls_back_to_default_font():
+    data = engine_data(['ArialMT'], 0)
+    style = parse_text_style(data['EngineDict'], {})
+    assert (style.font_name, style.font_size) == (DEFAULT_FONT_NAME, 36)
+
+
+def test_missing_style_run_falls_back_to_defaults():
+    assert parse_text_style({}, {}).font_name == DEFAULT_FONT_NAME
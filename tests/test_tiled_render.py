@@ -0,0 +1,35 @@
+import pytest
+from PIL import Image
+
+from helpers import max_difference
+
+
+def apply_edits(editor, image_path):
+    editor.replace_layer_image(editor.find_layer_id('blue'), image_path)
+    editor.toggle_layer_visibility(editor.find_layer_id('red'))
+
+
+@pytest.mark.parametrize('backend', ['pil', 'numpy'])
+def test_tiled_matches_untiled(sample_psd, open_editor, tmp_path, backend):
+    image_path = str(tmp_path / 'replacement.png')
+    Image.new('RGB', (12, 20), (255, 255, 0)).save(image_path)
+    untiled = open_editor(sample_psd, render_backend=backend)
+    # Tiles smaller than the layers, so most layers span several tiles
+    tiled = open_editor(sample_psd, render_backend=backend, tiled=True, tile_size=16, render_workers=2)
+    for mode in ('RGB', 'RGBA'):
+        assert max_difference(tiled.get_composite_image(mode=mode),
+                              untiled.get_composite_image(incremental=False, mode=mode)) == 0
+    apply_edits(untiled, image_path)
+    apply_edits(tiled, image_path)
+    assert max_difference(tiled.get_composite_image(), untiled.get_composite_image(incremental=False)) == 0
+
+
+def test_streamed_tiles_stitch_to_the_composite(sample_psd, open_editor):
+    editor = open_editor(sample_psd, tiled=True, tile_size=24, render_workers=2)
+    stitched = Image.new('RGBA', editor.psd.size)
+    boxes = []
+    for box, tile in editor.iter_composite_tiles():
+        boxes.append(box)
+        stitched.paste(tile, box[:2])
+    assert len(boxes) == 9
+    assert max_difference(stitched, editor.get_composite_image(mode='RGBA')) == 0
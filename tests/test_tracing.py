@@ -0,0 +1,38 @@
+import time
+
+from editor.tracing import Tracer
+
+
+def span_event(name, ts, dur, tid=1):
+    return {'name': name, 'cat': 'render', 'ph': 'X', 'ts': ts, 'dur': dur, 'pid': 1, 'tid': tid, 'args': {}}
+
+
+def test_self_time_leaves_out_nested_spans():
+    tracer = Tracer()
+    # render [0, 10 ms) holds two blends and a group, which holds one more blend
+    for event in (span_event('blend', 1000, 2000), span_event('blend', 4000, 1000),
+                  span_event('group', 3000, 5000), span_event('render', 0, 10000),
+                  span_event('decode', 500, 3000, tid=2)):  # Other thread, not nested
+        tracer.emit(event)
+    spans = tracer.summary()['spans']
+    assert spans['render']['ms'] == 10
+    assert spans['render']['self_ms'] == 3  # 10 - blend 2 - group 5
+    assert spans['group']['self_ms'] == 4
+    assert spans['blend']['self_ms'] == 3 and spans['blend']['count'] == 2
+    assert spans['decode']['self_ms'] == 3
+
+
+def test_status_summary_leads_with_the_slow_stage():
+    tracer = Tracer()
+    tracer.enable()
+    mark = tracer.mark()
+    with tracer.span('render'):
+        with tracer.span('preview'):
+            with tracer.span('layer.decode'):
+                time.sleep(0.05)
+            with tracer.span('blend'):
+                pass
+    tracer.counter('layer_cache', hits=3, misses=1, bytes=0)
+    summary = tracer.format_summary(mark)
+    assert summary.startswith('layer.decode ')
+    assert summary.endswith('cache 75% hits')
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from helpers import max_difference, pixels
+
+BOXES = [(0, 0, 64, 64), (5, 7, 41, 30), (20, 20, 64, 50)]
+
+
+@pytest.fixture
+def editor(sample_psd, open_editor):
+    return open_editor(sample_psd)
+
+
+@pytest.mark.parametrize('box', BOXES)
+def test_viewport_matches_crop_of_composite(editor, box):
+    composite = editor.get_composite_image(incremental=False)
+    assert max_difference(editor.get_viewport_image(box, 1, tile_size=16), composite.crop(box)) == 0
+    # Zoomed in, document pixels are repeated
+    size = ((box[2] - box[0]) * 2, (box[3] - box[1]) * 2)
+    assert max_difference(editor.get_viewport_image(box, 2, tile_size=16),
+                          composite.crop(box).resize(size, Image.NEAREST)) == 0
+
+
+def test_zoomed_out_viewport_is_close_to_scaled_composite(editor):
+    composite = editor.get_composite_image(incremental=False)
+    viewport = editor.get_viewport_image((0, 0, 64, 64), 0.5, tile_size=16)
+    assert viewport.size == (32, 32)
+    # Rendered from half-size layer proxies, so only edges differ
+    assert np.abs(pixels(viewport) - pixels(composite.resize((32, 32), Image.LANCZOS))).mean() < 4
+
+
+def test_viewport_follows_edits(editor):
+    box = (10, 10, 50, 50)
+    before = editor.get_viewport_image(box, 1, tile_size=16)
+    editor.toggle_layer_visibility(editor.find_layer_id('blue'))
+    after = editor.get_viewport_image(box, 1, tile_size=16)
+    assert max_difference(after, before) > 0
+    assert max_difference(after, editor.get_composite_image(incremental=False).crop(box)) == 0
+    editor.undo()
+    assert max_difference(editor.get_viewport_image(box, 1, tile_size=16), before) == 0
+
+
+def test_viewport_outside_document(editor):
+    assert editor.get_viewport_image((70, 70, 90, 90), 1) is None